@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Job, JobAnalysis
+from .models import Company, Job, JobAggregate, JobAnalysis, SalaryMonthlyRollup, CrawlTask
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
@@ -11,12 +11,32 @@ class CompanyAdmin(admin.ModelAdmin):
 class JobAdmin(admin.ModelAdmin):
     list_display = ('title', 'company', 'job_type', 'salary_min', 'salary_max', 'province', 'city', 'publish_date')
     search_fields = ('title', 'company__name', 'job_type', 'province', 'city')
-    list_filter = ('job_type', 'province', 'publish_date')
+    list_filter = ('is_active', 'job_type', 'education_level', 'province', 'publish_date')
     date_hierarchy = 'publish_date'
     readonly_fields = ('created_at', 'updated_at')
 
 @admin.register(JobAnalysis)
 class JobAnalysisAdmin(admin.ModelAdmin):
-    list_display = ('analysis_type', 'analysis_date')
+    list_display = ('analysis_type', 'analysis_date', 'duration_ms')
     list_filter = ('analysis_type', 'analysis_date')
     date_hierarchy = 'analysis_date'
+
+@admin.register(JobAggregate)
+class JobAggregateAdmin(admin.ModelAdmin):
+    list_display = ('dimension', 'parent', 'key', 'job_count', 'salary_count', 'salary_total', 'updated_at')
+    search_fields = ('parent', 'key')
+    list_filter = ('dimension',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(SalaryMonthlyRollup)
+class SalaryMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('job_type', 'month', 'job_count', 'salary_count', 'salary_min_low', 'salary_max_high', 'updated_at')
+    search_fields = ('job_type',)
+    date_hierarchy = 'month'
+    readonly_fields = ('updated_at',)
+
+@admin.register(CrawlTask)
+class CrawlTaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'pages_fetched', 'rows_saved', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
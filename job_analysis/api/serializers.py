@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..models import Company, Job, JobAnalysis
+from ..models import Company, Job, JobAnalysis, CrawlTask
 
 class CompanySerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,11 +15,22 @@ class JobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'company', 'company_name', 'industry',
             'job_type', 'salary_min', 'salary_max', 'province', 'city',
-            'description', 'requirement', 'publish_date', 'source_url', 'tags',
-            'created_at', 'updated_at'
+            'description', 'requirement', 'education_level', 'publish_date', 'source_url', 'source', 'external_id', 'tags',
+            'is_active', 'delisted_at', 'created_at', 'updated_at'
         ]
 
 class JobAnalysisSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobAnalysis
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+
+class CrawlTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CrawlTask
+        fields = '__all__'
+
+class CrawlRequestSerializer(serializers.Serializer):
+    """手动触发爬取的请求参数"""
+    job_type = serializers.ChoiceField(choices=[(1, '全职'), (2, '实习'), (3, '兼职')], default=1)
+    max_pages = serializers.IntegerField(min_value=1, max_value=1000, default=10)
+    incremental = serializers.BooleanField(default=False)
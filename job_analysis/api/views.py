@@ -3,16 +3,27 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q, Avg
-from ..models import Company, Job, JobAnalysis
-from .serializers import CompanySerializer, JobSerializer, JobAnalysisSerializer
+from django.db.models import Q
+from django.utils import timezone
+from ..models import Company, Job, JobAnalysis, SalaryMonthlyRollup, CrawlTask
+from .serializers import CompanySerializer, JobSerializer, JobAnalysisSerializer, CrawlTaskSerializer, CrawlRequestSerializer
 from ..utils.data_analyzer import JobDataAnalyzer
-from ..crawler.crawler_manager import CrawlerManager
+from ..utils.aggregation import drilldown
+from ..utils.salary_rollup import salary_trend as salary_trend_from_rollups
+from ..crawler.tasks import submit_crawl
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import numpy as np
 from sklearn.linear_model import LinearRegression
-import random
+
+# 地区分布可下钻的层级：参数名 -> 职位字段
+DRILLDOWN_LEVELS = {
+    'province': 'province',
+    'city': 'city',
+    'job_type': 'job_type',
+    'industry': 'company__industry',
+    'education': 'education_level',
+}
 
 class StandardResultsSetPagination(PageNumberPagination):
     """标准分页类"""
@@ -45,6 +56,11 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         queryset = Job.objects.all()
         
+        # 列表默认只返回在招职位，include_inactive=true时包含已下架职位；详情仍可访问已下架职位
+        include_inactive = self.request.query_params.get('include_inactive', '').lower() in ('1', 'true')
+        if self.action == 'list' and not include_inactive:
+            queryset = queryset.active()
+        
         # 排除指定ID
         exclude_id = self.request.query_params.get('exclude_id')
         if exclude_id:
@@ -65,6 +81,11 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
         if job_type:
             queryset = queryset.filter(job_type__icontains=job_type)
             
+        # 筛选学历要求，多个学历层次用逗号分隔
+        education = self.request.query_params.get('education')
+        if education:
+            queryset = queryset.filter(education_level__in=[level for level in education.split(',') if level])
+            
         # 筛选省份
         province = self.request.query_params.get('province')
         if province:
@@ -109,24 +130,36 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def crawl(self, request):
-        """手动触发爬取职位数据"""
-        job_type = request.data.get('job_type', 1)
-        max_pages = request.data.get('max_pages', 10)
+        """手动触发爬取职位数据，提交后台任务后立即返回任务ID，参数不合法时返回400"""
+        serializer = CrawlRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'message': '爬取参数不合法',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            crawler_manager = CrawlerManager()
-            saved_count = crawler_manager.crawl_and_save(job_type=job_type, max_pages=max_pages)
+            task = submit_crawl(**serializer.validated_data)
             
             return Response({
-                'status': 'success',
-                'message': f'成功爬取并保存 {saved_count} 条职位数据'
-            })
+                'status': 'accepted',
+                'task_id': task.pk,
+                'message': f'爬取任务已提交，可通过 /api/crawl-tasks/{task.pk}/ 查询进度'
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({
                 'status': 'error',
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class CrawlTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """爬取任务视图集，用于查询后台爬取任务的状态和进度"""
+    queryset = CrawlTask.objects.all()
+    serializer_class = CrawlTaskSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+
 class AnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     """数据分析视图集"""
     queryset = JobAnalysis.objects.all()
@@ -152,9 +185,10 @@ class AnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def run_analysis(self, request):
-        """手动触发数据分析"""
+        """手动触发数据分析，请求参数full为true时先全量重建聚合计数"""
         try:
-            results = JobDataAnalyzer.perform_all_analysis()
+            full = str(request.data.get('full', '')).lower() in ('1', 'true')
+            results = JobDataAnalyzer.perform_all_analysis(full=full)
             
             return Response({
                 'status': 'success',
@@ -187,7 +221,31 @@ class AnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def location(self, request):
-        """获取地区分布分析结果"""
+        """获取地区分布分析结果
+        
+        指定levels（如province,city,job_type）或top（如10,5）时按在招职位实时计算多级分布，
+        所有层级由一条分组查询得到；否则返回已保存的分析结果。
+        """
+        levels = request.query_params.get('levels')
+        top = request.query_params.get('top')
+        if levels or top:
+            levels = [level.strip() for level in (levels or 'province,city').split(',') if level.strip()]
+            unknown = [level for level in levels if level not in DRILLDOWN_LEVELS]
+            if not levels or unknown:
+                return Response(
+                    {'error': f"不支持的层级: {','.join(unknown)}，可选: {','.join(DRILLDOWN_LEVELS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                top = [int(value) for value in top.split(',')] if top else None
+            except ValueError:
+                return Response({'error': 'top参数应为逗号分隔的整数'}, status=status.HTTP_400_BAD_REQUEST)
+            if top and min(top) < 1:
+                return Response({'error': 'top参数应为正整数'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            tree = drilldown(Job.objects.active(), [DRILLDOWN_LEVELS[level] for level in levels], top=top)
+            return Response({'levels': levels, 'tree': tree})
+        
         analysis = JobAnalysis.objects.filter(analysis_type='location_distribution').first()
         if not analysis:
             return Response({'error': '没有地区分布分析数据'}, status=status.HTTP_404_NOT_FOUND)
@@ -214,79 +272,51 @@ class AnalysisViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def job_type_salary(self, request):
-        """获取特定岗位类型的薪资走向和预测"""
+        """获取特定岗位类型的薪资走向和预测
+        
+        薪资走向读取入库时维护的月度薪资汇总，按岗位类型精确匹配，一次查询取出截至本月的最近months个月（默认12），
+        耗时与月份数有关，与职位数无关，相同数据下重复请求结果一致。
+        """
         job_type = request.query_params.get('job_type')
         if not job_type:
             return Response({'error': '必须提供岗位类型参数'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            months = min(max(int(request.query_params.get('months', 12)), 1), 120)
+        except ValueError:
+            return Response({'error': 'months必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 查询该岗位类型的所有职位
-        jobs = Job.objects.filter(job_type__icontains=job_type)
-        if not jobs.exists():
-            return Response({'error': f'未找到岗位类型为 {job_type} 的职位'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # 按发布日期分组计算平均薪资
-        salary_trend = []
-        
-        # 获取有薪资信息的职位
-        jobs_with_salary = jobs.filter(
-            salary_min__isnull=False,
-            salary_max__isnull=False
+        # 窗口为本月往前months-1个月到本月，发布日期在未来的汇总行不计入，月份筛选在数据库中完成
+        this_month = timezone.localdate().replace(day=1)
+        first_month = this_month.year * 12 + this_month.month - months
+        window_start = date(first_month // 12, first_month % 12 + 1, 1)
+        rollups = list(
+            SalaryMonthlyRollup.objects.filter(
+                job_type=job_type, month__gte=window_start, month__lte=this_month
+            ).order_by('month')
         )
+        if not rollups:
+            return Response(
+                {'error': f'最近{months}个月未找到岗位类型为 {job_type} 的职位'}, status=status.HTTP_404_NOT_FOUND
+            )
         
-        if not jobs_with_salary.exists():
-            return Response({
-                'job_type': job_type,
-                'salary_trend': [],
-                'predictions': []
-            })
-        
-        # 计算平均薪资
-        avg_min = jobs_with_salary.aggregate(Avg('salary_min'))['salary_min__avg']
-        avg_max = jobs_with_salary.aggregate(Avg('salary_max'))['salary_max__avg']
-        avg_salary = int((avg_min + avg_max) / 2) if avg_min and avg_max else None
+        # 按月合并的真实薪资走势，没有薪资数据的月份不列出
+        salary_trend = salary_trend_from_rollups(rollups)
+        for item in salary_trend:
+            item['is_real'] = True
         
-        if not avg_salary:
+        if not salary_trend:
             return Response({
                 'job_type': job_type,
                 'salary_trend': [],
                 'predictions': []
             })
         
-        # 获取最新日期
-        latest_date = jobs.order_by('-publish_date').first().publish_date
-        
-        # 如果只有当月数据，生成模拟历史数据
-        # 生成过去6个月模拟数据(基于当前平均薪资的随机波动)
-        current_date = latest_date.replace(day=1)
-        
-        # 添加当月真实数据
-        salary_trend.append({
-            'date': current_date.strftime('%Y-%m'),
-            'average_salary': avg_salary,
-            'count': jobs_with_salary.count(),
-            'is_real': True  # 标记为真实数据
-        })
+        # 走势期间按有薪资职位数加权的平均薪资，作为预测的基准
+        total_count = sum(item['count'] for item in salary_trend)
+        avg_salary = int(sum(item['average_salary'] * item['count'] for item in salary_trend) / total_count)
         
-        # 如果只有一个月的数据，添加模拟历史数据
-        if len(salary_trend) <= 1:
-            # 生成过去5个月的模拟数据
-            for i in range(1, 6):
-                past_month = current_date - timedelta(days=30*i)
-                # 基于当前薪资生成带有合理波动的历史数据
-                # 波动范围随时间增加，离现在越远波动越大
-                fluctuation = (random.random() - 0.5) * 0.1 * i  # -5%到+5%之间的波动，乘以月份
-                past_salary = int(avg_salary * (1 - fluctuation))  # 随着时间回溯薪资略有下降趋势
-                
-                # 模拟职位数量，也是随机波动
-                count_fluctuation = random.randint(-2, 2)
-                past_count = max(1, jobs_with_salary.count() + count_fluctuation)
-                
-                salary_trend.insert(0, {
-                    'date': past_month.strftime('%Y-%m'),
-                    'average_salary': past_salary,
-                    'count': past_count,
-                    'is_real': False  # 标记为模拟数据
-                })
+        # 最新的有薪资数据的月份
+        latest_date = datetime.strptime(salary_trend[-1]['date'], '%Y-%m').date()
         
         # 预测未来3个月的薪资
         predictions = []
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+import aiohttp
+from .rate_limiter import RETRYABLE_STATUS, backoff_delay, get_rate_limiter, parse_retry_after
+from .telemetry import log_sampler
+
+logger = logging.getLogger(__name__)
+
+class AsyncJobCrawler:
+    """基于asyncio的职位爬虫
+
+    复用JobCrawler的接口地址、请求头和表单参数，在单线程中通过带连接池的
+    aiohttp会话并发请求，用信号量限制同时在途的请求数。
+    """
+
+    def __init__(self, crawler, max_in_flight=5, timeout=10, keepalive_timeout=30):
+        """
+        Args:
+            crawler: JobCrawler实例，提供接口配置
+            max_in_flight: 最大在途请求数
+            timeout: 单个请求超时时间（秒）
+            keepalive_timeout: 空闲长连接保持时间（秒）
+        """
+        self.crawler = crawler
+        self.max_in_flight = max(max_in_flight, 1)
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+
+    def create_session(self):
+        """创建带连接池的会话"""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_in_flight,
+            limit_per_host=self.max_in_flight,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=self.crawler.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def fetch_jobs(self, session, page=1, size=20, job_type=1):
+        """获取职位列表
+
+        Args:
+            session: aiohttp会话
+            page: 页码
+            size: 每页数量
+            job_type: 职位类型
+
+        Returns:
+            dict: 包含职位列表的响应数据
+        """
+        data = self.crawler.build_form_data(page=page, size=size, job_type=job_type)
+        limiter = get_rate_limiter(self.crawler.base_url)
+        max_retries = self.crawler.max_retries
+
+        for attempt in range(max_retries + 1):
+            await limiter.acquire_async()
+            start = time.monotonic()
+            try:
+                async with session.post(self.crawler.base_url, data=data) as response:
+                    body = await response.read()
+                    latency = time.monotonic() - start
+                    self.crawler.notify_response(latency, response.status)
+                    if response.status in RETRYABLE_STATUS:
+                        limiter.record_failure(
+                            response.status,
+                            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                        )
+                        error = f"HTTP {response.status}"
+                    elif response.status >= 400:
+                        logger.error(f"获取职位列表失败: HTTP {response.status}")
+                        return {"data": {"list": []}, "code": -1, "message": f"HTTP {response.status}"}
+                    else:
+                        limiter.record_success(latency)
+                        self.crawler.telemetry.incr('bytes_received', len(body))
+                        return json.loads(body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                limiter.record_failure()
+                self.crawler.notify_response(time.monotonic() - start, None)
+                error = str(e) or e.__class__.__name__
+            except Exception as e:
+                logger.error(f"获取职位列表失败: {e}")
+                return {"data": {"list": []}, "code": -1, "message": str(e)}
+
+            if attempt < max_retries:
+                delay = backoff_delay(attempt)
+                if log_sampler.allow('retry'):
+                    logger.warning(f"请求失败({error})，{delay:.2f}秒后进行第{attempt + 1}次重试")
+                await asyncio.sleep(delay)
+
+        logger.error(f"获取职位列表失败: {error}")
+        return {"data": {"list": []}, "code": -1, "message": error}
+
+    async def fetch_page(self, session, semaphore, page, job_type):
+        """在并发限制下爬取单页数据
+
+        Args:
+            semaphore: 限制并发的异步上下文管理器，如asyncio.Semaphore
+
+        Returns:
+            list: 该页的职位列表
+        """
+        async with semaphore:
+            result = await self.fetch_jobs(session, page=page, job_type=job_type)
+
+        if result.get('code') != 200:
+            logger.error(f"获取第 {page} 页数据失败: {result.get('message')}")
+            self.crawler.notify_error(page, result.get('message'))
+            return []
+
+        jobs = result.get('data', {}).get('list', [])
+        if not jobs:
+            logger.warning(f"第 {page} 页没有数据")
+        return jobs
+
+    async def aiter_pages(self, job_type=1, max_pages=10, pages=None, session=None, semaphore=None):
+        """并发爬取并按完成顺序逐页产出职位数据
+
+        在途任务数不超过窗口大小，调用方消费慢时不会无限堆积已完成的页面。
+
+        Args:
+            job_type: 职位类型
+            max_pages: 最大爬取页数
+            pages: 指定要爬取的页码列表，用于续爬；为None时先获取第一页确定总页数
+            session: 共享的aiohttp会话，为None时新建一个会话并在结束时关闭
+            semaphore: 共享的并发限制（异步上下文管理器），为None时按max_in_flight新建
+
+        Yields:
+            tuple: (页码, 该页的职位列表)
+        """
+        if session is None:
+            async with self.create_session() as session:
+                async for item in self.aiter_pages(job_type, max_pages, pages, session, semaphore):
+                    yield item
+            return
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        if pages is None:
+            logger.info("正在获取第1页数据以确定总页数...")
+            self.crawler.listing_total = None
+            async with semaphore:
+                result = await self.fetch_jobs(session, page=1, job_type=job_type)
+
+            if result.get('code') != 200:
+                logger.error(f"获取数据失败: {result.get('message')}")
+                self.crawler.notify_error(1, result.get('message'))
+                return
+
+            jobs = result.get('data', {}).get('list', [])
+            if not jobs:
+                logger.warning("第一页没有数据，终止爬取")
+                return
+
+            total_count = result.get('data', {}).get('total_count', 0)
+            self.crawler.listing_total = total_count
+            total_pages = min((total_count + 19) // 20, max_pages)
+            logger.info(f"总共有 {total_count} 条数据，{total_pages} 页")
+
+            yield 1, jobs
+            pages = range(2, total_pages + 1)
+
+        pages = iter(pages)
+        task_to_page = {}
+
+        def schedule(count):
+            for page in itertools.islice(pages, count):
+                task = asyncio.ensure_future(self.fetch_page(session, semaphore, page, job_type))
+                task_to_page[task] = page
+
+        schedule(self.max_in_flight * 2)
+        try:
+            while task_to_page:
+                done, _ = await asyncio.wait(task_to_page, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = task_to_page.pop(task)
+                    schedule(1)
+                    try:
+                        page_jobs = task.result()
+                    except Exception as e:
+                        logger.error(f"处理第 {page} 页时出错: {e}")
+                        self.crawler.notify_error(page, e)
+                        continue
+                    yield page, page_jobs
+        finally:
+            for task in task_to_page:
+                task.cancel()
+
+    def iter_pages(self, job_type=1, max_pages=10, pages=None):
+        """aiter_pages的同步包装，在当前线程中驱动事件循环
+
+        只有调用方取下一页时事件循环才会运行，消费端处理慢时请求自然暂停，形成背压。
+
+        Yields:
+            tuple: (页码, 该页的职位列表)
+        """
+        loop = asyncio.new_event_loop()
+        agen = self.aiter_pages(job_type=job_type, max_pages=max_pages, pages=pages)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
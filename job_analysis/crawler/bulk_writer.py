@@ -0,0 +1,244 @@
+import logging
+from django.db import connection, transaction
+from django.utils import timezone
+from ..models import Company, Job
+from ..utils.fingerprint import compute_content_hash
+from ..utils.job_aggregates import AggregateDelta, STATE_FIELDS, lock_job_states
+from ..utils.salary_rollup import SalaryRollupDelta
+from .job_crawler import SOURCE_JIUYEB
+
+logger = logging.getLogger(__name__)
+
+class BulkJobWriter:
+    """批量写入职位数据
+
+    按批次解析公司、按(数据源, 来源职位ID)唯一键查询已有职位，再用一条upsert语句写入，
+    每批一个事务，避免逐行get_or_create/update_or_create带来的大量往返。
+    已有职位的内容指纹未变化时跳过写入，重复爬取基本不产生写操作，也不会产生重复记录。
+    """
+
+    # 需要随爬取结果更新的职位字段
+    UPDATE_FIELDS = [
+        'job_type', 'salary_min', 'salary_max', 'province', 'city',
+        'description', 'requirement', 'education_level', 'publish_date', 'tags'
+    ]
+
+    # upsert冲突时覆盖的字段，职位名称、公司和链接也以最新爬取结果为准，重新出现的下架职位恢复为在招
+    UPSERT_FIELDS = UPDATE_FIELDS + [
+        'title', 'company', 'source_url', 'content_hash', 'listing_type', 'is_active', 'delisted_at', 'updated_at'
+    ]
+
+    # 标记下架时每条UPDATE语句包含的职位数
+    DELIST_CHUNK_SIZE = 500
+
+    def __init__(self, batch_size=200, source=SOURCE_JIUYEB):
+        """
+        Args:
+            batch_size: 每批写入的职位数量
+            source: 数据源标识，与来源职位ID一起构成职位的唯一键
+        """
+        self.batch_size = batch_size
+        self.source = source
+        # 为集合时记录写入过（含未变化跳过）的来源职位ID，供完整爬取结束后标记下架职位
+        self.seen_ids = None
+
+    def write(self, records):
+        """分批写入职位信息
+
+        Args:
+            records: JobRecord列表（JobExtractor的提取结果）
+
+        Returns:
+            dict: 写入统计，包含inserted、updated和skipped
+        """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        for start in range(0, len(records), self.batch_size):
+            batch_stats = self.write_batch(records[start:start + self.batch_size])
+            for key in stats:
+                stats[key] += batch_stats[key]
+        return stats
+
+    def resolve_companies(self, records):
+        """一次查询解析本批次涉及的公司，不存在的批量创建
+
+        Returns:
+            dict: 公司名称 -> (公司ID, 公司行业)
+        """
+        industries = {}
+        for record in records:
+            industries.setdefault(record.company_name, record.industry)
+
+        # 按ID排序取最早的记录，多个进程并发写入时同名公司总是解析到同一条
+        companies = {}
+        for company_id, name, industry in (
+            Company.objects.filter(name__in=industries).order_by('id').values_list('id', 'name', 'industry')
+        ):
+            companies.setdefault(name, (company_id, industry))
+
+        missing = [name for name in industries if name not in companies]
+        if missing:
+            Company.objects.bulk_create([
+                Company(name=name, industry=industries[name]) for name in missing
+            ])
+            # 部分数据库的bulk_create不回填主键，重新查询一次
+            for company_id, name, industry in (
+                Company.objects.filter(name__in=missing).order_by('id').values_list('id', 'name', 'industry')
+            ):
+                companies.setdefault(name, (company_id, industry))
+
+        return companies
+
+    @transaction.atomic
+    def write_batch(self, records):
+        """在一个事务中写入一批职位
+
+        Args:
+            records: JobRecord列表
+
+        Returns:
+            dict: 本批写入统计，包含inserted、updated和skipped
+        """
+        companies = self.resolve_companies(records)
+
+        # 以来源职位ID去重，同一批中后出现的记录覆盖先出现的
+        records_by_id = {}
+        for record in records:
+            records_by_id[record.external_id] = record
+        if self.seen_ids is not None:
+            self.seen_ids.update(records_by_id)
+
+        # 按唯一索引一次查询取出已有职位的内容指纹、列表类型、在招状态和参与聚合的字段，
+        # 并锁定这些职位，并发写入同一职位时聚合差量不会重复计算
+        existing = self.lock_existing(records_by_id)
+        missing = [external_id for external_id in records_by_id if external_id not in existing]
+        placeholders = set()
+        if missing:
+            # 缺少的职位先插入不计入任何聚合的占位行（已下架、无岗位类型和发布日期、无指纹），再锁定后重新读取。
+            # 查询与插入之间被其他进程插入的职位不会被占位行覆盖，重新读取时按其真实状态计算差量
+            Job.objects.bulk_create(
+                [
+                    Job(
+                        source=self.source,
+                        external_id=external_id,
+                        title=records_by_id[external_id].title,
+                        company_id=companies[records_by_id[external_id].company_name][0],
+                        is_active=False
+                    )
+                    for external_id in missing
+                ],
+                ignore_conflicts=True
+            )
+            locked = self.lock_existing(missing)
+            placeholders = {
+                external_id for external_id, ((old_hash, _, was_active), _) in locked.items()
+                if old_hash is None and not was_active
+            }
+            existing.update(locked)
+
+        now = timezone.now()
+        jobs = []
+        delta = AggregateDelta()
+        rollup_delta = SalaryRollupDelta()
+        inserted = skipped = 0
+        for external_id, record in records_by_id.items():
+            content_hash = compute_content_hash(record)
+            company_id, industry = companies[record.company_name]
+            (old_hash, old_listing_type, was_active), old_state = existing[external_id]
+            if external_id in placeholders:
+                inserted += 1
+            # 内容未变化且仍在招的职位跳过，已下架的职位重新出现时需要写入以恢复在招状态
+            elif (old_hash, old_listing_type, was_active) == (content_hash, record.listing_type, True):
+                skipped += 1
+                continue
+            if was_active:
+                delta.remove(old_state)
+            # 月度薪资汇总包括已下架的职位，更新时总是替换旧的贡献；占位行不计入汇总，移除时没有影响
+            rollup_delta.remove(old_state)
+
+            state = {field: getattr(record, field, None) for field in STATE_FIELDS}
+            state['company__industry'] = industry
+            delta.add(state)
+            rollup_delta.add(state)
+
+            jobs.append(Job(
+                source=self.source,
+                external_id=external_id,
+                title=record.title,
+                company_id=company_id,
+                source_url=record.source_url,
+                content_hash=content_hash,
+                listing_type=record.listing_type,
+                is_active=True,
+                delisted_at=None,
+                updated_at=now,
+                **{field: getattr(record, field) for field in self.UPDATE_FIELDS}
+            ))
+
+        if jobs:
+            # 所有职位此时都已有锁定的行，以唯一键upsert一条语句写入。
+            # MySQL的ON DUPLICATE KEY UPDATE不支持指定冲突列，由唯一索引自动判定
+            unique_fields = None
+            if connection.features.supports_update_conflicts_with_target:
+                unique_fields = ['source', 'external_id']
+            Job.objects.bulk_create(
+                jobs,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=self.UPSERT_FIELDS
+            )
+            # 在写入职位的同一事务中按差量更新分析用的聚合计数和月度薪资汇总
+            delta.apply()
+            rollup_delta.apply()
+
+        return {'inserted': inserted, 'updated': len(jobs) - inserted, 'skipped': skipped}
+
+    def lock_existing(self, external_ids):
+        """锁定本数据源中给定来源职位ID的职位，取出写入和计算差量需要的字段
+
+        Returns:
+            dict: 来源职位ID -> ((内容指纹, 列表类型, 是否在招), 以STATE_FIELDS为键的职位字段值)
+        """
+        return {
+            values[0]: (values[1:], state)
+            for values, state in lock_job_states(
+                Job.objects.filter(source=self.source, external_id__in=external_ids),
+                'external_id', 'content_hash', 'listing_type', 'is_active'
+            )
+        }
+
+    def delist_missing(self, listing_type, seen_ids):
+        """把本次完整爬取中未出现的在招职位标记为下架
+
+        只能在爬取覆盖了整个列表（非增量、无失败页面、未受最大页数截断）后调用，
+        否则未爬到的页面中的职位会被误标记。差集在内存中计算，按主键分块批量更新。
+
+        Args:
+            listing_type: 列表类型（爬取时的职位类型）
+            seen_ids: 本次爬取出现过的来源职位ID集合
+
+        Returns:
+            int: 标记为下架的职位数量
+        """
+        active = Job.objects.filter(source=self.source, listing_type=listing_type, is_active=True)
+        missing = [
+            job_id for job_id, external_id in active.values_list('id', 'external_id').iterator()
+            if external_id not in seen_ids
+        ]
+
+        now = timezone.now()
+        delisted = 0
+        for start in range(0, len(missing), self.DELIST_CHUNK_SIZE):
+            with transaction.atomic():
+                # 锁定仍在招的职位并取出参与聚合的字段，已被其他进程标记下架的职位保留原下架时间
+                delta = AggregateDelta()
+                ids = []
+                for (job_id,), state in lock_job_states(
+                    Job.objects.filter(id__in=missing[start:start + self.DELIST_CHUNK_SIZE], is_active=True), 'id'
+                ):
+                    ids.append(job_id)
+                    delta.remove(state)
+                delisted += Job.objects.filter(id__in=ids).update(is_active=False, delisted_at=now, updated_at=now)
+                delta.apply()
+        if delisted:
+            logger.info(f"数据源 {self.source} 列表类型 {listing_type} 有 {delisted} 个职位已下架")
+        return delisted
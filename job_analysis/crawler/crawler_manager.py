@@ -1,121 +1,341 @@
-import logging
-from django.db import transaction
-from datetime import datetime
 import concurrent.futures
-from .job_crawler import JobCrawler
-from ..models import Company, Job
+import itertools
+import logging
+import math
+from .job_crawler import JobCrawler, ENGINE_THREAD, DEFAULT_BASE_URL
+from .incremental import IncrementalTracker
+from .bulk_writer import BulkJobWriter
+from .pipeline import CrawlPipeline
+from .matrix import CrawlMatrix
 
 logger = logging.getLogger(__name__)
 
+# 完整爬取至少要覆盖接口报告总数的比例，爬取期间列表变动导致缺漏过多时不标记下架
+MIN_LISTING_COVERAGE = 0.95
+
 class CrawlerManager:
     """爬虫管理器，负责爬取数据并存储到数据库"""
     
-    def __init__(self, max_workers=5):
-        self.crawler = JobCrawler(max_workers=max_workers)
+    def __init__(self, max_workers=5, engine=ENGINE_THREAD, timeout=10, batch_size=200, base_url=None):
+        self.crawler = JobCrawler(max_workers=max_workers, timeout=timeout, base_url=base_url)
+        self.writer = BulkJobWriter(batch_size=batch_size, source=self.crawler.source)
         self.max_workers = max_workers
+        self.engine = engine
+        self.timeout = timeout
+        self.base_url = base_url
+        self.last_stats = {}
         
-    @transaction.atomic
-    def save_job_to_db(self, job_info):
-        """保存单个职位信息到数据库
+    def crawl_and_save(self, job_type=1, max_pages=10, max_workers=None, incremental=False, progress=None, run_state=None,
+                       pages=None):
+        """流式爬取职位数据并保存到数据库
         
         Args:
-            job_info: 职位信息字典
+            job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
+            max_pages: 最大爬取页数
+            max_workers: 最大工作线程数，None表示使用默认值
+            incremental: 是否增量爬取，遇到全部为已知记录的页面即停止
+            progress: 进度回调，每写入一个批次后以当前统计调用
+            run_state: CrawlRunState实例，记录逐页状态；已确定总页数时只爬取未完成的页面（续爬）
+            pages: 指定要爬取的页码列表，用于多进程分片；为None时由第一页确定总页数
             
         Returns:
-            Job: 保存的职位对象
+            int: 成功保存（新增或更新）的职位数量，明细见last_stats；
+                完整爬取了整个列表时，未出现的职位标记为下架，数量见last_stats['delisted']
         """
-        # 获取或创建公司
-        company, _ = Company.objects.get_or_create(
-            name=job_info['company_name'],
-            defaults={
-                'industry': job_info['industry']
-            }
+        if max_workers is None:
+            max_workers = self.max_workers
+            
+        # 只有从第一页开始的全量爬取才可能覆盖整个列表，增量、续爬和分片都只看到部分职位
+        sweep = not incremental and pages is None and not (run_state and run_state.is_planned)
+        self.telemetry.reset()
+        logger.info(f"开始爬取职位数据，类型: {job_type}，最大页数: {max_pages}，并发数: {max_workers}，引擎: {self.engine}")
+        
+        # 爬取、提取、写库流式进行，写库的同时后续页面仍在下载
+        tracker = None
+        if incremental:
+            tracker = IncrementalTracker(self.crawler.source, job_type)
+            pages = self.crawler.iter_new_pages(
+                tracker,
+                job_type=job_type,
+                max_pages=max_pages,
+                max_workers=max_workers,
+                engine=self.engine
+            )
+        elif run_state:
+            pages = self.iter_run_pages(run_state, job_type, max_pages, max_workers)
+        else:
+            pages = self.crawler.iter_pages(
+                job_type=job_type,
+                max_pages=max_pages,
+                max_workers=max_workers,
+                engine=self.engine,
+                pages=pages
+            )
+        
+        on_saved = None
+        if run_state:
+            self.crawler.error_listeners.append(run_state.record_failure)
+            on_saved = run_state.mark_saved
+        
+        pipeline = CrawlPipeline(
+            self.crawler, self.writer, progress=progress, on_saved=on_saved, telemetry=self.telemetry,
+            listing_type=job_type
         )
+        if sweep:
+            self.writer.seen_ids = set()
+        seen_ids = self.writer.seen_ids
+        try:
+            self.last_stats = pipeline.run(pages)
+        finally:
+            if sweep:
+                self.writer.seen_ids = None
+            if run_state:
+                self.crawler.error_listeners.remove(run_state.record_failure)
+                run_state.finish()
+        
+        self.last_stats['delisted'] = 0
+        if sweep and self.is_complete_listing(seen_ids, max_pages):
+            self.last_stats['delisted'] = self.writer.delist_missing(job_type, seen_ids)
+        
+        if not self.last_stats['pages']:
+            logger.warning("没有获取到职位数据")
         
-        # 创建或更新职位
-        job, created = Job.objects.update_or_create(
-            title=job_info['title'],
-            company=company,
-            source_url=job_info['source_url'],
-            defaults={
-                'job_type': job_info['job_type'],
-                'salary_min': job_info['salary_min'],
-                'salary_max': job_info['salary_max'],
-                'province': job_info['province'],
-                'city': job_info['city'],
-                'description': job_info['description'],
-                'requirement': job_info['requirement'],
-                'publish_date': job_info['publish_date']
-            }
+        saved_count = self.last_stats['inserted'] + self.last_stats['updated']
+        logger.info(
+            f"数据保存完成，共爬取 {self.last_stats['pages']} 页，成功保存 {saved_count}/{self.last_stats['extracted']} 条职位数据，"
+            f"新增 {self.last_stats['inserted']} 条，更新 {self.last_stats['updated']} 条，"
+            f"未变化跳过 {self.last_stats['skipped']} 条，标记下架 {self.last_stats['delisted']} 条"
         )
         
-        if created:
-            logger.info(f"创建新职位: {job}")
-        else:
-            logger.info(f"更新职位: {job}")
-            
-        return job
+        if tracker:
+            tracker.save()
+        self.log_telemetry()
+        return saved_count
     
-    def process_and_save_job(self, raw_job):
-        """处理并保存单个职位信息，用于并发处理
+    def is_complete_listing(self, seen_ids, max_pages):
+        """判断刚结束的爬取是否覆盖了整个列表
+        
+        要求请求的是生产接口、接口报告了列表总数、总页数未被max_pages截断、没有失败页面，
+        且出现过的职位数不少于总数的MIN_LISTING_COVERAGE，满足时才能用差集标记下架。
+        替身服务等非生产地址的列表与数据库中的职位无关，不能用来标记下架。
         
         Args:
-            raw_job: 原始职位数据
+            seen_ids: 本次爬取出现过的来源职位ID集合
+            max_pages: 本次爬取的最大页数
             
         Returns:
-            bool: 是否成功保存
+            bool: 是否为完整爬取
         """
-        try:
-            job_info = self.crawler.extract_job_info(raw_job)
-            self.save_job_to_db(job_info)
-            return True
-        except Exception as e:
-            logger.error(f"保存职位数据失败: {e}")
+        if self.crawler.base_url != DEFAULT_BASE_URL:
+            logger.info(f"列表接口 {self.crawler.base_url} 不是生产地址，不标记下架职位")
+            return False
+        total = self.crawler.listing_total
+        if not total:
+            return False
+        if (total + 19) // 20 > max_pages:
+            logger.info(f"列表共 {total} 条，超过最大页数 {max_pages}，不标记下架职位")
+            return False
+        if self.telemetry.counters.get('page_errors', 0):
+            logger.info("本次爬取有失败页面，不标记下架职位")
+            return False
+        if len(seen_ids) < total * MIN_LISTING_COVERAGE:
+            logger.warning(f"本次爬取只获取到 {len(seen_ids)}/{total} 个职位，不标记下架职位")
             return False
+        return True
+    
+    def iter_run_pages(self, run_state, job_type, max_pages, max_workers):
+        """按爬取批次的状态产出页面
+        
+        新批次先获取第一页确定总页数并登记所有页面，续爬时只爬取尚未完成的页面。
+        """
+        if run_state.is_planned:
+            pending = run_state.pending_pages()
+            logger.info(f"续爬批次 {run_state.run.pk}，剩余 {len(pending)} 页")
+            return self.crawler.iter_pages(
+                job_type=job_type,
+                max_workers=max_workers,
+                engine=self.engine,
+                pages=pending
+            )
+        
+        total_pages, first_jobs = self.crawler.probe_total_pages(job_type=job_type, max_pages=max_pages)
+        if not total_pages:
+            return iter(())
+        run_state.plan(total_pages)
+        return itertools.chain(
+            [(1, first_jobs)],
+            self.crawler.iter_pages(
+                job_type=job_type,
+                max_workers=max_workers,
+                engine=self.engine,
+                pages=range(2, total_pages + 1)
+            )
+        )
+    
+    def crawl_matrix(self, targets, max_pages=10, max_in_flight=None, per_target=None):
+        """并发爬取多个(学校, 职位类型)目标并保存到数据库
+        
+        所有目标共用全局并发上限和按主机的限速器，写库仍经过同一条流水线。
+        
+        Args:
+            targets: CrawlTarget列表
+            max_pages: 每个目标的最大爬取页数
+            max_in_flight: 全局最大在途请求数，None表示使用max_workers
+            per_target: 单个目标的最大在途请求数，None表示平均分配全局并发
+            
+        Returns:
+            dict: 每个目标的统计，包含pages、rows、errors；汇总统计见last_stats
+        """
+        self.telemetry.reset()
+        matrix = CrawlMatrix(
+            targets,
+            max_in_flight=max_in_flight or self.max_workers,
+            per_target=per_target,
+            timeout=self.timeout,
+            base_url=self.base_url,
+            response_listeners=self.crawler.response_listeners,
+            telemetry=self.telemetry
+        )
+        logger.info(
+            f"开始矩阵爬取，共 {len(matrix.targets)} 个目标，全局并发: {matrix.max_in_flight}，"
+            f"单目标并发: {matrix.per_target}，每个目标最大页数: {max_pages}"
+        )
+        
+        # 流水线只关心页码、职位数据和列表类型，目标信息保留在矩阵的统计中。
+        # 同一职位可能出现在多个学校的列表中，矩阵爬取只覆盖所选学校，不据此标记下架
+        pages = ((page, jobs, target.job_type) for target, page, jobs in matrix.iter_pages(max_pages=max_pages))
+        pipeline = CrawlPipeline(self.crawler, self.writer, telemetry=self.telemetry)
+        self.last_stats = pipeline.run(pages)
+        
+        logger.info(
+            f"矩阵爬取完成，共爬取 {self.last_stats['pages']} 页，新增 {self.last_stats['inserted']} 条，"
+            f"更新 {self.last_stats['updated']} 条，未变化跳过 {self.last_stats['skipped']} 条"
+        )
+        self.log_telemetry()
+        return matrix.target_stats
     
-    def crawl_and_save(self, job_type=1, max_pages=10, max_workers=None):
-        """并发爬取职位数据并保存到数据库
+    def manager_options(self):
+        """创建工作进程中CrawlerManager的参数"""
+        return {
+            'max_workers': self.max_workers,
+            'engine': self.engine,
+            'timeout': self.timeout,
+            'batch_size': self.writer.batch_size,
+            'base_url': self.base_url,
+        }
+    
+    def crawl_sharded(self, job_type=1, max_pages=10, processes=2):
+        """多进程爬取：按页码区间分片，每个进程独立爬取、提取并批量写库
+        
+        JSON解析和字段提取是CPU密集的Python代码，单进程内受GIL限制，
+        分片到多个进程后可以随CPU核数扩展。父进程只负责确定总页数、写入确定总页数时取得的第一页和汇总结果。
         
         Args:
             job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
             max_pages: 最大爬取页数
-            max_workers: 最大工作线程数，None表示使用默认值
+            processes: 工作进程数
             
         Returns:
-            int: 成功保存的职位数量
+            int: 成功保存（新增或更新）的职位数量，明细见last_stats；
+                所有分片都成功且覆盖了整个列表时标记下架职位
         """
-        if max_workers is None:
-            max_workers = self.max_workers
-            
-        logger.info(f"开始爬取职位数据，类型: {job_type}，最大页数: {max_pages}，并发线程数: {max_workers}")
+        from .process_pool import create_pool, shard_pages, crawl_page_shard, merge_stats
         
-        # 并发爬取数据
-        raw_jobs = self.crawler.fetch_all_jobs(job_type=job_type, max_pages=max_pages, max_workers=max_workers)
-        logger.info(f"爬取完成，共获取 {len(raw_jobs)} 条职位数据")
-        
-        if not raw_jobs:
+        self.telemetry.reset()
+        total_pages, first_jobs = self.crawler.probe_total_pages(job_type=job_type, max_pages=max_pages)
+        self.last_stats = {
+            'pages': 0, 'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'dropped': 0, 'failed_shards': 0,
+            'delisted': 0
+        }
+        if not total_pages:
             logger.warning("没有获取到职位数据")
             return 0
-            
-        # 并发处理和保存数据
-        saved_count = 0
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有职位的处理任务
-            future_to_job = {
-                executor.submit(self.process_and_save_job, raw_job): i 
-                for i, raw_job in enumerate(raw_jobs)
-            }
-            
-            # 处理完成的任务
-            for future in concurrent.futures.as_completed(future_to_job):
-                job_index = future_to_job[future]
+        
+        # 第一页在确定总页数时已经取得，由父进程直接写库，分片只覆盖第2页起的页面
+        seen_ids = set()
+        self.writer.seen_ids = seen_ids
+        try:
+            pipeline = CrawlPipeline(self.crawler, self.writer, telemetry=self.telemetry, listing_type=job_type)
+            merge_stats(self.last_stats, pipeline.run([(1, first_jobs)]))
+        finally:
+            self.writer.seen_ids = None
+        
+        shards = shard_pages(range(2, total_pages + 1), processes)
+        logger.info(f"开始多进程爬取，共 {total_pages} 页，第2页起分为 {len(shards)} 个分片")
+        if shards:
+            with create_pool(len(shards)) as pool:
+                futures = [
+                    pool.submit(crawl_page_shard, self.manager_options(), job_type, shard)
+                    for shard in shards
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        stats, telemetry, shard_seen_ids = future.result()
+                    except Exception as e:
+                        # 单个分片失败不影响其他分片已写入的数据，失败的分片数记录在统计中
+                        logger.error(f"爬取分片失败: {e}")
+                        self.last_stats['failed_shards'] += 1
+                        continue
+                    merge_stats(self.last_stats, stats)
+                    self.telemetry.merge(telemetry)
+                    seen_ids.update(shard_seen_ids)
+        
+        if not self.last_stats['failed_shards'] and self.is_complete_listing(seen_ids, max_pages):
+            self.last_stats['delisted'] = self.writer.delist_missing(job_type, seen_ids)
+        
+        saved_count = self.last_stats['inserted'] + self.last_stats['updated']
+        logger.info(
+            f"多进程爬取完成，共爬取 {self.last_stats['pages']} 页，新增 {self.last_stats['inserted']} 条，"
+            f"更新 {self.last_stats['updated']} 条，未变化跳过 {self.last_stats['skipped']} 条"
+        )
+        self.log_telemetry()
+        return saved_count
+    
+    def crawl_matrix_sharded(self, targets, max_pages=10, processes=2, max_in_flight=None, per_target=None):
+        """多进程矩阵爬取：目标轮流分配到各进程，全局并发按进程数平分
+        
+        每个进程有自己的限速器，总请求速率约为单进程的processes倍。
+        
+        Returns:
+            dict: 每个目标的统计，汇总统计见last_stats
+        """
+        from .process_pool import create_pool, shard_targets, crawl_target_shard, merge_stats
+        
+        self.telemetry.reset()
+        self.last_stats = {
+            'pages': 0, 'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'dropped': 0, 'failed_shards': 0
+        }
+        groups = shard_targets(list(targets), processes)
+        process_in_flight = max(math.ceil((max_in_flight or self.max_workers) / max(len(groups), 1)), 1)
+        
+        target_stats = {}
+        with create_pool(max(len(groups), 1)) as pool:
+            futures = [
+                pool.submit(crawl_target_shard, self.manager_options(), group, max_pages, process_in_flight, per_target)
+                for group in groups
+            ]
+            for future in concurrent.futures.as_completed(futures):
                 try:
-                    if future.result():
-                        saved_count += 1
-                        if saved_count % 10 == 0:  # 每保存10个职位打印一次日志
-                            logger.info(f"已保存 {saved_count}/{len(raw_jobs)} 条职位数据")
+                    stats, group_stats, telemetry = future.result()
                 except Exception as e:
-                    logger.error(f"处理第 {job_index+1} 个职位时出错: {e}")
+                    logger.error(f"爬取分片失败: {e}")
+                    self.last_stats['failed_shards'] += 1
+                    continue
+                merge_stats(self.last_stats, stats)
+                target_stats.update(group_stats)
+                self.telemetry.merge(telemetry)
         
-        logger.info(f"数据保存完成，成功保存 {saved_count}/{len(raw_jobs)} 条职位数据")
-        return saved_count 
\ No newline at end of file
+        self.log_telemetry()
+        # 按输入顺序返回
+        return {target: target_stats[target] for target in targets if target in target_stats}
+    
+    @property
+    def telemetry(self):
+        """最近一次爬取的指标"""
+        return self.crawler.telemetry
+    
+    def log_telemetry(self):
+        """结束计时并输出指标汇总"""
+        self.telemetry.stop()
+        for line in self.telemetry.report_lines():
+            logger.info(f"[爬取指标] {line}")
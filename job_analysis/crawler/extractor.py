@@ -0,0 +1,205 @@
+import logging
+from datetime import datetime
+from ..utils.salary_parser import parse_salary
+from ..utils.education import normalize_education
+from .telemetry import log_sampler
+
+logger = logging.getLogger(__name__)
+
+class JobRecord:
+    """提取后的职位记录，使用__slots__减少每条记录的内存开销"""
+
+    __slots__ = (
+        'title', 'company_name', 'industry', 'job_type', 'salary_min', 'salary_max',
+        'province', 'city', 'description', 'requirement', 'education_level', 'publish_date', 'source_url',
+        'external_id', 'listing_type', 'tags'
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"JobRecord({self.title!r}, {self.company_name!r})"
+
+
+def _timestamp_to_date(value):
+    return datetime.fromtimestamp(int(value)).date()
+
+def _string_to_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _to_int(value):
+    return int(value)
+
+
+# 文本字段映射：(记录字段, 按优先级排列的原始字段)，取第一个非空值
+TEXT_FIELDS = (
+    ('title', ('work_name', 'name')),
+    ('company_name', ('com_id_name', 'company_name')),
+    ('industry', ('industry_id_name', 'industry_name')),
+    ('job_type', ('cate_id1_name', 'dalei_id_name', 'zhiwei_type_name')),
+    ('province', ('province_id_name', 'province')),
+    ('city', ('city_id_name', 'city')),
+)
+
+# 发布日期来源：(原始字段, 转换函数)，按优先级依次尝试
+PUBLISH_DATE_SOURCES = (
+    ('examine_time', _timestamp_to_date),
+    ('addtime1', _string_to_date),
+    ('addtime', _timestamp_to_date),
+    ('fbsj', _string_to_date),
+)
+
+# 结构化薪资字段，缺失时回退到薪资文本
+SALARY_MIN_KEY = 'salary_floor'
+SALARY_MAX_KEY = 'salay_ceil'
+SALARY_TEXT_KEYS = ('xinzi', 'salary')
+
+# 结构化学历字段，缺失或无法识别时在描述和要求中查找
+EDUCATION_KEY = 'xueli_id_name'
+
+# 拼接到职位描述中的可选字段：(标签, 原始字段)
+DESCRIPTION_LINES = (
+    ('工作地点：', 'workplace'),
+    ('学历要求：', 'xueli_id_name'),
+    ('招聘人数：', 'person_count'),
+    ('专业要求：', 'zhuanye'),
+)
+
+REQUIREMENT_PREFIX = '岗位职责与要求：\n'
+
+# 来源职位ID字段，与数据源一起构成职位的唯一键
+EXTERNAL_ID_KEY = 'id'
+
+# 必填字段，缺失时丢弃该职位
+REQUIRED_FIELDS = ('title', 'company_name', 'external_id')
+
+
+class JobExtractor:
+    """表驱动的职位信息提取器
+
+    字段映射在初始化时编译为固定的取值计划，JobCrawler和fetch_cdu_jobs共用同一个提取循环。
+    """
+
+    def __init__(self, source_url_template, salary_parser=parse_salary):
+        """
+        Args:
+            source_url_template: 来源链接模板，用{id}表示职位ID
+            salary_parser: 薪资文本解析函数，返回(最低薪资, 最高薪资)
+        """
+        self.source_url_template = source_url_template
+        self.salary_parser = salary_parser
+        self._text_plan = tuple(TEXT_FIELDS)
+        self._date_plan = tuple(PUBLISH_DATE_SOURCES)
+        self._description_plan = tuple(DESCRIPTION_LINES)
+
+    def extract(self, raw):
+        """从原始数据中提取单个职位
+
+        Args:
+            raw: API返回的原始职位数据
+
+        Returns:
+            JobRecord: 职位记录，缺少必填字段时返回None
+        """
+        record = JobRecord.__new__(JobRecord)
+
+        for field, keys in self._text_plan:
+            value = ''
+            for key in keys:
+                value = raw.get(key)
+                if value:
+                    break
+            setattr(record, field, value or '')
+
+        external_id = raw.get(EXTERNAL_ID_KEY)
+        record.external_id = str(external_id) if external_id not in (None, '') else None
+        record.listing_type = None
+
+        for field in REQUIRED_FIELDS:
+            if not getattr(record, field):
+                return None
+
+        record.publish_date = None
+        for key, convert in self._date_plan:
+            value = raw.get(key)
+            if value:
+                try:
+                    record.publish_date = convert(value)
+                    break
+                except (TypeError, ValueError, OverflowError, OSError):
+                    continue
+
+        record.salary_min, record.salary_max = self._extract_salary(raw)
+
+        description = raw.get('description')
+        if not description:
+            parts = ['职位名称：', record.title, '\n公司名称：', record.company_name, '\n']
+            for label, key in self._description_plan:
+                value = raw.get(key)
+                if value:
+                    parts.append(label)
+                    parts.append(str(value))
+                    parts.append('\n')
+            description = ''.join(parts)
+        record.description = description
+
+        record.requirement = REQUIREMENT_PREFIX + (raw.get('content') or '')
+        record.education_level = normalize_education(raw.get(EDUCATION_KEY), description, record.requirement)
+        record.source_url = self.source_url_template.format(id=record.external_id)
+        tag_list = raw.get('tagsList')
+        record.tags = [
+            tag['title'] for tag in tag_list
+            if isinstance(tag, dict) and 'title' in tag
+        ] if isinstance(tag_list, list) else []
+        return record
+
+    def _extract_salary(self, raw):
+        salary_min = salary_max = None
+        try:
+            if raw.get(SALARY_MIN_KEY) is not None:
+                salary_min = _to_int(raw[SALARY_MIN_KEY])
+        except (TypeError, ValueError):
+            pass
+        try:
+            if raw.get(SALARY_MAX_KEY) is not None:
+                salary_max = _to_int(raw[SALARY_MAX_KEY])
+        except (TypeError, ValueError):
+            pass
+
+        if salary_min is None or salary_max is None:
+            for key in SALARY_TEXT_KEYS:
+                salary_text = raw.get(key)
+                if salary_text:
+                    parsed_min, parsed_max = self.salary_parser(salary_text)
+                    if salary_min is None:
+                        salary_min = parsed_min
+                    if salary_max is None:
+                        salary_max = parsed_max
+                    break
+        return salary_min, salary_max
+
+    def extract_page(self, raw_jobs, listing_type=None):
+        """批量提取一整页职位
+
+        Args:
+            raw_jobs: 一页原始职位数据
+            listing_type: 该页所属列表的职位类型，写入每条记录
+
+        Returns:
+            list: JobRecord列表，已丢弃缺少必填字段（含职位ID）或无法解析的职位
+        """
+        extract = self.extract
+        records = []
+        for raw in raw_jobs:
+            try:
+                record = extract(raw)
+            except Exception as e:
+                if log_sampler.allow('extract_error'):
+                    logger.warning(f"提取职位数据失败: {e}")
+                continue
+            if record is not None:
+                record.listing_type = listing_type
+                records.append(record)
+        return records
@@ -0,0 +1,88 @@
+import logging
+from ..models import CrawlCheckpoint
+
+logger = logging.getLogger(__name__)
+
+class IncrementalTracker:
+    """增量爬取跟踪器
+
+    列表接口按发布时间倒序返回，因此只要某一页全部是已知记录就可以停止翻页。
+    已知记录指：职位ID在上次保存的ID集合中，或审核时间早于上次的高水位。
+    """
+
+    # 检查点中最多保留的职位ID数量
+    MAX_SEEN_IDS = 2000
+
+    def __init__(self, source, job_type):
+        """
+        Args:
+            source: 数据源标识
+            job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
+        """
+        self.source = source
+        self.job_type = job_type
+
+        checkpoint = CrawlCheckpoint.objects.filter(source=source, job_type=job_type).first()
+        self.high_water = checkpoint.max_examine_time if checkpoint else None
+        self.known_ids = set(checkpoint.seen_ids) if checkpoint else set()
+
+        self.new_high_water = self.high_water
+        self.run_ids = []
+
+    @property
+    def has_checkpoint(self):
+        """是否存在上一次的检查点"""
+        return self.high_water is not None or bool(self.known_ids)
+
+    @staticmethod
+    def get_examine_time(raw_job):
+        try:
+            return int(raw_job.get('examine_time'))
+        except (TypeError, ValueError):
+            return None
+
+    def is_known(self, raw_job):
+        """判断原始职位数据是否已在之前的爬取中见过"""
+        if str(raw_job.get('id', '')) in self.known_ids:
+            return True
+        examine_time = self.get_examine_time(raw_job)
+        return self.high_water is not None and examine_time is not None and examine_time < self.high_water
+
+    def filter_new(self, raw_jobs):
+        """记录一页数据并返回其中的新记录
+
+        Args:
+            raw_jobs: 一页原始职位数据
+
+        Returns:
+            list: 未见过的职位数据，为空说明该页全部已知，可以停止翻页
+        """
+        new_jobs = [job for job in raw_jobs if not self.is_known(job)]
+        self.observe(raw_jobs)
+        return new_jobs
+
+    def observe(self, raw_jobs):
+        """记录本次爬取见到的职位ID和最大审核时间"""
+        for job in raw_jobs:
+            job_id = job.get('id')
+            if job_id is not None:
+                self.run_ids.append(str(job_id))
+            examine_time = self.get_examine_time(job)
+            if examine_time is not None and (self.new_high_water is None or examine_time > self.new_high_water):
+                self.new_high_water = examine_time
+
+    def save(self):
+        """保存新的高水位标记，应在本次数据写入成功后调用"""
+        # 本次见到的ID在前（最新），之后补充上次保留的ID
+        seen_ids = list(dict.fromkeys(self.run_ids))
+        run_id_set = set(seen_ids)
+        seen_ids.extend(job_id for job_id in self.known_ids if job_id not in run_id_set)
+        CrawlCheckpoint.objects.update_or_create(
+            source=self.source,
+            job_type=self.job_type,
+            defaults={
+                'max_examine_time': self.new_high_water,
+                'seen_ids': seen_ids[:self.MAX_SEEN_IDS]
+            }
+        )
+        logger.info(f"已更新增量爬取检查点: {self.source} - {self.job_type}，高水位: {self.new_high_water}")
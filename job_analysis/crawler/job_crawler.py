@@ -1,17 +1,58 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from datetime import datetime
-import time
 import logging
+import itertools
+import time
 import concurrent.futures
+from .rate_limiter import RETRYABLE_STATUS, get_rate_limiter, post_with_retries
+from .telemetry import CrawlTelemetry, log_sampler
+from .extractor import JobExtractor
 
 logger = logging.getLogger(__name__)
 
+# 支持的爬取引擎
+ENGINE_THREAD = 'thread'
+ENGINE_ASYNC = 'async'
+ENGINES = (ENGINE_THREAD, ENGINE_ASYNC)
+
+# 数据源标识，用于增量检查点等按来源区分的记录
+SOURCE_JIUYEB = 'jiuyeb'
+
+# 职位详情页链接模板，所有爬取入口共用，职位的唯一标识是(数据源, 来源职位ID)而不是链接
+SOURCE_URL_TEMPLATE = 'https://jy.cdu.edu.cn/Zhaopin/zhiweiDetail.html?id={id}'
+
+# 默认学校，未指定学校时爬取该校的职位
+DEFAULT_SCHOOL_ID = '92727a49-c69a-6814-7231-a90bbbe287a7'
+DEFAULT_SCHOOL_CODE = '11079'
+
+# 列表接口默认地址，可替换为本地替身服务用于测试和基准测试
+DEFAULT_BASE_URL = 'https://a.jiuyeb.cn/mobile.php/job/getlist'
+
+# 替身服务等非生产地址爬取结果的数据源标识，与真实职位分开存放，来源职位ID相同也不会覆盖真实职位
+SOURCE_STAND_IN = 'jiuyeb-standin'
+
+def source_for_base_url(base_url):
+    """列表接口地址对应的数据源标识
+
+    Args:
+        base_url: 列表接口地址，None表示默认的生产地址
+
+    Returns:
+        str: 生产地址为SOURCE_JIUYEB，其他地址为SOURCE_STAND_IN
+    """
+    if base_url is None or base_url == DEFAULT_BASE_URL:
+        return SOURCE_JIUYEB
+    return SOURCE_STAND_IN
+
 class JobCrawler:
     """职位信息爬虫"""
     
-    def __init__(self, max_workers=5):
-        self.base_url = 'https://a.jiuyeb.cn/mobile.php/job/getlist'
+    def __init__(self, max_workers=5, timeout=10, max_retries=3, base_url=None, school_id=None, school_code=None):
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.school_id = school_id or DEFAULT_SCHOOL_ID
+        self.school_code = school_code or DEFAULT_SCHOOL_CODE
+        self.source = source_for_base_url(self.base_url)
         self.headers = {
             'accept': 'application/json, text/javascript, */*; q=0.01',
             'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
@@ -32,9 +73,47 @@ class JobCrawler:
             'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0'
         }
         self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.extractor = JobExtractor(SOURCE_URL_TEMPLATE)
         
-    def fetch_jobs(self, page=1, size=20, job_type=1):
-        """获取职位列表
+        # 每次HTTP响应（含重试）的回调，参数为(耗时秒数, 状态码)，网络错误时状态码为None
+        self.response_listeners = []
+        # 页面爬取失败回调，参数为(页码, 错误信息)
+        self.error_listeners = []
+        # 请求、提取、写库等指标，由CrawlerManager在每次爬取开始时重置
+        self.telemetry = CrawlTelemetry()
+        # 最近一次获取第一页时接口返回的列表总条数，用于判断爬取是否覆盖了完整列表
+        self.listing_total = None
+        
+        # 复用长连接，避免每页都重新进行TCP+TLS握手
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+    
+    def close(self):
+        """关闭同步请求使用的会话及其连接池"""
+        self.session.close()
+    
+    def notify_response(self, latency, status):
+        """记录请求指标并通知所有响应回调"""
+        self.telemetry.incr('requests')
+        self.telemetry.observe('request_latency', latency)
+        if status is None or status in RETRYABLE_STATUS:
+            self.telemetry.incr('retries')
+        for listener in self.response_listeners:
+            listener(latency, status)
+    
+    def notify_error(self, page, message):
+        """记录失败页面并通知所有页面失败回调"""
+        self.telemetry.incr('page_errors')
+        for listener in self.error_listeners:
+            listener(page, message)
+    
+    def build_form_data(self, page=1, size=20, job_type=1):
+        """构造列表接口的表单参数
         
         Args:
             page: 页码
@@ -42,12 +121,12 @@ class JobCrawler:
             job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
             
         Returns:
-            dict: 包含职位列表的响应数据
+            dict: 表单参数
         """
-        data = {
+        return {
             'jobtype': job_type,
             'isunion': 2,
-            'school_id': '92727a49-c69a-6814-7231-a90bbbe287a7',
+            'school_id': self.school_id,
             'page': page,
             'size': size,
             'province_id': 0,
@@ -58,13 +137,36 @@ class JobCrawler:
             'salay_ceil': '',
             'day': 0,
             'login_user_id': 1,
-            'login_admin_school_code': '11079',
-            'login_admin_school_id': '92727a49-c69a-6814-7231-a90bbbe287a7'
+            'login_admin_school_code': self.school_code,
+            'login_admin_school_id': self.school_id
         }
         
+    def fetch_jobs(self, page=1, size=20, job_type=1):
+        """获取职位列表
+        
+        Args:
+            page: 页码
+            size: 每页数量
+            job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
+            
+        Returns:
+            dict: 包含职位列表的响应数据
+        """
+        data = self.build_form_data(page=page, size=size, job_type=job_type)
+        
         try:
-            response = requests.post(self.base_url, headers=self.headers, data=data)
+            # 同一主机的所有请求共享自适应限速器，出错时自动退避重试
+            response = post_with_retries(
+                self.session,
+                self.base_url,
+                get_rate_limiter(self.base_url),
+                max_retries=self.max_retries,
+                on_response=self.notify_response,
+                data=data,
+                timeout=self.timeout
+            )
             response.raise_for_status()
+            self.telemetry.incr('bytes_received', len(response.content))
             return response.json()
         except Exception as e:
             logger.error(f"获取职位列表失败: {e}")
@@ -80,149 +182,174 @@ class JobCrawler:
         Returns:
             list: 该页的职位列表
         """
-        logger.info(f"正在爬取第 {page} 页数据...")
+        if log_sampler.allow('fetch_page'):
+            logger.info(f"正在爬取第 {page} 页数据...")
         result = self.fetch_jobs(page=page, job_type=job_type)
         
         if result.get('code') != 200:
             logger.error(f"获取第 {page} 页数据失败: {result.get('message')}")
+            self.notify_error(page, result.get('message'))
             return []
             
         jobs = result.get('data', {}).get('list', [])
         if not jobs:
             logger.warning(f"第 {page} 页没有数据")
-            
-        # 短暂延迟避免请求过快
-        time.sleep(0.5)
         return jobs
             
-    def fetch_all_jobs(self, job_type=1, max_pages=10, max_workers=None):
-        """并发获取所有职位信息
+    def probe_total_pages(self, job_type=1, max_pages=10):
+        """获取第一页数据并确定需要爬取的总页数
         
         Args:
             job_type: 职位类型
-            max_pages: 最大爬取页数，防止无限爬取
-            max_workers: 最大线程数，默认使用初始化时设置的值
+            max_pages: 最大爬取页数
             
         Returns:
-            list: 职位信息列表
+            tuple: (总页数, 第一页的职位列表)，获取失败或没有数据时总页数为0
         """
-        all_jobs = []
-        
-        # 先获取第一页，以确定总页数
         logger.info("正在获取第1页数据以确定总页数...")
+        self.listing_total = None
         result = self.fetch_jobs(page=1, job_type=job_type)
         
         if result.get('code') != 200:
             logger.error(f"获取数据失败: {result.get('message')}")
-            return all_jobs
+            self.notify_error(1, result.get('message'))
+            return 0, []
         
-        # 提取第一页的职位信息
         jobs = result.get('data', {}).get('list', [])
-        if jobs:
-            all_jobs.extend(jobs)
-        else:
+        if not jobs:
             logger.warning("第一页没有数据，终止爬取")
-            return all_jobs
+            return 0, []
         
         # 计算总页数
         total_count = result.get('data', {}).get('total_count', 0)
+        self.listing_total = total_count
         total_pages = min((total_count + 19) // 20, max_pages)  # 向上取整，且不超过max_pages
         logger.info(f"总共有 {total_count} 条数据，{total_pages} 页")
+        return max(total_pages, 1), jobs
+    
+    def iter_pages(self, job_type=1, max_pages=10, max_workers=None, engine=ENGINE_THREAD, pages=None):
+        """并发爬取并按完成顺序逐页产出职位数据
         
-        # 如果只有一页数据，直接返回
-        if total_pages <= 1:
-            return all_jobs
+        同时在途（已提交未消费）的页面数量有上限，调用方消费慢时爬取会随之放缓，
+        内存占用不随总页数增长。
         
-        # 设置并发线程数
+        Args:
+            job_type: 职位类型
+            max_pages: 最大爬取页数，防止无限爬取
+            max_workers: 最大线程数（async引擎下为最大并发请求数），默认使用初始化时设置的值
+            engine: 爬取引擎，thread=线程池，async=asyncio单线程
+            pages: 指定要爬取的页码列表，用于续爬；为None时先获取第一页确定总页数
+            
+        Yields:
+            tuple: (页码, 该页的职位列表)
+        """
         if max_workers is None:
             max_workers = self.max_workers
+            
+        if engine == ENGINE_ASYNC:
+            from .async_crawler import AsyncJobCrawler
+            async_crawler = AsyncJobCrawler(self, max_in_flight=max_workers, timeout=self.timeout)
+            yield from async_crawler.iter_pages(job_type=job_type, max_pages=max_pages, pages=pages)
+            return
+        elif engine != ENGINE_THREAD:
+            raise ValueError(f"不支持的爬取引擎: {engine}")
+        
+        if pages is None:
+            # 先获取第一页，以确定总页数
+            total_pages, jobs = self.probe_total_pages(job_type=job_type, max_pages=max_pages)
+            if not total_pages:
+                return
+            yield 1, jobs
+            # 其余页面从第2页开始
+            pages = range(2, total_pages + 1)
         
-        # 使用线程池并发爬取剩余页面（从第2页开始）
+        yield from self._iter_page_list(pages, job_type, max_workers)
+    
+    def _iter_page_list(self, pages, job_type, max_workers):
+        """使用线程池并发爬取指定页面，在途页面数不超过窗口大小"""
+        pages = iter(pages)
+        window = max_workers * 2
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有页面的爬取任务
             future_to_page = {
-                executor.submit(self.fetch_page, page, job_type): page 
-                for page in range(2, total_pages + 1)
+                executor.submit(self.fetch_page, page, job_type): page
+                for page in itertools.islice(pages, window)
             }
-            
-            # 处理完成的任务
-            for future in concurrent.futures.as_completed(future_to_page):
-                page = future_to_page[future]
-                try:
-                    page_jobs = future.result()
-                    all_jobs.extend(page_jobs)
-                    logger.info(f"第 {page} 页爬取成功，获取 {len(page_jobs)} 条数据")
-                except Exception as e:
-                    logger.error(f"处理第 {page} 页时出错: {e}")
-        
-        logger.info(f"并发爬取完成，共获取 {len(all_jobs)} 条职位数据")
-        return all_jobs
+            try:
+                while future_to_page:
+                    done, _ = concurrent.futures.wait(
+                        future_to_page, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        page = future_to_page.pop(future)
+                        # 先补充下一页，再交给调用方处理当前页
+                        for next_page in itertools.islice(pages, 1):
+                            future_to_page[executor.submit(self.fetch_page, next_page, job_type)] = next_page
+                        try:
+                            page_jobs = future.result()
+                        except Exception as e:
+                            logger.error(f"处理第 {page} 页时出错: {e}")
+                            self.notify_error(page, e)
+                            continue
+                        if log_sampler.allow('page_done'):
+                            logger.info(f"第 {page} 页爬取成功，获取 {len(page_jobs)} 条数据")
+                        yield page, page_jobs
+            finally:
+                # 调用方提前停止时取消尚未开始的任务
+                for future in future_to_page:
+                    future.cancel()
     
-    def parse_salary(self, salary_text):
-        """解析薪资范围
+    def iter_new_pages(self, tracker, job_type=1, max_pages=10, max_workers=None, engine=ENGINE_THREAD):
+        """增量爬取并逐页产出新职位
+        
+        列表按发布时间倒序，逐页爬取直到某一页全部为已知记录。
+        没有检查点（首次运行）时退化为并发全量爬取。
         
         Args:
-            salary_text: 薪资文本，如"8K-12K"、"面议"等
+            tracker: IncrementalTracker实例
+            job_type: 职位类型
+            max_pages: 最大爬取页数
+            max_workers: 首次全量爬取时的并发数
+            engine: 首次全量爬取时使用的引擎
             
-        Returns:
-            tuple: (最低薪资, 最高薪资)，单位为元/月
+        Yields:
+            tuple: (页码, 该页的新职位列表)
         """
-        if not salary_text or salary_text == '面议':
-            return None, None
+        if not tracker.has_checkpoint:
+            logger.info("没有增量检查点，执行全量爬取")
+            for page, page_jobs in self.iter_pages(job_type=job_type, max_pages=max_pages,
+                                                   max_workers=max_workers, engine=engine):
+                tracker.observe(page_jobs)
+                yield page, page_jobs
+            return
+        
+        for page in range(1, max_pages + 1):
+            jobs = self.fetch_page(page, job_type)
+            if not jobs:
+                break
             
-        try:
-            # 处理 "8K-12K" 格式
-            if 'K' in salary_text or 'k' in salary_text:
-                salary_text = salary_text.upper().replace('K', '')
-                if '-' in salary_text:
-                    min_salary, max_salary = salary_text.split('-')
-                    return int(float(min_salary) * 1000), int(float(max_salary) * 1000)
-                else:
-                    salary = int(float(salary_text) * 1000)
-                    return salary, salary
-                    
-            # 处理 "8000-12000" 格式
-            elif '-' in salary_text:
-                min_salary, max_salary = salary_text.split('-')
-                return int(float(min_salary)), int(float(max_salary))
+            page_new_jobs = tracker.filter_new(jobs)
+            if not page_new_jobs:
+                logger.info(f"第 {page} 页全部为已知职位，停止翻页")
+                break
+            yield page, page_new_jobs
             
-            # 处理单个数字
-            else:
-                salary = int(float(salary_text))
-                return salary, salary
-        except Exception as e:
-            logger.warning(f"解析薪资失败: {salary_text}, 错误: {e}")
-            return None, None
+            if len(jobs) < 20:
+                break
     
-    def extract_job_info(self, job_data):
-        """从原始数据中提取职位信息
+    def extract_page(self, jobs, listing_type=None):
+        """批量提取一页职位信息
         
         Args:
-            job_data: API返回的原始职位数据
+            jobs: 一页原始职位数据
+            listing_type: 该页所属列表的职位类型
             
         Returns:
-            dict: 提取并处理后的职位信息
+            list: JobRecord列表
         """
-        # 解析薪资
-        salary_min, salary_max = self.parse_salary(job_data.get('salary', ''))
-        
-        # 提取发布日期
-        try:
-            publish_date = datetime.strptime(job_data.get('fbsj', ''), '%Y-%m-%d').date()
-        except:
-            publish_date = None
-            
-        return {
-            'title': job_data.get('name', ''),
-            'company_name': job_data.get('company_name', ''),
-            'job_type': job_data.get('zhiwei_type_name', ''),
-            'salary_min': salary_min,
-            'salary_max': salary_max,
-            'province': job_data.get('province', ''),
-            'city': job_data.get('city', ''),
-            'description': job_data.get('description', ''),
-            'requirement': job_data.get('content', ''),
-            'publish_date': publish_date,
-            'source_url': f"https://jy.cdu.edu.cn/Zhaopin/zhiweidetail.html?id={job_data.get('id')}&jobtype=1",
-            'industry': job_data.get('industry_name', ''),
-        } 
\ No newline at end of file
+        start = time.perf_counter()
+        records = self.extractor.extract_page(jobs, listing_type)
+        self.telemetry.observe('extract_latency', time.perf_counter() - start)
+        self.telemetry.incr('pages')
+        self.telemetry.incr('rows_extracted', len(records))
+        self.telemetry.incr('rows_dropped', len(jobs) - len(records))
+        return records
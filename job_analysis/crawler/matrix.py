@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import math
+from collections import namedtuple
+import aiohttp
+from .async_crawler import AsyncJobCrawler
+from .job_crawler import JobCrawler
+from .telemetry import CrawlTelemetry
+
+logger = logging.getLogger(__name__)
+
+class CrawlTarget(namedtuple('CrawlTarget', ['school_id', 'school_code', 'job_type'])):
+    """爬取目标：一个学校的一种职位类型"""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.school_code}/{self.job_type}"
+
+
+class FairSlot:
+    """两级并发限制：先占用目标自身的名额，再占用全局名额
+
+    目标名额保证单个目标最多占用其公平份额的全局并发，排队等待全局名额的请求
+    也因此来自各个目标，而不是被某一个目标占满。
+    """
+
+    def __init__(self, target_semaphore, global_semaphore):
+        self.target_semaphore = target_semaphore
+        self.global_semaphore = global_semaphore
+
+    async def __aenter__(self):
+        await self.target_semaphore.acquire()
+        try:
+            await self.global_semaphore.acquire()
+        except BaseException:
+            self.target_semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.global_semaphore.release()
+        self.target_semaphore.release()
+
+
+class CrawlMatrix:
+    """在同一个事件循环中并发爬取多个(学校, 职位类型)目标
+
+    所有目标共用一个aiohttp连接池和全局并发上限，请求速率由按主机共享的自适应限速器控制，
+    每个目标另有并发上限保证公平。总耗时取决于最慢的目标，而不是各目标耗时之和。
+    """
+
+    def __init__(self, targets, max_in_flight=10, per_target=None, timeout=10, max_retries=3,
+                 base_url=None, response_listeners=None, telemetry=None):
+        """
+        Args:
+            targets: CrawlTarget列表
+            max_in_flight: 全局最大在途请求数
+            per_target: 单个目标的最大在途请求数，默认为全局并发的平均份额
+            timeout: 单个请求超时时间（秒）
+            max_retries: 单个请求最大重试次数
+            base_url: 列表接口地址
+            response_listeners: 共享的响应回调列表，参数为(耗时秒数, 状态码)
+            telemetry: 共享的CrawlTelemetry实例，所有目标的请求指标汇总到一起
+        """
+        self.targets = list(targets)
+        self.max_in_flight = max(max_in_flight, 1)
+        if per_target is None:
+            per_target = math.ceil(self.max_in_flight / max(len(self.targets), 1))
+        self.per_target = max(min(per_target, self.max_in_flight), 1)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self.response_listeners = response_listeners if response_listeners is not None else []
+        self.telemetry = telemetry or CrawlTelemetry()
+        self.target_stats = {
+            target: {'pages': 0, 'rows': 0, 'errors': 0}
+            for target in self.targets
+        }
+
+    def create_crawler(self, target):
+        """为目标创建爬虫，响应回调与矩阵共享"""
+        crawler = JobCrawler(
+            max_workers=self.per_target,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            base_url=self.base_url,
+            school_id=target.school_id,
+            school_code=target.school_code
+        )
+        crawler.response_listeners = self.response_listeners
+        crawler.telemetry = self.telemetry
+        crawler.error_listeners.append(lambda page, message: self._record_error(target, page, message))
+        return crawler
+
+    def _record_error(self, target, page, message):
+        self.target_stats[target]['errors'] += 1
+        logger.error(f"目标 {target} 第 {page} 页爬取失败: {message}")
+
+    async def aiter_pages(self, max_pages=10):
+        """并发爬取所有目标，按完成顺序产出页面
+
+        Args:
+            max_pages: 每个目标的最大爬取页数
+
+        Yields:
+            tuple: (目标, 页码, 该页的职位列表)
+        """
+        global_semaphore = asyncio.Semaphore(self.max_in_flight)
+        results = asyncio.Queue(maxsize=self.max_in_flight * 2)
+        done_marker = object()
+
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.max_in_flight)
+        crawlers = {target: self.create_crawler(target) for target in self.targets}
+        any_crawler = next(iter(crawlers.values()), None)
+        if any_crawler is None:
+            return
+
+        # 各目标的爬虫只借用请求参数和回调，异步请求走共享的aiohttp会话，结束时关闭爬虫自带的同步会话
+        try:
+            async with aiohttp.ClientSession(
+                connector=connector,
+                headers=any_crawler.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as session:
+
+                async def run_target(target):
+                    crawler = crawlers[target]
+                    async_crawler = AsyncJobCrawler(crawler, max_in_flight=self.per_target, timeout=self.timeout)
+                    slot = FairSlot(asyncio.Semaphore(self.per_target), global_semaphore)
+                    try:
+                        async for page, jobs in async_crawler.aiter_pages(
+                            job_type=target.job_type,
+                            max_pages=max_pages,
+                            session=session,
+                            semaphore=slot
+                        ):
+                            await results.put((target, page, jobs))
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"目标 {target} 爬取失败: {e}")
+                        self.target_stats[target]['errors'] += 1
+                    # 被取消时不再放入结束标记，消费方已经停止读取队列
+                    await results.put(done_marker)
+
+                tasks = [asyncio.ensure_future(run_target(target)) for target in self.targets]
+                remaining = len(tasks)
+                try:
+                    while remaining:
+                        item = await results.get()
+                        if item is done_marker:
+                            remaining -= 1
+                            continue
+                        target, page, jobs = item
+                        stats = self.target_stats[target]
+                        stats['pages'] += 1
+                        stats['rows'] += len(jobs)
+                        yield item
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for crawler in crawlers.values():
+                crawler.close()
+
+    def iter_pages(self, max_pages=10):
+        """aiter_pages的同步包装，调用方取下一页时才驱动事件循环
+
+        Yields:
+            tuple: (目标, 页码, 该页的职位列表)
+        """
+        loop = asyncio.new_event_loop()
+        agen = self.aiter_pages(max_pages=max_pages)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
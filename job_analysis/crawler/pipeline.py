@@ -0,0 +1,168 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class PipelineStopped(Exception):
+    """流水线被其他阶段的错误终止"""
+
+
+class CrawlPipeline:
+    """流式爬取流水线
+
+    爬取、提取、保存三个阶段由有界队列连接：爬取线程逐页产出原始数据，
+    提取线程把职位攒成批次，调用线程按批次写入数据库。任一队列满时上游阻塞，
+    因此内存占用只与队列容量有关，不随总页数增长，且前面的页面写库时后面的页面仍在下载。
+    """
+
+    _DONE = object()
+
+    def __init__(self, crawler, writer, page_queue_size=8, batch_queue_size=2, progress=None, on_saved=None,
+                 telemetry=None, listing_type=None):
+        """
+        Args:
+            crawler: JobCrawler实例，提供extract_page
+            writer: BulkJobWriter实例，按其batch_size攒批写入
+            page_queue_size: 待提取页面队列容量
+            batch_queue_size: 待写入批次队列容量
+            progress: 进度回调，每写入一个批次后在调用线程中以当前统计的副本调用
+            on_saved: 页面写库回调，每写入一个批次后在调用线程中以该批次包含的(页码, 职位数)列表调用
+            telemetry: CrawlTelemetry实例，记录队列深度和写库耗时
+            listing_type: 页面所属列表的职位类型，页面未单独指定时写入每条记录
+        """
+        self.crawler = crawler
+        self.writer = writer
+        self.progress = progress
+        self.on_saved = on_saved
+        self.telemetry = telemetry
+        self.listing_type = listing_type
+        self.page_queue_size = page_queue_size
+        self.batch_queue_size = batch_queue_size
+
+    def run(self, pages):
+        """运行流水线直到页面产出完毕
+
+        Args:
+            pages: 产出(页码, 原始职位列表)的可迭代对象，如JobCrawler.iter_pages()；
+                多个列表混合爬取时可产出(页码, 原始职位列表, 列表类型)
+
+        Returns:
+            dict: 运行统计，包含pages、extracted、inserted、updated、skipped、dropped
+        """
+        stats = {'pages': 0, 'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'dropped': 0}
+        page_queue = queue.Queue(maxsize=self.page_queue_size)
+        batch_queue = queue.Queue(maxsize=self.batch_queue_size)
+        stop = threading.Event()
+        failures = []
+        telemetry = self.telemetry
+
+        def put(q, item):
+            # 带超时地放入队列，其他阶段失败时及时退出而不是永久阻塞
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+            raise PipelineStopped()
+
+        def fetch_stage():
+            try:
+                for item in pages:
+                    listing_type = item[2] if len(item) > 2 else self.listing_type
+                    put(page_queue, (item[0], item[1], listing_type))
+                    if telemetry:
+                        telemetry.gauge('page_queue_depth', page_queue.qsize())
+                    stats['pages'] += 1
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                if hasattr(pages, 'close'):
+                    pages.close()
+                page_queue.put(self._DONE)
+
+        def extract_stage():
+            batch = []
+            batch_pages = []
+            upstream_done = False
+            try:
+                while True:
+                    item = page_queue.get()
+                    if item is self._DONE:
+                        upstream_done = True
+                        break
+                    page, raw_jobs, listing_type = item
+                    records = self.crawler.extract_page(raw_jobs, listing_type)
+                    stats['dropped'] += len(raw_jobs) - len(records)
+                    batch.extend(records)
+                    # 页面的职位整页进入同一批次，批次写库后该页即完成
+                    batch_pages.append((page, len(records)))
+                    if len(batch) >= self.writer.batch_size:
+                        put(batch_queue, (batch, batch_pages))
+                        if telemetry:
+                            telemetry.gauge('batch_queue_depth', batch_queue.qsize())
+                        batch = []
+                        batch_pages = []
+                if batch_pages:
+                    put(batch_queue, (batch, batch_pages))
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                # 其他阶段失败时下游会主动排空队列，这里可以放心阻塞
+                batch_queue.put(self._DONE)
+                # 排空上游队列，避免爬取线程阻塞在结束标记上
+                while not upstream_done and page_queue.get() is not self._DONE:
+                    pass
+
+        threads = [
+            threading.Thread(target=fetch_stage, name='crawl-fetch', daemon=True),
+            threading.Thread(target=extract_stage, name='crawl-extract', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        # 写入阶段在调用线程中执行，复用调用线程的数据库连接
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is self._DONE:
+                    break
+                batch, batch_pages = item
+                if batch:
+                    start = time.perf_counter()
+                    batch_stats = self.writer.write_batch(batch)
+                    if telemetry:
+                        telemetry.observe('db_write_latency', time.perf_counter() - start)
+                        telemetry.incr('batches')
+                        telemetry.incr('rows_written', len(batch))
+                    stats['extracted'] += len(batch)
+                    stats['inserted'] += batch_stats['inserted']
+                    stats['updated'] += batch_stats['updated']
+                    stats['skipped'] += batch_stats['skipped']
+                    logger.info(
+                        f"已写入 {stats['inserted'] + stats['updated']} 条职位数据，已爬取 {stats['pages']} 页"
+                    )
+                if self.on_saved:
+                    self.on_saved(batch_pages)
+                if self.progress:
+                    self.progress(dict(stats))
+        except BaseException:
+            stop.set()
+            while batch_queue.get() is not self._DONE:
+                pass
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if failures:
+            raise failures[0]
+        return stats
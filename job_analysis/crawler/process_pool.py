@@ -0,0 +1,97 @@
+import concurrent.futures
+import logging
+import multiprocessing
+import django
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+def create_pool(processes):
+    """创建爬取进程池
+
+    fork启动的子进程会继承父进程的数据库连接，创建前先关闭，子进程各自按需重新建立连接。
+    """
+    connections.close_all()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=context,
+        initializer=init_worker
+    )
+
+def init_worker():
+    """工作进程初始化：spawn方式启动时需要重新加载Django，并丢弃继承来的连接"""
+    django.setup()
+    connections.close_all()
+
+def shard_pages(pages, shards):
+    """把页码列表切分为连续的页码区间
+
+    Args:
+        pages: 页码列表
+        shards: 分片数
+
+    Returns:
+        list: 每个分片的页码列表，不含空分片
+    """
+    pages = list(pages)
+    shards = max(min(shards, len(pages)), 1)
+    size, extra = divmod(len(pages), shards)
+    result = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < extra else 0)
+        if end > start:
+            result.append(pages[start:end])
+        start = end
+    return result
+
+def shard_targets(targets, shards):
+    """把爬取目标轮流分配到各个分片，不含空分片"""
+    result = [list(targets[index::shards]) for index in range(max(shards, 1))]
+    return [group for group in result if group]
+
+def crawl_page_shard(manager_options, job_type, pages):
+    """工作进程：爬取一段页码并批量写库
+
+    Args:
+        manager_options: 创建CrawlerManager的参数
+        job_type: 职位类型
+        pages: 本分片的页码列表
+
+    Returns:
+        tuple: (写入统计, CrawlTelemetry, 本分片出现过的来源职位ID集合)
+    """
+    from .crawler_manager import CrawlerManager
+    try:
+        manager = CrawlerManager(**manager_options)
+        # 分片只看到部分页面，职位ID交给父进程汇总后统一判断下架
+        seen_ids = set()
+        manager.writer.seen_ids = seen_ids
+        manager.crawl_and_save(job_type=job_type, pages=pages)
+        return manager.last_stats, manager.telemetry, seen_ids
+    finally:
+        connections.close_all()
+
+def crawl_target_shard(manager_options, targets, max_pages, max_in_flight, per_target):
+    """工作进程：爬取一组目标并批量写库
+
+    Returns:
+        tuple: (写入统计, 每个目标的统计, CrawlTelemetry)
+    """
+    from .crawler_manager import CrawlerManager
+    try:
+        manager = CrawlerManager(**manager_options)
+        target_stats = manager.crawl_matrix(
+            targets, max_pages=max_pages, max_in_flight=max_in_flight, per_target=per_target
+        )
+        return manager.last_stats, target_stats, manager.telemetry
+    finally:
+        connections.close_all()
+
+def merge_stats(total, stats):
+    """累加写入统计"""
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+    return total
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from .telemetry import log_sampler
+
+logger = logging.getLogger(__name__)
+
+# 需要退避重试的HTTP状态码
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class AdaptiveRateLimiter:
+    """自适应令牌桶限速器
+
+    令牌按当前速率补充，桶容量为burst。响应快且正常时速率加性增长，
+    遇到错误、429或延迟突增时速率乘性下降（AIMD），429带Retry-After时
+    在指定时间内暂停发放令牌。线程安全，同步和异步调用方可共用同一实例。
+    """
+
+    def __init__(self, rate=5.0, burst=5, min_rate=0.5, max_rate=50.0,
+                 increase_step=0.2, decrease_factor=0.5, latency_threshold=2.0):
+        """
+        Args:
+            rate: 初始速率（请求/秒）
+            burst: 令牌桶容量
+            min_rate: 速率下限
+            max_rate: 速率上限
+            increase_step: 每次健康响应增加的速率
+            decrease_factor: 出错时速率的乘性衰减系数
+            latency_threshold: 延迟告警阈值（秒），超过该值且明显高于平均延迟时视为延迟突增
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._avg_latency = None
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def reserve(self):
+        """预定一个令牌
+
+        Returns:
+            float: 调用方在发送请求前需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """阻塞直到获得令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """在事件循环中等待令牌，不阻塞其他协程"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self, latency):
+        """记录一次成功响应并据此调整速率
+
+        Args:
+            latency: 请求耗时（秒）
+        """
+        with self._lock:
+            avg = self._avg_latency
+            self._avg_latency = latency if avg is None else avg * 0.8 + latency * 0.2
+            if avg is not None and latency > self.latency_threshold and latency > avg * 3:
+                self._decrease()
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def record_failure(self, status=None, retry_after=None):
+        """记录一次失败响应并降低速率
+
+        Args:
+            status: HTTP状态码，网络错误时为None
+            retry_after: 服务端要求的等待秒数
+        """
+        with self._lock:
+            self._decrease()
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+                self._tokens = min(self._tokens, 0)
+
+    def _decrease(self):
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = min(self._tokens, 1)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(url):
+    """获取某个主机共享的限速器
+
+    Args:
+        url: 请求地址或主机名
+
+    Returns:
+        AdaptiveRateLimiter: 该主机对应的限速器
+    """
+    host = urlsplit(url).netloc or url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveRateLimiter()
+        return limiter
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """计算带全抖动的指数退避时间
+
+    Args:
+        attempt: 已重试次数（从0开始）
+        base: 基础等待秒数
+        cap: 最大等待秒数
+
+    Returns:
+        float: 等待秒数
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value):
+    """解析Retry-After响应头（仅支持秒数格式）"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def post_with_retries(session, url, limiter, max_retries=3, on_response=None, **kwargs):
+    """经限速器发送POST请求，失败时按指数退避重试
+
+    Args:
+        session: requests会话
+        url: 请求地址
+        limiter: AdaptiveRateLimiter实例
+        max_retries: 最大重试次数
+        on_response: 每次请求结束后的回调，参数为(耗时秒数, 状态码)，网络错误时状态码为None
+        **kwargs: 透传给session.post的参数
+
+    Returns:
+        requests.Response: 状态码不可重试的响应
+
+    Raises:
+        requests.RequestException: 重试耗尽后的最后一次错误
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = session.post(url, **kwargs)
+        except requests.RequestException as e:
+            limiter.record_failure()
+            if on_response:
+                on_response(time.monotonic() - start, None)
+            error = e
+        else:
+            latency = time.monotonic() - start
+            if on_response:
+                on_response(latency, response.status_code)
+            if response.status_code not in RETRYABLE_STATUS:
+                # 与异步引擎一致，只有成功响应才提高速率，4xx等客户端错误不计为成功
+                if response.status_code < 400:
+                    limiter.record_success(latency)
+                return response
+            limiter.record_failure(
+                response.status_code,
+                retry_after=parse_retry_after(response.headers.get('Retry-After'))
+            )
+            error = requests.HTTPError(f"{response.status_code} Error for url: {url}", response=response)
+
+        if attempt < max_retries:
+            delay = backoff_delay(attempt)
+            if log_sampler.allow('retry'):
+                logger.warning(f"请求失败({error})，{delay:.2f}秒后进行第{attempt + 1}次重试")
+            time.sleep(delay)
+
+    raise error
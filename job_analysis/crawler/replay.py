@@ -0,0 +1,172 @@
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+class FixtureStore:
+    """录制的列表接口响应
+
+    目录结构为 <目录>/jobtype_<职位类型>/page_<页码>.json，每个文件保存一页原始响应。
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def page_path(self, job_type, page):
+        return self.directory / f'jobtype_{job_type}' / f'page_{page:04d}.json'
+
+    def save(self, job_type, page, result):
+        """保存一页原始响应"""
+        path = self.page_path(job_type, page)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+
+    def load(self, job_type):
+        """按页码顺序加载某个职位类型的全部职位列表
+
+        Returns:
+            list: 每个元素为一页的职位列表
+        """
+        pages = []
+        for path in sorted((self.directory / f'jobtype_{job_type}').glob('page_*.json')):
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+            jobs = result.get('data', {}).get('list', [])
+            if jobs:
+                pages.append(jobs)
+        return pages
+
+
+def synthetic_jobs(page, size=20):
+    """生成一页结构与真实接口一致的模拟职位数据，没有录制数据时使用"""
+    salaries = ['3000-5000', '5K-8K', '8000-12000', '10k-15k', '面议', '6000以上', '1-2万/年']
+    jobs = []
+    for i in range(size):
+        index = (page - 1) * size + i
+        jobs.append({
+            'id': str(100000 + index),
+            'work_name': f'模拟职位{index}',
+            'com_id_name': f'模拟公司{index % 97}',
+            'industry_id_name': f'行业{index % 13}',
+            'cate_id1_name': f'岗位类型{index % 17}',
+            'xinzi': salaries[index % len(salaries)],
+            'province_id_name': f'省份{index % 31}',
+            'city_id_name': f'城市{index % 89}',
+            'xueli_id_name': ['本科', '大专', '硕士', '不限'][index % 4],
+            'person_count': str(index % 10 + 1),
+            'content': '岗位职责：负责相关工作。' * 20,
+            'examine_time': str(1735689600 - index * 60),
+            'tagsList': [{'title': '五险一金'}, {'title': '带薪年假'}],
+        })
+    return jobs
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """列表接口替身的请求处理器"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        page = int(form.get('page', ['1'])[0])
+        size = int(form.get('size', ['20'])[0])
+        job_type = form.get('jobtype', ['1'])[0]
+
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+
+        if server.error_rate and random.random() < server.error_rate:
+            self.send_json({'code': 503, 'msg': 'stand-in error'}, status=503)
+            return
+
+        jobs = server.page_jobs(job_type, page, size)
+        self.send_json({
+            'code': 200,
+            'msg': 'ok',
+            'data': {'list': jobs, 'total_count': server.page_count * size}
+        })
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """本地列表接口替身服务
+
+    回放录制的响应（页数不足时循环复用并改写职位ID以保持唯一），
+    没有录制数据时返回模拟数据。可配置延迟、错误率和总页数。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures=None, latency=0.0, error_rate=0.0, page_count=50):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示随机端口
+            fixtures: 录制数据目录，为None时返回模拟数据
+            latency: 平均响应延迟（秒），实际延迟在0.5~1.5倍之间随机
+            error_rate: 返回503的概率
+            page_count: 对外声明的总页数
+        """
+        super().__init__((host, port), StandInHandler)
+        self.store = FixtureStore(fixtures) if fixtures else None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_count = page_count
+        self._pages = {}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/mobile.php/job/getlist'
+
+    def page_jobs(self, job_type, page, size):
+        """返回指定页的职位列表"""
+        if page < 1 or page > self.page_count:
+            return []
+        if self.store is None:
+            return synthetic_jobs(page, size)
+
+        if job_type not in self._pages:
+            self._pages[job_type] = self.store.load(job_type)
+        recorded = self._pages[job_type]
+        if not recorded:
+            return synthetic_jobs(page, size)
+
+        cycle, index = divmod(page - 1, len(recorded))
+        jobs = recorded[index]
+        if cycle:
+            jobs = [dict(job, id=f"{job.get('id')}-{cycle}") for job in jobs]
+        return jobs
+
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, name='stand-in-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,132 @@
+import logging
+import threading
+from django.db.models import F
+from django.utils import timezone
+from ..models import CrawlRun, CrawlPage
+
+logger = logging.getLogger(__name__)
+
+class CrawlRunState:
+    """持久化的逐页爬取状态
+
+    每个页面在写库完成后才标记为已完成，进程中途退出时未写库的页面保持待爬取状态，
+    续爬时只需获取这些页面。失败回调可能来自爬取线程，只在内存中记录，由finish统一落库。
+    """
+
+    def __init__(self, run):
+        """
+        Args:
+            run: CrawlRun实例
+        """
+        self.run = run
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, source, command, job_type, params=None):
+        """新建爬取批次
+
+        Args:
+            source: 数据源标识
+            command: 发起爬取的命令名称
+            job_type: 职位类型
+            params: 其他爬取参数
+
+        Returns:
+            CrawlRunState: 新批次的状态对象
+        """
+        run = CrawlRun.objects.create(source=source, command=command, job_type=job_type, params=params or {})
+        return cls(run)
+
+    @classmethod
+    def load(cls, run_id, command=None):
+        """加载已有批次用于续爬
+
+        Args:
+            run_id: 批次ID
+            command: 只加载由该命令发起的批次，不同命令的来源链接格式不同，不能混用
+
+        Returns:
+            CrawlRunState: 批次的状态对象，批次不存在时抛出CrawlRun.DoesNotExist
+        """
+        lookup = {'pk': run_id}
+        if command:
+            lookup['command'] = command
+        run = CrawlRun.objects.get(**lookup)
+        run.status = CrawlRun.STATUS_RUNNING
+        run.finished_at = None
+        run.save(update_fields=['status', 'finished_at'])
+        return cls(run)
+
+    @property
+    def is_planned(self):
+        """是否已确定总页数"""
+        return self.run.total_pages is not None
+
+    def plan(self, total_pages):
+        """记录总页数并为每一页创建待爬取记录
+
+        Args:
+            total_pages: 本批次需要爬取的页数
+        """
+        self.run.total_pages = total_pages
+        self.run.save(update_fields=['total_pages'])
+        CrawlPage.objects.bulk_create(
+            [CrawlPage(run=self.run, page=page) for page in range(1, total_pages + 1)],
+            ignore_conflicts=True
+        )
+
+    def pending_pages(self):
+        """尚未完成的页码，按页码升序"""
+        return list(
+            self.run.pages.exclude(status=CrawlPage.STATUS_DONE)
+            .order_by('page')
+            .values_list('page', flat=True)
+        )
+
+    def record_failure(self, page, message):
+        """记录页面爬取失败，可在任意线程中调用"""
+        with self._lock:
+            self._failed[page] = str(message)
+
+    def mark_saved(self, pages):
+        """标记已写库的页面为完成
+
+        Args:
+            pages: (页码, 职位数)列表
+        """
+        with self._lock:
+            failed = set(self._failed)
+        for page, rows in pages:
+            if page in failed:
+                continue
+            CrawlPage.objects.filter(run=self.run, page=page).update(
+                status=CrawlPage.STATUS_DONE,
+                rows=rows,
+                attempts=F('attempts') + 1,
+                error=None
+            )
+
+    def finish(self):
+        """写入失败页面并更新批次状态
+
+        Returns:
+            list: 仍未完成的页码
+        """
+        with self._lock:
+            failed = dict(self._failed)
+            self._failed.clear()
+        for page, message in failed.items():
+            CrawlPage.objects.filter(run=self.run, page=page).update(
+                status=CrawlPage.STATUS_FAILED,
+                attempts=F('attempts') + 1,
+                error=message
+            )
+
+        remaining = self.pending_pages() if self.is_planned else None
+        self.run.status = CrawlRun.STATUS_COMPLETED if remaining == [] else CrawlRun.STATUS_FAILED
+        self.run.finished_at = timezone.now()
+        self.run.save(update_fields=['status', 'finished_at'])
+        if remaining:
+            logger.warning(f"爬取批次 {self.run.pk} 有 {len(remaining)} 页未完成，可使用 --resume {self.run.pk} 续爬")
+        return remaining or []
@@ -0,0 +1,112 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from ..models import CrawlTask
+from .crawler_manager import CrawlerManager
+
+logger = logging.getLogger(__name__)
+
+# 同时运行的后台爬取任务数，可在settings中通过CRAWL_TASK_WORKERS配置
+DEFAULT_TASK_WORKERS = 1
+
+# 单个任务最多保留的错误条数，避免大量失败页面撑大记录
+MAX_TASK_ERRORS = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """获取进程内共享的后台任务线程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CRAWL_TASK_WORKERS', DEFAULT_TASK_WORKERS),
+                thread_name_prefix='crawl-task'
+            )
+        return _executor
+
+def submit_crawl(job_type=1, max_pages=10, incremental=False):
+    """创建爬取任务并在事务提交后提交到后台线程池，立即返回
+
+    Args:
+        job_type: 职位类型 (1=全职, 2=实习, 3=兼职)
+        max_pages: 最大爬取页数
+        incremental: 是否增量爬取
+
+    Returns:
+        CrawlTask: 新建的任务记录，状态为pending
+    """
+    task = CrawlTask.objects.create(params={
+        'job_type': job_type,
+        'max_pages': max_pages,
+        'incremental': incremental,
+    })
+    # 调用方在事务中时，等任务记录提交后再交给后台线程，避免线程查询不到尚未提交的任务
+    transaction.on_commit(lambda: get_executor().submit(run_crawl_task, task.pk))
+    logger.info(f"已提交爬取任务 {task.pk}，参数: {task.params}")
+    return task
+
+def run_crawl_task(task_id):
+    """在后台线程中执行爬取任务，并把进度和错误写回任务记录
+
+    Args:
+        task_id: CrawlTask主键
+    """
+    close_old_connections()
+    try:
+        task = CrawlTask.objects.get(pk=task_id)
+        task.status = CrawlTask.STATUS_RUNNING
+        task.started_at = timezone.now()
+        task.save(update_fields=['status', 'started_at'])
+
+        errors = []
+
+        def on_error(page, message):
+            if len(errors) < MAX_TASK_ERRORS:
+                errors.append(f"第 {page} 页: {message}")
+
+        def on_progress(stats):
+            CrawlTask.objects.filter(pk=task_id).update(
+                pages_fetched=stats['pages'],
+                rows_saved=stats['inserted'] + stats['updated'],
+                rows_skipped=stats['skipped'],
+                errors=list(errors)
+            )
+
+        params = task.params
+        update_fields = ['status', 'errors', 'finished_at']
+        manager = CrawlerManager()
+        manager.crawler.error_listeners.append(on_error)
+        try:
+            manager.crawl_and_save(
+                job_type=params.get('job_type', 1),
+                max_pages=params.get('max_pages', 10),
+                incremental=params.get('incremental', False),
+                progress=on_progress
+            )
+        except Exception as e:
+            logger.exception(f"爬取任务 {task_id} 失败")
+            errors.append(str(e))
+            task.status = CrawlTask.STATUS_FAILED
+        else:
+            task.status = CrawlTask.STATUS_SUCCESS
+            stats = manager.last_stats
+            task.pages_fetched = stats['pages']
+            task.rows_saved = stats['inserted'] + stats['updated']
+            task.rows_skipped = stats['skipped']
+            update_fields += ['pages_fetched', 'rows_saved', 'rows_skipped']
+
+        task.errors = errors
+        task.finished_at = timezone.now()
+        # 失败时保留最后一次进度回调写入的计数
+        task.save(update_fields=update_fields)
+        logger.info(f"爬取任务 {task_id} 结束，状态: {task.status}")
+    except Exception:
+        logger.exception(f"更新爬取任务 {task_id} 状态失败")
+    finally:
+        # 线程池中的线程不经过请求周期，需要手动释放数据库连接
+        connection.close()
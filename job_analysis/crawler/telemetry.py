@@ -0,0 +1,277 @@
+import bisect
+import json
+import threading
+import time
+
+# 直方图桶上界（秒），按1.25倍等比划分，覆盖0.1毫秒到约100秒
+HISTOGRAM_BOUNDS = tuple(0.0001 * 1.25 ** i for i in range(62))
+
+class Histogram:
+    """固定桶的延迟直方图
+
+    记录一次只做一次二分查找和几次加法，分位数按桶上界近似，相对误差不超过25%。
+    """
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """近似百分位数
+
+        Args:
+            p: 百分位，0-100
+
+        Returns:
+            float: 对应桶的上界（不超过最大值），没有记录时为0
+        """
+        if not self.count:
+            return 0.0
+        rank = max(p / 100 * self.count, 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def merge(self, other):
+        """合并另一个相同分桶的直方图，用于汇总多个进程的指标"""
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def summary(self):
+        """汇总统计，单位与记录值相同"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max or 0.0,
+        }
+
+
+class Gauge:
+    """采样型指标，记录最近值、最大值和均值，用于队列深度等"""
+
+    def __init__(self):
+        self.last = 0
+        self.max = 0
+        self.total = 0
+        self.samples = 0
+
+    def set(self, value):
+        self.last = value
+        self.total += value
+        self.samples += 1
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """合并另一个进程的采样结果"""
+        self.last = max(self.last, other.last)
+        self.total += other.total
+        self.samples += other.samples
+        if other.max > self.max:
+            self.max = other.max
+
+    def summary(self):
+        return {
+            'last': self.last,
+            'max': self.max,
+            'mean': self.total / self.samples if self.samples else 0.0,
+        }
+
+
+class CrawlTelemetry:
+    """一次爬取的结构化指标：计数器、延迟直方图和队列深度
+
+    爬取线程、提取线程和写库线程会同时记录，所有更新在同一把锁内完成，
+    每次记录只有几次加法，开销远小于逐条格式化日志。
+    """
+
+    # 汇总报告中的计数器及其说明
+    COUNTER_LABELS = (
+        ('requests', '请求次数'),
+        ('retries', '失败重试的请求'),
+        ('page_errors', '失败页面'),
+        ('bytes_received', '接收字节数'),
+        ('pages', '页面数'),
+        ('rows_extracted', '提取职位数'),
+        ('rows_dropped', '丢弃职位数'),
+        ('rows_written', '写入批次职位数'),
+        ('batches', '写入批次数'),
+    )
+
+    # 汇总报告中的直方图及其说明，单位均为秒
+    HISTOGRAM_LABELS = (
+        ('request_latency', '请求延迟'),
+        ('extract_latency', '单页提取耗时'),
+        ('db_write_latency', '单批写库耗时'),
+    )
+
+    # 汇总报告中的采样指标及其说明
+    GAUGE_LABELS = {
+        'page_queue_depth': '待提取页面队列深度',
+        'batch_queue_depth': '待写入批次队列深度',
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空所有指标并重新开始计时"""
+        with self._lock:
+            self.started = time.monotonic()
+            self.finished = None
+            self.counters = {name: 0 for name, _ in self.COUNTER_LABELS}
+            self.histograms = {}
+            self.gauges = {}
+
+    def stop(self):
+        """结束计时，之后的吞吐量按结束时刻计算"""
+        self.finished = time.monotonic()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(value)
+
+    def gauge(self, name, value):
+        with self._lock:
+            gauge = self.gauges.get(name)
+            if gauge is None:
+                gauge = self.gauges[name] = Gauge()
+            gauge.set(value)
+
+    def merge(self, other):
+        """把另一个CrawlTelemetry（如工作进程返回的结果）的计数、直方图和采样合并进来，耗时仍以本实例为准"""
+        with self._lock:
+            for name, value in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram in other.histograms.items():
+                self.histograms.setdefault(name, Histogram()).merge(histogram)
+            for name, gauge in other.gauges.items():
+                self.gauges.setdefault(name, Gauge()).merge(gauge)
+
+    def __getstate__(self):
+        # 锁不能跨进程传递，序列化时去掉
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self):
+        """生成可序列化的汇总结果
+
+        Returns:
+            dict: 包含elapsed、counters、rates、histograms、gauges
+        """
+        with self._lock:
+            elapsed = self.elapsed
+            counters = dict(self.counters)
+            histograms = {name: histogram.summary() for name, histogram in self.histograms.items()}
+            gauges = {name: gauge.summary() for name, gauge in self.gauges.items()}
+        per_second = (lambda value: value / elapsed) if elapsed > 0 else (lambda value: 0.0)
+        return {
+            'elapsed': elapsed,
+            'counters': counters,
+            'rates': {
+                'pages_per_second': per_second(counters.get('pages', 0)),
+                'rows_per_second': per_second(counters.get('rows_extracted', 0)),
+                'bytes_per_second': per_second(counters.get('bytes_received', 0)),
+            },
+            'histograms': histograms,
+            'gauges': gauges,
+        }
+
+    def report_lines(self):
+        """生成供日志或命令行输出的汇总报告"""
+        summary = self.summary()
+        counters = summary['counters']
+        rates = summary['rates']
+        lines = [
+            f"耗时 {summary['elapsed']:.2f} 秒，{rates['pages_per_second']:.1f} 页/秒，"
+            f"{rates['rows_per_second']:.1f} 行/秒，{rates['bytes_per_second'] / 1024:.1f} KB/秒",
+            '，'.join(f"{label} {counters.get(name, 0)}" for name, label in self.COUNTER_LABELS),
+        ]
+        for name, label in self.HISTOGRAM_LABELS:
+            stats = summary['histograms'].get(name)
+            if stats:
+                lines.append(
+                    f"{label}(ms): 次数 {stats['count']}，均值 {stats['mean'] * 1000:.1f}，"
+                    f"p50 {stats['p50'] * 1000:.1f}，p90 {stats['p90'] * 1000:.1f}，"
+                    f"p99 {stats['p99'] * 1000:.1f}，最大 {stats['max'] * 1000:.1f}"
+                )
+        for name, stats in sorted(summary['gauges'].items()):
+            lines.append(f"{self.GAUGE_LABELS.get(name, name)}: 最大 {stats['max']}，平均 {stats['mean']:.1f}")
+        return lines
+
+    def dump(self, path):
+        """把汇总结果写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+class LogSampler:
+    """热点路径的日志采样
+
+    每个键的第一条、之后每隔every条、或距上次输出超过interval秒时才放行，
+    调用方先判断再格式化日志，被丢弃的日志不产生字符串格式化开销。
+    """
+
+    def __init__(self, every=20, interval=5.0):
+        self.every = max(every, 1)
+        self.interval = interval
+        self._counts = {}
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+            if count % self.every == 0 or now - self._last.get(key, 0.0) >= self.interval:
+                self._last[key] = now
+                return True
+            return False
+
+# 爬取模块共用的日志采样器
+log_sampler = LogSampler()
@@ -7,18 +7,27 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = '分析数据库中的职位信息并生成统计结果'
     
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            default=False,
+            help='先从职位表全量重建聚合计数和月度薪资汇总，并检查与入库时增量维护的结果是否一致'
+        )
+    
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("开始分析职位数据..."))
         
         try:
-            results = JobDataAnalyzer.perform_all_analysis()
+            # --full时先全量重建聚合计数和月度薪资汇总，不一致处由perform_all_analysis记录警告
+            results = JobDataAnalyzer.perform_all_analysis(full=options['full'])
             
             # 输出分析结果概要
             self.stdout.write(self.style.SUCCESS("分析完成！"))
             self.stdout.write("行业分布分析：")
             for i, industry in enumerate(results['industry_distribution']['categories'][:5]):
                 count = results['industry_distribution']['data'][i]
-                self.stdout.write(f"  - {industry}: {count}家公司")
+                self.stdout.write(f"  - {industry}: {count}个职位")
                 
             self.stdout.write("薪资分布分析：")
             for i, salary_range in enumerate(results['salary_distribution']['categories']):
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from job_analysis.models import Job
+from job_analysis.utils.education import normalize_education, structured_education
+from job_analysis.utils.job_aggregates import rebuild_aggregates
+
+class Command(BaseCommand):
+    help = '为已有职位回填规范化的学历要求'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='每批读取和更新的职位数量'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            help='重新计算所有职位，默认只处理尚未填写学历要求的职位'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        queryset = Job.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(education_level__isnull=True)
+
+        total = 0
+        last_id = 0
+        while True:
+            # 按主键分页，每批只读取需要的列，已处理的行不会被重复扫描
+            rows = list(
+                queryset.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', 'description', 'requirement')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            jobs = [
+                Job(pk=pk, education_level=normalize_education(structured_education(description), description, requirement))
+                for pk, description, requirement in rows
+            ]
+            with transaction.atomic():
+                Job.objects.bulk_update(jobs, ['education_level'], batch_size=chunk_size)
+
+            total += len(jobs)
+            self.stdout.write(f'已回填 {total} 个职位')
+
+        # 学历维度的聚合计数随回填变化，回填后重建
+        if total:
+            rebuild_aggregates()
+        self.stdout.write(self.style.SUCCESS(f'学历要求回填完成，共处理 {total} 个职位'))
@@ -0,0 +1,123 @@
+import math
+import multiprocessing
+import queue
+import resource
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from job_analysis.crawler.crawler_manager import CrawlerManager
+from job_analysis.crawler.job_crawler import JobCrawler, ENGINES
+from job_analysis.crawler.rate_limiter import get_rate_limiter
+from job_analysis.crawler.replay import StandInServer
+
+def percentile(values, p):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(math.ceil(p / 100 * len(values)) - 1, 0)
+    return values[index]
+
+def run_trial(base_url, engine, workers, options, results):
+    """在独立子进程中运行一次爬取，保证峰值内存统计互不干扰"""
+    latencies = []
+    if options['save']:
+        manager = CrawlerManager(max_workers=workers, engine=engine, base_url=base_url)
+        crawler = manager.crawler
+    else:
+        crawler = JobCrawler(max_workers=workers, base_url=base_url)
+    crawler.response_listeners.append(lambda latency, status: latencies.append(latency))
+
+    if options['rate']:
+        limiter = get_rate_limiter(base_url)
+        limiter.rate = limiter.min_rate = limiter.max_rate = options['rate']
+
+    start = time.perf_counter()
+    if options['save']:
+        # 指定页码列表时不做完整爬取的下架标记，替身数据不会影响数据库中的真实职位状态
+        manager.crawl_and_save(job_type=options['type'], max_pages=options['pages'],
+                               pages=range(1, options['pages'] + 1))
+        pages = manager.last_stats['pages']
+        rows = manager.last_stats['extracted']
+    else:
+        pages = rows = 0
+        for page, raw_jobs in crawler.iter_pages(job_type=options['type'], max_pages=options['pages'],
+                                                 max_workers=workers, engine=engine):
+            pages += 1
+            rows += len(crawler.extract_page(raw_jobs))
+    elapsed = time.perf_counter() - start
+
+    results.put({
+        'engine': engine,
+        'workers': workers,
+        'pages': pages,
+        'rows': rows,
+        'elapsed': elapsed,
+        'requests': len(latencies),
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        # Linux下ru_maxrss单位为KB
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+class Command(BaseCommand):
+    help = '基于本地替身服务对各爬取引擎和并发数做基准测试'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', default=None, help='录制数据目录，不指定则使用模拟数据')
+        parser.add_argument('--pages', type=int, default=50, help='每次爬取的页数')
+        parser.add_argument('--type', type=int, default=1, help='职位类型 (1=全职, 2=实习, 3=兼职)')
+        parser.add_argument('--latency', type=float, default=0.05, help='替身服务平均响应延迟（秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='替身服务返回503的概率')
+        parser.add_argument(
+            '--engines',
+            default=','.join(ENGINES),
+            help='要测试的引擎，逗号分隔'
+        )
+        parser.add_argument('--workers', default='1,5,10', help='要测试的并发数，逗号分隔')
+        parser.add_argument('--rate', type=float, default=None, help='固定请求速率（请求/秒），不指定则使用自适应限速')
+        parser.add_argument('--save', action='store_true', default=False, help='同时写入数据库（默认只爬取和提取）')
+
+    def handle(self, *args, **options):
+        engines = [engine.strip() for engine in options['engines'].split(',') if engine.strip()]
+        worker_counts = [int(count) for count in options['workers'].split(',') if count.strip()]
+
+        server = StandInServer(
+            fixtures=options['fixtures'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            page_count=options['pages']
+        ).start()
+        self.stdout.write(f'替身服务: {server.base_url}')
+
+        # 子进程通过fork继承当前进程，先关闭数据库连接避免共享同一连接
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+
+        header = f"{'引擎':<8}{'并发':>6}{'页数':>8}{'行数':>8}{'页/秒':>10}{'行/秒':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'峰值内存(MB)':>14}"
+        self.stdout.write(header)
+        try:
+            for engine in engines:
+                for workers in worker_counts:
+                    results = context.Queue()
+                    process = context.Process(
+                        target=run_trial,
+                        args=(server.base_url, engine, workers, options, results)
+                    )
+                    process.start()
+                    process.join()
+                    try:
+                        result = results.get(timeout=5)
+                    except queue.Empty:
+                        self.stdout.write(self.style.ERROR(f'{engine} / {workers} 运行失败，退出码 {process.exitcode}'))
+                        continue
+
+                    elapsed = result['elapsed'] or float('inf')
+                    self.stdout.write(
+                        f"{engine:<8}{workers:>6}{result['pages']:>8}{result['rows']:>8}"
+                        f"{result['pages'] / elapsed:>10.1f}{result['rows'] / elapsed:>10.1f}"
+                        f"{result['p50'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}"
+                        f"{result['peak_rss_mb']:>14.1f}"
+                    )
+        finally:
+            server.stop()
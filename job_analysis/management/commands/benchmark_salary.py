@@ -0,0 +1,42 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from job_analysis.utils.salary_parser import parse_salary
+
+def build_workload(rows, distinct, seed=0):
+    """生成薪资文本负载：少量不同文本在大量职位中反复出现"""
+    rng = random.Random(seed)
+    formats = [
+        '{a}K-{b}K', '{a}-{b}k', '{a}000-{b}000元/月', '{a}000以上',
+        '{b}K以下', '{a}-{b}万/年', '{a}000', '面议',
+    ]
+    texts = []
+    for i in range(distinct):
+        a = rng.randint(2, 30)
+        texts.append(formats[i % len(formats)].format(a=a, b=a + rng.randint(1, 10)))
+    return [texts[rng.randrange(distinct)] for _ in range(rows)]
+
+class Command(BaseCommand):
+    help = '薪资解析器微基准测试（带缓存与不带缓存对比）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='解析的薪资文本条数')
+        parser.add_argument('--distinct', type=int, default=300, help='不同薪资文本的数量')
+
+    def handle(self, *args, **options):
+        workload = build_workload(options['rows'], options['distinct'])
+        uncached = parse_salary.__wrapped__
+
+        for name, parser in (('不带缓存', uncached), ('带缓存', parse_salary)):
+            parse_salary.cache_clear()
+            start = time.perf_counter()
+            for text in workload:
+                parser(text)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name}: {len(workload)} 条，耗时 {elapsed * 1000:.1f} ms，'
+                f'{len(workload) / elapsed:,.0f} 条/秒'
+            )
+
+        info = parse_salary.cache_info()
+        self.stdout.write(f'缓存命中 {info.hits} 次，未命中 {info.misses} 次')
@@ -1,6 +1,9 @@
 import logging
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from job_analysis.crawler.crawler_manager import CrawlerManager
+from job_analysis.crawler.job_crawler import ENGINES, ENGINE_THREAD, source_for_base_url
+from job_analysis.crawler.run_state import CrawlRunState
+from job_analysis.models import CrawlRun
 
 logger = logging.getLogger(__name__)
 
@@ -24,23 +27,128 @@ class Command(BaseCommand):
             '--workers',
             type=int,
             default=5,
-            help='并发线程数'
+            help='并发数（thread引擎为线程数，async引擎为最大在途请求数）'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=ENGINES,
+            default=ENGINE_THREAD,
+            help='爬取引擎 (thread=线程池, async=asyncio单线程长连接)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=10,
+            help='单个请求超时时间（秒）'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=False,
+            help='增量爬取，遇到全部为已知职位的页面即停止翻页'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help='列表接口地址，默认为就业网接口，可指向本地替身服务（结果保存在单独的数据源jiuyeb-standin下）'
+        )
+        parser.add_argument(
+            '--resume',
+            type=int,
+            default=None,
+            metavar='RUN_ID',
+            help='续爬指定批次，只爬取该批次中尚未完成的页面'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='工作进程数，大于1时按页码区间分片到多个进程并行爬取和写库'
+        )
+        parser.add_argument(
+            '--metrics-file',
+            default=None,
+            help='把爬取指标（延迟直方图、吞吐量、队列深度等）以JSON格式写入该文件'
         )
         
     def handle(self, *args, **options):
         job_type = options['type']
         max_pages = options['pages']
         max_workers = options['workers']
+        engine = options['engine']
+        processes = options['processes']
+        
+        if processes > 1 and (options['incremental'] or options['resume']):
+            raise CommandError('--processes 不能与 --incremental 或 --resume 同时使用')
+        
+        # 全量爬取记录逐页状态，中断后可以续爬；增量爬取本身只翻少量页面，不记录
+        run_state = None
+        if options['resume']:
+            if options['incremental']:
+                raise CommandError('--resume 不能与 --incremental 同时使用')
+            try:
+                run_state = CrawlRunState.load(options['resume'], command='crawl_jobs')
+            except CrawlRun.DoesNotExist:
+                raise CommandError(f"爬取批次 {options['resume']} 不存在或不是由 crawl_jobs 发起")
+            job_type = run_state.run.job_type
+            max_pages = run_state.run.params.get('max_pages', max_pages)
+            self.stdout.write(f"续爬批次 {run_state.run.pk}")
+        elif not options['incremental'] and processes <= 1:
+            run_state = CrawlRunState.create(
+                source_for_base_url(options['base_url']), 'crawl_jobs', job_type, params={'max_pages': max_pages}
+            )
+            self.stdout.write(f"爬取批次ID: {run_state.run.pk}，中断后可使用 --resume {run_state.run.pk} 继续")
         
         self.stdout.write(self.style.SUCCESS(
-            f"开始爬取职位信息，类型: {job_type}，最大页数: {max_pages}，并发线程数: {max_workers}"
+            f"开始爬取职位信息，类型: {job_type}，最大页数: {max_pages}，并发数: {max_workers}，引擎: {engine}"
         ))
         
-        crawler_manager = CrawlerManager(max_workers=max_workers)
-        saved_count = crawler_manager.crawl_and_save(
-            job_type=job_type, 
-            max_pages=max_pages,
-            max_workers=max_workers
+        crawler_manager = CrawlerManager(
+            max_workers=max_workers,
+            engine=engine,
+            timeout=options['timeout'],
+            base_url=options['base_url']
         )
+        if processes > 1:
+            self.stdout.write(f"多进程模式，工作进程数: {processes}")
+            saved_count = crawler_manager.crawl_sharded(
+                job_type=job_type,
+                max_pages=max_pages,
+                processes=processes
+            )
+        else:
+            saved_count = crawler_manager.crawl_and_save(
+                job_type=job_type, 
+                max_pages=max_pages,
+                max_workers=max_workers,
+                incremental=options['incremental'],
+                run_state=run_state
+            )
         
-        self.stdout.write(self.style.SUCCESS(f"爬取完成，成功保存 {saved_count} 条职位信息")) 
\ No newline at end of file
+        stats = crawler_manager.last_stats
+        self.stdout.write(self.style.SUCCESS(
+            f"爬取完成，成功保存 {saved_count} 条职位信息"
+            f"（新增 {stats['inserted']} 条，更新 {stats['updated']} 条，未变化 {stats['skipped']} 条）"
+        ))
+        
+        if stats.get('delisted'):
+            self.stdout.write(f"已下架职位 {stats['delisted']} 条，已标记为不在招")
+        
+        if run_state and run_state.run.status != CrawlRun.STATUS_COMPLETED:
+            self.stdout.write(self.style.WARNING(
+                f"批次 {run_state.run.pk} 仍有页面未完成，可使用 --resume {run_state.run.pk} 续爬"
+            ))
+        
+        if stats.get('failed_shards'):
+            self.stdout.write(self.style.ERROR(f"有 {stats['failed_shards']} 个分片爬取失败，详见日志"))
+        
+        self.write_metrics(crawler_manager.telemetry, options['metrics_file'])
+    
+    def write_metrics(self, telemetry, metrics_file):
+        """输出指标汇总，指定文件时同时写入JSON"""
+        self.stdout.write('爬取指标:')
+        for line in telemetry.report_lines():
+            self.stdout.write(f'  {line}')
+        if metrics_file:
+            telemetry.dump(metrics_file)
+            self.stdout.write(f'指标已写入 {metrics_file}')
@@ -0,0 +1,137 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from job_analysis.crawler.crawler_manager import CrawlerManager
+from job_analysis.crawler.job_crawler import DEFAULT_SCHOOL_ID, DEFAULT_SCHOOL_CODE
+from job_analysis.crawler.matrix import CrawlTarget
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = '在全局并发上限下同时爬取多个学校、多种职位类型的职位信息'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--school',
+            action='append',
+            default=None,
+            metavar='SCHOOL_ID:SCHOOL_CODE',
+            help='要爬取的学校，可重复指定，默认为成都大学'
+        )
+        parser.add_argument(
+            '--types',
+            default='1,2,3',
+            help='要爬取的职位类型，逗号分隔 (1=全职, 2=实习, 3=兼职)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=10,
+            help='每个目标的最大爬取页数'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='全局最大在途请求数'
+        )
+        parser.add_argument(
+            '--per-target',
+            type=int,
+            default=None,
+            help='单个目标的最大在途请求数，默认平均分配全局并发'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=10,
+            help='单个请求超时时间（秒）'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help='列表接口地址，默认为就业网接口，可指向本地替身服务（结果保存在单独的数据源jiuyeb-standin下）'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='工作进程数，大于1时把目标分配到多个进程并行爬取，全局并发按进程数平分'
+        )
+        parser.add_argument(
+            '--metrics-file',
+            default=None,
+            help='把爬取指标（延迟直方图、吞吐量、队列深度等）以JSON格式写入该文件'
+        )
+
+    def parse_targets(self, options):
+        """由学校列表和职位类型列表组合出爬取目标"""
+        schools = []
+        for value in options['school'] or [f'{DEFAULT_SCHOOL_ID}:{DEFAULT_SCHOOL_CODE}']:
+            school_id, sep, school_code = value.rpartition(':')
+            if not sep or not school_id or not school_code:
+                raise CommandError(f'学校格式应为 SCHOOL_ID:SCHOOL_CODE，实际为: {value}')
+            schools.append((school_id, school_code))
+
+        try:
+            job_types = [int(job_type) for job_type in options['types'].split(',') if job_type.strip()]
+        except ValueError:
+            raise CommandError(f"职位类型格式错误: {options['types']}")
+
+        return [
+            CrawlTarget(school_id, school_code, job_type)
+            for school_id, school_code in schools
+            for job_type in job_types
+        ]
+
+    def handle(self, *args, **options):
+        targets = self.parse_targets(options)
+        if not targets:
+            raise CommandError('没有需要爬取的目标')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"开始矩阵爬取，共 {len(targets)} 个目标，全局并发: {options['concurrency']}，"
+            f"每个目标最大页数: {options['pages']}"
+        ))
+
+        crawler_manager = CrawlerManager(
+            max_workers=options['concurrency'],
+            timeout=options['timeout'],
+            base_url=options['base_url']
+        )
+        if options['processes'] > 1:
+            target_stats = crawler_manager.crawl_matrix_sharded(
+                targets,
+                max_pages=options['pages'],
+                processes=options['processes'],
+                per_target=options['per_target']
+            )
+        else:
+            target_stats = crawler_manager.crawl_matrix(
+                targets,
+                max_pages=options['pages'],
+                per_target=options['per_target']
+            )
+
+        self.stdout.write(f"{'目标':<16}{'页数':>8}{'职位数':>8}{'失败':>6}")
+        for target, stats in target_stats.items():
+            self.stdout.write(f"{str(target):<16}{stats['pages']:>8}{stats['rows']:>8}{stats['errors']:>6}")
+
+        stats = crawler_manager.last_stats
+        self.stdout.write(self.style.SUCCESS(
+            f"矩阵爬取完成，共爬取 {stats['pages']} 页，"
+            f"新增 {stats['inserted']} 条，更新 {stats['updated']} 条，未变化 {stats['skipped']} 条"
+        ))
+
+        if stats.get('failed_shards'):
+            self.stdout.write(self.style.ERROR(f"有 {stats['failed_shards']} 个分片爬取失败，详见日志"))
+
+        self.write_metrics(crawler_manager.telemetry, options['metrics_file'])
+
+    def write_metrics(self, telemetry, metrics_file):
+        """输出指标汇总，指定文件时同时写入JSON"""
+        self.stdout.write('爬取指标:')
+        for line in telemetry.report_lines():
+            self.stdout.write(f'  {line}')
+        if metrics_file:
+            telemetry.dump(metrics_file)
+            self.stdout.write(f'指标已写入 {metrics_file}')
@@ -0,0 +1,41 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from job_analysis.utils.snapshot import JobSnapshot, export_snapshot
+
+class Command(BaseCommand):
+    help = '把在招职位导出为内存映射的列式快照，供向量化分析使用'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            default=None,
+            help='快照根目录，默认取settings.JOB_SNAPSHOT_DIR'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='从数据库流式读取的批大小'
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=2,
+            help='保留的快照目录数'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path, count = export_snapshot(options['path'], chunk_size=max(options['chunk_size'], 1), keep=options['keep'])
+        elapsed = time.perf_counter() - started
+
+        size = sum(entry.stat().st_size for entry in os.scandir(path))
+        snapshot = JobSnapshot(path)
+        self.stdout.write(f'快照目录: {path}')
+        self.stdout.write(
+            '分类取值数: ' + '，'.join(f'{column} {len(labels)}' for column, labels in snapshot.labels.items())
+            + f'，标签 {len(snapshot.tags)}'
+        )
+        self.stdout.write(self.style.SUCCESS(f'快照导出完成，共 {count} 个职位，{size / 1024:.1f}KB，耗时 {elapsed:.2f}秒'))
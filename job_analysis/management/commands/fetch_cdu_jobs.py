@@ -1,12 +1,19 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from job_analysis.models import Company, Job
-from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from job_analysis.models import Company, Job, JobAggregate, SalaryMonthlyRollup, CrawlCheckpoint, CrawlRun
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import random
 import time
 import concurrent.futures
+from job_analysis.crawler.rate_limiter import get_rate_limiter, post_with_retries
+from job_analysis.crawler.incremental import IncrementalTracker
+from job_analysis.crawler.job_crawler import (
+    SOURCE_URL_TEMPLATE, DEFAULT_BASE_URL, DEFAULT_SCHOOL_ID, DEFAULT_SCHOOL_CODE, source_for_base_url
+)
+from job_analysis.crawler.bulk_writer import BulkJobWriter
+from job_analysis.crawler.extractor import JobExtractor
+from job_analysis.crawler.run_state import CrawlRunState
 
 class Command(BaseCommand):
     help = '从成都大学就业网抓取招聘数据'
@@ -36,6 +43,24 @@ class Command(BaseCommand):
             default=False,
             help='是否清空现有数据'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=False,
+            help='增量爬取，遇到全部为已知职位的页面即停止翻页'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=DEFAULT_BASE_URL,
+            help='列表接口地址，默认为就业网接口，可指向本地替身服务（结果保存在单独的数据源jiuyeb-standin下）'
+        )
+        parser.add_argument(
+            '--resume',
+            type=int,
+            default=None,
+            metavar='RUN_ID',
+            help='续爬指定批次，只爬取该批次中尚未完成的页面'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('开始抓取招聘数据...')
@@ -45,92 +70,209 @@ class Command(BaseCommand):
         max_workers = options['workers']
         job_type = options['type']
         clear_data = options['clear']
+        self.base_url = options['base_url']
+        # 替身服务的爬取结果使用单独的数据源，不会覆盖真实职位
+        self.source = source_for_base_url(self.base_url)
+        if options['incremental'] and options['resume']:
+            raise CommandError('--resume 不能与 --incremental 同时使用')
+        
+        # 所有页面共用一个带连接池的会话，复用长连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # 清空现有数据
         if clear_data:
             self.stdout.write('清空现有数据...')
             Job.objects.all().delete()
             Company.objects.all().delete()
+            JobAggregate.objects.all().delete()
+            SalaryMonthlyRollup.objects.all().delete()
+            CrawlCheckpoint.objects.filter(source=self.source).delete()
+        
+        # 按内容指纹批量写入，未变化的职位不产生写操作
+        self.extractor = JobExtractor(SOURCE_URL_TEMPLATE)
+        self.writer = BulkJobWriter(source=self.source)
+        self.write_stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        self.listing_type = job_type
+        
+        # 增量模式：记录见过的职位，有检查点时逐页爬取直到遇到全部已知的页面
+        self.tracker = None
+        self.run_state = None
+        if options['incremental']:
+            self.tracker = IncrementalTracker(self.source, job_type)
+            if self.tracker.has_checkpoint:
+                total_jobs = self.crawl_incremental(job_type, max_pages)
+                self.tracker.save()
+                self.stdout.write(self.style.SUCCESS(f'增量抓取完成! 共获取{total_jobs}个新职位'))
+                self.write_summary()
+                return
+        
+        # 全量爬取记录逐页状态，中断后可使用--resume只补爬未完成的页面
+        if options['resume']:
+            try:
+                self.run_state = CrawlRunState.load(options['resume'], command='fetch_cdu_jobs')
+            except CrawlRun.DoesNotExist:
+                raise CommandError(f"爬取批次 {options['resume']} 不存在或不是由 fetch_cdu_jobs 发起")
+            job_type = self.run_state.run.job_type
+            self.listing_type = job_type
+            max_pages = self.run_state.run.params.get('max_pages', max_pages)
+        else:
+            self.run_state = CrawlRunState.create(
+                self.source, 'fetch_cdu_jobs', job_type, params={'max_pages': max_pages}
+            )
+        self.stdout.write(f'爬取批次ID: {self.run_state.run.pk}')
         
         self.stdout.write(self.style.SUCCESS(f"开始爬取职位信息，类型: {job_type}，最大页数: {max_pages}，并发线程数: {max_workers}"))
         
+        if self.run_state.is_planned:
+            # 续爬：只爬取上次未完成的页面
+            pending_pages = self.run_state.pending_pages()
+            self.stdout.write(f'续爬批次 {self.run_state.run.pk}，剩余{len(pending_pages)}页')
+            total_jobs = self.crawl_pages(pending_pages, job_type, max_workers)
+            self.finish_crawl(total_jobs)
+            return
+        
         # 获取第一页数据，确定总页数
         self.stdout.write('获取第1页数据以确定总页数...')
         first_page_data = self.fetch_jobs_data(1, job_type)
         
         if not first_page_data:
             self.stdout.write(self.style.ERROR('获取第1页数据失败，停止爬取'))
+            self.run_state.record_failure(1, '获取第1页数据失败')
+            self.finish_crawl(0)
             return
         
+        # 如果返回的数据不足一页，说明已到达最后一页；否则限制最大页数为20，避免过度爬取
+        if len(first_page_data) < 20:
+            total_pages = 1
+        else:
+            total_pages = max(min(max_pages, 20), 1)
+        self.run_state.plan(total_pages)
+        
         # 处理第一页数据
         first_page_count = self.process_jobs_data(first_page_data)
+        self.run_state.mark_saved([(1, first_page_count)])
         self.stdout.write(f'已处理第1页数据，获取{first_page_count}个职位')
         
         total_jobs = first_page_count
         
-        # 确定实际需要爬取的页数
-        # 如果返回的数据不足一页，说明已到达最后一页
-        if first_page_count < 20:
+        if total_pages == 1:
             self.stdout.write('数据不足一页，结束爬取')
-            self.stdout.write(self.style.SUCCESS(f'数据抓取完成! 共获取{total_jobs}个职位'))
-            return
+        else:
+            # 并发爬取剩余页面（从第2页开始）
+            total_jobs += self.crawl_pages(range(2, total_pages + 1), job_type, max_workers)
         
-        # 并发爬取剩余页面（从第2页开始）
-        remaining_pages = min(max_pages, 20) - 1  # 限制最大页数为20，避免过度爬取
-        if remaining_pages > 0:
-            self.stdout.write(f'开始并发爬取剩余{remaining_pages}页数据...')
-            
-            failed_pages = []  # 记录失败的页码
+        self.finish_crawl(total_jobs)
+    
+    def finish_crawl(self, total_jobs):
+        """保存检查点和批次状态并输出统计"""
+        if self.tracker:
+            self.tracker.save()
+        remaining = self.run_state.finish() if self.run_state else []
+        self.stdout.write(self.style.SUCCESS(f'数据抓取完成! 共获取{total_jobs}个职位'))
+        self.write_summary()
+        if remaining:
+            self.stdout.write(self.style.WARNING(
+                f'有{len(remaining)}页未完成，可使用 --resume {self.run_state.run.pk} 续爬'
+            ))
+    
+    def crawl_pages(self, pages, job_type, max_workers):
+        """并发爬取指定页面，失败的页面串行重试一次
+        
+        Returns:
+            int: 获取的职位数量
+        """
+        pages = list(pages)
+        if not pages:
+            return 0
+        
+        total_jobs = 0
+        self.stdout.write(f'开始并发爬取{len(pages)}页数据...')
+        
+        failed_pages = []  # 记录失败的页码
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 创建爬取任务
+            future_to_page = {
+                executor.submit(self.fetch_jobs_data, page, job_type): page 
+                for page in pages
+            }
             
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 创建爬取任务
-                future_to_page = {
-                    executor.submit(self.fetch_jobs_data, page, job_type): page 
-                    for page in range(2, remaining_pages + 2)
-                }
-                
-                # 处理爬取结果
-                for future in concurrent.futures.as_completed(future_to_page):
-                    page = future_to_page[future]
-                    try:
-                        jobs_data = future.result()
-                        if jobs_data:
-                            # 并发处理每页的职位数据
-                            jobs_count = self.process_jobs_data(jobs_data)
-                            total_jobs += jobs_count
-                            self.stdout.write(f'已处理第{page}页数据，获取{jobs_count}个职位')
-                            
-                            # 如果返回的数据不足一页，可能已到达最后页
-                            if jobs_count < 20:
-                                self.stdout.write(f'第{page}页数据不足一页，可能已到达最后页')
-                        else:
-                            self.stdout.write(self.style.WARNING(f'第{page}页数据获取失败'))
-                            failed_pages.append(page)
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f'处理第{page}页时出错: {str(e)}'))
+            # 处理爬取结果
+            for future in concurrent.futures.as_completed(future_to_page):
+                page = future_to_page[future]
+                try:
+                    jobs_data = future.result()
+                    if jobs_data:
+                        # 并发处理每页的职位数据
+                        jobs_count = self.process_jobs_data(jobs_data)
+                        self.run_state.mark_saved([(page, jobs_count)])
+                        total_jobs += jobs_count
+                        self.stdout.write(f'已处理第{page}页数据，获取{jobs_count}个职位')
+                        
+                        # 如果返回的数据不足一页，可能已到达最后页
+                        if jobs_count < 20:
+                            self.stdout.write(f'第{page}页数据不足一页，可能已到达最后页')
+                    else:
+                        self.stdout.write(self.style.WARNING(f'第{page}页数据获取失败'))
                         failed_pages.append(page)
-            
-            # 如果有失败的页面，尝试串行重试一次
-            if failed_pages:
-                self.stdout.write(f'有 {len(failed_pages)} 个页面爬取失败，尝试重新爬取...')
-                for page in failed_pages:
-                    try:
-                        self.stdout.write(f'重新爬取第 {page} 页...')
-                        retry_jobs_data = self.fetch_jobs_data(page, job_type)
-                        if retry_jobs_data:
-                            retry_count = self.process_jobs_data(retry_jobs_data)
-                            total_jobs += retry_count
-                            self.stdout.write(f'重试成功：第{page}页获取{retry_count}个职位')
-                        else:
-                            self.stdout.write(self.style.WARNING(f'重试失败：第{page}页仍无法获取数据'))
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f'重试第{page}页时出错: {str(e)}'))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'处理第{page}页时出错: {str(e)}'))
+                    failed_pages.append(page)
         
-        self.stdout.write(self.style.SUCCESS(f'数据抓取完成! 共获取{total_jobs}个职位'))
+        # 如果有失败的页面，尝试串行重试一次，仍失败的页面记录到批次中供续爬
+        if failed_pages:
+            self.stdout.write(f'有 {len(failed_pages)} 个页面爬取失败，尝试重新爬取...')
+            for page in failed_pages:
+                try:
+                    self.stdout.write(f'重新爬取第 {page} 页...')
+                    retry_jobs_data = self.fetch_jobs_data(page, job_type)
+                    if retry_jobs_data:
+                        retry_count = self.process_jobs_data(retry_jobs_data)
+                        self.run_state.mark_saved([(page, retry_count)])
+                        total_jobs += retry_count
+                        self.stdout.write(f'重试成功：第{page}页获取{retry_count}个职位')
+                    else:
+                        self.stdout.write(self.style.WARNING(f'重试失败：第{page}页仍无法获取数据'))
+                        self.run_state.record_failure(page, '重试后仍无法获取数据')
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'重试第{page}页时出错: {str(e)}'))
+                    self.run_state.record_failure(page, e)
+        return total_jobs
+    
+    def write_summary(self):
+        """输出写库统计"""
+        self.stdout.write(
+            f"新增 {self.write_stats['inserted']} 个，更新 {self.write_stats['updated']} 个，"
+            f"未变化跳过 {self.write_stats['skipped']} 个"
+        )
+    
+    def crawl_incremental(self, job_type, max_pages):
+        """逐页爬取新职位，某一页全部为已知职位时停止"""
+        total_jobs = 0
+        for page in range(1, max_pages + 1):
+            jobs_data = self.fetch_jobs_data(page, job_type)
+            if not jobs_data:
+                break
+            
+            new_jobs_data = self.tracker.filter_new(jobs_data)
+            if not new_jobs_data:
+                self.stdout.write(f'第{page}页全部为已知职位，停止翻页')
+                break
+            
+            jobs_count = self.process_jobs_data(new_jobs_data)
+            total_jobs += jobs_count
+            self.stdout.write(f'已处理第{page}页数据，获取{jobs_count}个新职位')
+            
+            if len(jobs_data) < 20:
+                break
+        return total_jobs
     
     def fetch_jobs_data(self, page, job_type=1):
         """从成都大学就业网获取招聘数据"""
-        url = 'https://a.jiuyeb.cn/mobile.php/job/getlist'
+        url = self.base_url
         
         headers = {
             'accept': 'application/json, text/javascript, */*; q=0.01',
@@ -153,7 +295,7 @@ class Command(BaseCommand):
         data = {
             'jobtype': str(job_type),
             'isunion': '2',
-            'school_id': '92727a49-c69a-6814-7231-a90bbbe287a7',
+            'school_id': DEFAULT_SCHOOL_ID,
             'page': str(page),
             'size': '20',
             'province_id': '0',
@@ -164,18 +306,23 @@ class Command(BaseCommand):
             'salay_ceil': '',
             'day': '0',
             'login_user_id': '1',
-            'login_admin_school_code': '11079',
-            'login_admin_school_id': '92727a49-c69a-6814-7231-a90bbbe287a7'
+            'login_admin_school_code': DEFAULT_SCHOOL_CODE,
+            'login_admin_school_id': DEFAULT_SCHOOL_ID
         }
         
         self.stdout.write(f"正在爬取第 {page} 页数据...")
         try:
-            response = requests.post(url, headers=headers, data=data, timeout=10)
+            # 由共享的自适应限速器控制请求速率，429/5xx和网络错误自动退避重试
+            response = post_with_retries(
+                self.session,
+                url,
+                get_rate_limiter(url),
+                headers=headers,
+                data=data,
+                timeout=10
+            )
             response.raise_for_status()  # 如果状态码不是200，引发异常
             
-            # 避免请求过快
-            time.sleep(0.5)
-            
             result = response.json()
             
             # 输出更详细的调试信息
@@ -214,181 +361,22 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'请求第 {page} 页数据失败: {str(e)}'))
             return None
     
-    @transaction.atomic
     def process_jobs_data(self, jobs_data):
-        """处理招聘数据并保存到数据库"""
-        count = 0
+        """处理招聘数据并批量保存到数据库
         
-        for job_data in jobs_data:
-            try:
-                # 提取公司和职位信息
-                company_name = job_data.get('com_id_name', '')
-                if not company_name:
-                    continue
-                
-                # 提取行业信息
-                industry = job_data.get('industry_id_name', '')
-                
-                # 查找或创建公司
-                company, created = Company.objects.get_or_create(
-                    name=company_name,
-                    defaults={'industry': industry}
-                )
-                
-                # 提取职位基本信息
-                title = job_data.get('work_name', '')
-                if not title:
-                    continue
-                
-                # 提取职位类型
-                job_type = job_data.get('cate_id1_name', '') or job_data.get('dalei_id_name', '')
-                
-                # 提取发布日期
-                # 优先使用examine_time时间戳
-                publish_date = None
-                if job_data.get('examine_time'):
-                    try:
-                        # 将时间戳转换为日期
-                        timestamp = int(job_data.get('examine_time'))
-                        publish_date = datetime.fromtimestamp(timestamp).date()
-                    except Exception as e:
-                        pass
-                
-                # 如果examine_time解析失败，尝试使用addtime1
-                if not publish_date and job_data.get('addtime1'):
-                    try:
-                        publish_date = datetime.strptime(job_data.get('addtime1'), '%Y-%m-%d').date()
-                    except Exception as e:
-                        pass
-                
-                # 如果还是失败，尝试使用addtime时间戳
-                if not publish_date and job_data.get('addtime'):
-                    try:
-                        timestamp = int(job_data.get('addtime'))
-                        publish_date = datetime.fromtimestamp(timestamp).date()
-                    except Exception as e:
-                        pass
-                
-                # 提取薪资信息
-                salary_min = None
-                salary_max = None
-                
-                # 优先使用API返回的薪资范围
-                if job_data.get('salary_floor') is not None:
-                    try:
-                        salary_min = int(job_data.get('salary_floor'))
-                    except:
-                        pass
-                
-                if job_data.get('salay_ceil') is not None:
-                    try:
-                        salary_max = int(job_data.get('salay_ceil'))
-                    except:
-                        pass
-                
-                # 如果API返回的薪资无效，尝试解析薪资文本
-                if (salary_min is None or salary_max is None) and job_data.get('xinzi'):
-                    salary_text = job_data.get('xinzi', '')
-                    parsed_min, parsed_max = self.parse_salary(salary_text)
-                    
-                    if salary_min is None:
-                        salary_min = parsed_min
-                    
-                    if salary_max is None:
-                        salary_max = parsed_max
-                
-                # 提取地区信息
-                province = job_data.get('province_id_name', '')
-                city = job_data.get('city_id_name', '')
-                
-                # 构建描述和要求
-                description = f"职位名称：{title}\n"
-                description += f"公司名称：{company_name}\n"
-                if job_data.get('workplace', ''):
-                    description += f"工作地点：{job_data.get('workplace', '')}\n"
-                if job_data.get('xueli_id_name', ''):
-                    description += f"学历要求：{job_data.get('xueli_id_name', '')}\n"
-                if job_data.get('person_count', ''):
-                    description += f"招聘人数：{job_data.get('person_count', '')}\n"
-                if job_data.get('zhuanye', ''):
-                    description += f"专业要求：{job_data.get('zhuanye', '')}\n"
-                
-                requirement = "岗位职责与要求：\n"
-                if job_data.get('content', ''):
-                    requirement += job_data.get('content', '')
-                
-                # 源链接
-                source_url = f"https://jy.cdu.edu.cn/Zhaopin/zhiweiDetail.html?id={job_data.get('id', '')}"
-                
-                # 提取福利标签
-                tags = []
-                
-                # 从tagsList字段获取福利标签
-                tag_list = job_data.get('tagsList', [])
-                if tag_list and isinstance(tag_list, list):
-                    for tag_item in tag_list:
-                        if isinstance(tag_item, dict) and 'title' in tag_item:
-                            tags.append(tag_item['title'])
-                
-                # 创建职位
-                Job.objects.create(
-                    title=title,
-                    company=company,
-                    job_type=job_type,
-                    salary_min=salary_min,
-                    salary_max=salary_max,
-                    province=province,
-                    city=city,
-                    description=description,
-                    requirement=requirement,
-                    publish_date=publish_date,
-                    source_url=source_url,
-                    tags=tags
-                )
-                
-                count += 1
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f'处理职位数据失败: {str(e)}'))
-                continue
+        Returns:
+            int: 本页有效职位数量（含内容未变化而跳过写入的职位）
+        """
+        # 首次增量运行走全量流程，在此记录见过的职位供下次使用（有检查点时由filter_new记录）
+        if self.tracker and not self.tracker.has_checkpoint:
+            self.tracker.observe(jobs_data)
         
-        return count
-    
-    def parse_salary(self, salary_text):
-        """解析薪资文本，返回最低和最高薪资"""
-        if not salary_text or salary_text == '面议':
-            return None, None
+        # 与JobCrawler共用同一个提取器，缺少公司或职位名称的数据会被丢弃
+        records = self.extractor.extract_page(jobs_data, self.listing_type)
         
-        try:
-            # 处理"3000-5000"这样的格式
-            if '-' in salary_text:
-                parts = salary_text.replace('元/月', '').replace('/月', '').split('-')
-                min_salary = self.convert_to_int(parts[0])
-                max_salary = self.convert_to_int(parts[1])
-                return min_salary, max_salary
-            
-            # 处理"3000以上"这样的格式
-            if '以上' in salary_text:
-                min_salary = self.convert_to_int(salary_text.replace('以上', '').replace('元/月', '').replace('/月', ''))
-                max_salary = min_salary * 1.5  # 估算一个最高值
-                return min_salary, max_salary
-            
-            # 处理"3000以下"这样的格式
-            if '以下' in salary_text:
-                max_salary = self.convert_to_int(salary_text.replace('以下', '').replace('元/月', '').replace('/月', ''))
-                min_salary = max_salary * 0.7  # 估算一个最低值
-                return min_salary, max_salary
-            
-            # 处理单个数值
-            salary = self.convert_to_int(salary_text.replace('元/月', '').replace('/月', ''))
-            return salary, salary
-        except:
-            return None, None
-    
-    def convert_to_int(self, text):
-        """将薪资文本转换为整数"""
-        # 处理'3k'这样的格式
-        if 'k' in text.lower() or 'K' in text:
-            return int(float(text.lower().replace('k', '')) * 1000)
+        # 同一页的职位一次性写入，按内容指纹跳过未变化的职位
+        stats = self.writer.write(records)
+        for key in self.write_stats:
+            self.write_stats[key] += stats[key]
         
-        # 处理普通数字
-        return int(float(text)) 
\ No newline at end of file
+        return len(records)
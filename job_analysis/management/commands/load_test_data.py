@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
 from job_analysis.models import Company, Job
+from job_analysis.utils.education import normalize_education
+from job_analysis.utils.job_aggregates import rebuild_aggregates
+from job_analysis.utils.salary_rollup import rebuild_salary_rollups
 from datetime import date, timedelta
 import random
 
@@ -87,6 +90,9 @@ class Command(BaseCommand):
             tag_count = random.randint(2, 5)
             job_benefits = random.sample(benefits, tag_count)
             
+            description = f"这是一个{job_type}职位的描述。我们正在寻找有经验的{job_type}人才加入我们的团队。"
+            requirement = f"【岗位要求】\n1. 相关专业本科及以上学历\n2. 具有2年以上{job_type}相关经验\n3. 良好的沟通能力和团队协作精神"
+            
             # 创建职位
             job = Job.objects.create(
                 title=f"{job_type}工程师" if "开发" in job_type else job_type,
@@ -96,8 +102,9 @@ class Command(BaseCommand):
                 salary_max=salary_max,
                 province=province,
                 city=city,
-                description=f"这是一个{job_type}职位的描述。我们正在寻找有经验的{job_type}人才加入我们的团队。",
-                requirement=f"【岗位要求】\n1. 相关专业本科及以上学历\n2. 具有2年以上{job_type}相关经验\n3. 良好的沟通能力和团队协作精神",
+                description=description,
+                requirement=requirement,
+                education_level=normalize_education(None, description, requirement),
                 publish_date=publish_date,
                 source_url=f"https://example.com/jobs/{i+1}",
                 tags=job_benefits
@@ -105,4 +112,7 @@ class Command(BaseCommand):
             
             self.stdout.write(f'创建职位: {job.title} - {job.company.name}')
         
+        # 测试数据直接通过ORM创建，不经过入库时的增量维护，导入后重建聚合计数和月度薪资汇总
+        rebuild_aggregates()
+        rebuild_salary_rollups()
         self.stdout.write(self.style.SUCCESS('数据导入完成!')) 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from job_analysis.crawler.job_crawler import JobCrawler
+from job_analysis.crawler.replay import FixtureStore
+
+class Command(BaseCommand):
+    help = '录制职位列表接口的原始响应，供本地替身服务回放'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='fixtures/jiuyeb',
+            help='录制数据保存目录'
+        )
+        parser.add_argument(
+            '--type',
+            type=int,
+            default=1,
+            help='职位类型 (1=全职, 2=实习, 3=兼职)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=10,
+            help='最大录制页数'
+        )
+
+    def handle(self, *args, **options):
+        store = FixtureStore(options['output'])
+        crawler = JobCrawler(max_workers=1)
+        job_type = options['type']
+        
+        recorded = 0
+        for page in range(1, options['pages'] + 1):
+            result = crawler.fetch_jobs(page=page, job_type=job_type)
+            jobs = result.get('data', {}).get('list', [])
+            if result.get('code') != 200 or not jobs:
+                self.stdout.write(self.style.WARNING(f'第{page}页没有数据，停止录制'))
+                break
+            
+            store.save(job_type, page, result)
+            recorded += 1
+            self.stdout.write(f'已录制第{page}页，{len(jobs)}个职位')
+        
+        self.stdout.write(self.style.SUCCESS(f'录制完成，共{recorded}页，保存在 {options["output"]}'))
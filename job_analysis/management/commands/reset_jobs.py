@@ -1,18 +1,42 @@
 from django.core.management.base import BaseCommand
-from job_analysis.models import Job
+from django.db import transaction
+from job_analysis.models import CrawlCheckpoint, Job, JobAggregate, SalaryMonthlyRollup
+from job_analysis.utils.job_aggregates import rebuild_aggregates
+from job_analysis.utils.salary_rollup import rebuild_salary_rollups
 
 class Command(BaseCommand):
     help = '删除所有职位数据'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=None,
+            help='只删除指定数据源的职位（如替身服务的jiuyeb-standin），并按剩余职位重建聚合计数和月度薪资汇总'
+        )
+
     def handle(self, *args, **options):
+        source = options['source']
+        if source:
+            with transaction.atomic():
+                deleted = Job.objects.filter(source=source).delete()[1].get(Job._meta.label, 0)
+                CrawlCheckpoint.objects.filter(source=source).delete()
+                rebuild_aggregates()
+                rebuild_salary_rollups()
+            self.stdout.write(self.style.SUCCESS(
+                f'已删除数据源 {source} 的 {deleted} 个职位，当前数据库中有 {Job.objects.count()} 个职位'
+            ))
+            return
+
         # 获取当前职位数量
         job_count = Job.objects.count()
         self.stdout.write(f'当前数据库中有 {job_count} 个职位')
         
         # 删除所有职位
         Job.objects.all().delete()
+        JobAggregate.objects.all().delete()
+        SalaryMonthlyRollup.objects.all().delete()
         
         # 确认删除成功
         new_count = Job.objects.count()
         self.stdout.write(self.style.SUCCESS(f'成功删除所有职位数据，当前数据库中有 {new_count} 个职位'))
-        self.stdout.write(self.style.SUCCESS('请使用 load_test_data 或其他爬虫命令重新添加职位数据')) 
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('请使用 load_test_data 或其他爬虫命令重新添加职位数据'))
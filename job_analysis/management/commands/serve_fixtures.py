@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from job_analysis.crawler.job_crawler import SOURCE_STAND_IN
+from job_analysis.crawler.replay import StandInServer
+
+class Command(BaseCommand):
+    help = '启动本地职位列表接口替身服务，回放录制数据或返回模拟数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+        parser.add_argument('--port', type=int, default=8765, help='监听端口')
+        parser.add_argument('--fixtures', default=None, help='录制数据目录，不指定则返回模拟数据')
+        parser.add_argument('--latency', type=float, default=0.05, help='平均响应延迟（秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的概率')
+        parser.add_argument('--page-count', type=int, default=50, help='对外声明的总页数')
+
+    def handle(self, *args, **options):
+        server = StandInServer(
+            host=options['host'],
+            port=options['port'],
+            fixtures=options['fixtures'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            page_count=options['page_count']
+        )
+        self.stdout.write(self.style.SUCCESS(f'替身服务已启动: {server.base_url}'))
+        self.stdout.write('使用 --base-url 参数让 crawl_jobs / fetch_cdu_jobs 请求该地址，按 Ctrl+C 停止')
+        self.stdout.write(f'爬取结果保存在数据源 {SOURCE_STAND_IN} 下，可用 reset_jobs --source {SOURCE_STAND_IN} 删除')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-17 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0002_job_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, verbose_name='数据源')),
+                ('job_type', models.IntegerField(verbose_name='职位类型')),
+                ('max_examine_time', models.BigIntegerField(blank=True, null=True, verbose_name='最大审核时间戳')),
+                ('seen_ids', models.JSONField(blank=True, default=list, verbose_name='最近见过的职位ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '爬取检查点',
+                'verbose_name_plural': '爬取检查点',
+                'unique_together': {('source', 'job_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0003_crawlcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=40, null=True, verbose_name='内容指纹'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0004_job_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '运行中'), ('success', '成功'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='爬取参数')),
+                ('pages_fetched', models.IntegerField(default=0, verbose_name='已爬取页数')),
+                ('rows_saved', models.IntegerField(default=0, verbose_name='已保存职位数')),
+                ('rows_skipped', models.IntegerField(default=0, verbose_name='未变化跳过数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+            ],
+            options={
+                'verbose_name': '爬取任务',
+                'verbose_name_plural': '爬取任务',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
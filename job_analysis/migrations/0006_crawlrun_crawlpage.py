@@ -0,0 +1,51 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0005_crawltask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, verbose_name='数据源')),
+                ('command', models.CharField(max_length=50, verbose_name='发起命令')),
+                ('job_type', models.IntegerField(verbose_name='职位类型')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='爬取参数')),
+                ('total_pages', models.IntegerField(blank=True, null=True, verbose_name='计划页数')),
+                ('status', models.CharField(choices=[('running', '运行中'), ('completed', '已完成'), ('failed', '未完成')], default='running', max_length=20, verbose_name='状态')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+            ],
+            options={
+                'verbose_name': '爬取批次',
+                'verbose_name_plural': '爬取批次',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CrawlPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.IntegerField(verbose_name='页码')),
+                ('status', models.CharField(choices=[('pending', '待爬取'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.IntegerField(default=0, verbose_name='尝试次数')),
+                ('rows', models.IntegerField(default=0, verbose_name='职位数')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='job_analysis.crawlrun', verbose_name='爬取批次')),
+            ],
+            options={
+                'verbose_name': '爬取页面',
+                'verbose_name_plural': '爬取页面',
+                'unique_together': {('run', 'page')},
+            },
+        ),
+    ]
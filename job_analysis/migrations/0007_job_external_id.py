@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0006_crawlrun_crawlpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='来源职位ID'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='source',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='数据源'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+import re
+from django.db import migrations
+
+# 回填时使用的数据源标识和统一后的来源链接模板，与crawler.job_crawler保持一致
+SOURCE_JIUYEB = 'jiuyeb'
+SOURCE_URL_TEMPLATE = 'https://jy.cdu.edu.cn/Zhaopin/zhiweiDetail.html?id={id}'
+
+# 两种历史链接格式：zhiweidetail.html?id=...&jobtype=1 和 zhiweiDetail.html?id=...
+SOURCE_URL_RE = re.compile(r'jy\.cdu\.edu\.cn/Zhaopin/zhiweidetail\.html\?id=([^&#]+)', re.IGNORECASE)
+
+
+def backfill_external_id(apps, schema_editor):
+    """从来源链接中解析职位ID，统一链接格式，并删除同一职位的重复记录
+
+    同一职位保留最近更新的一条，其余删除，之后才能加唯一约束。
+    """
+    Job = apps.get_model('job_analysis', 'Job')
+
+    keep = {}
+    duplicates = []
+    updates = []
+    rows = (
+        Job.objects.filter(external_id__isnull=True, source_url__isnull=False)
+        .order_by('-updated_at', '-id')
+        .values_list('id', 'source_url')
+        .iterator(chunk_size=2000)
+    )
+    for job_id, source_url in rows:
+        match = SOURCE_URL_RE.search(source_url)
+        if not match:
+            continue
+        external_id = match.group(1)
+        if external_id in keep:
+            duplicates.append(job_id)
+            continue
+        keep[external_id] = job_id
+        updates.append(Job(
+            id=job_id,
+            source=SOURCE_JIUYEB,
+            external_id=external_id,
+            source_url=SOURCE_URL_TEMPLATE.format(id=external_id),
+        ))
+
+    for start in range(0, len(duplicates), 1000):
+        Job.objects.filter(id__in=duplicates[start:start + 1000]).delete()
+    Job.objects.bulk_update(updates, ['source', 'external_id', 'source_url'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0007_job_external_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_external_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0008_backfill_job_external_id'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(fields=('source', 'external_id'), name='unique_job_source_external_id'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0009_job_unique_job_source_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='delisted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='下架时间'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, verbose_name='是否在招'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='listing_type',
+            field=models.IntegerField(blank=True, null=True, verbose_name='列表类型'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['source', 'listing_type', 'is_active'], name='job_listing_active_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0010_job_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='education_level',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True, verbose_name='学历要求'),
+        ),
+    ]
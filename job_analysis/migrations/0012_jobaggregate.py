@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0011_job_education_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=30, verbose_name='维度')),
+                ('parent', models.CharField(blank=True, default='', max_length=100, verbose_name='上级取值')),
+                ('key', models.CharField(max_length=200, verbose_name='取值')),
+                ('job_count', models.IntegerField(default=0, verbose_name='职位数')),
+                ('salary_count', models.IntegerField(default=0, verbose_name='有薪资的职位数')),
+                ('salary_total', models.BigIntegerField(default=0, verbose_name='薪资累计')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '职位聚合计数',
+                'verbose_name_plural': '职位聚合计数',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobaggregate',
+            constraint=models.UniqueConstraint(fields=('dimension', 'parent', 'key'), name='unique_job_aggregate_key'),
+        ),
+    ]
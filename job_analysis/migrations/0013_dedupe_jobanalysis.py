@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def dedupe_analysis_type(apps, schema_editor):
+    """每种分析类型只保留最新的一条结果，之后才能加唯一约束"""
+    JobAnalysis = apps.get_model('job_analysis', 'JobAnalysis')
+
+    keep = set()
+    duplicates = []
+    for analysis_id, analysis_type in JobAnalysis.objects.order_by('-analysis_date', '-id').values_list('id', 'analysis_type'):
+        if analysis_type in keep:
+            duplicates.append(analysis_id)
+        else:
+            keep.add(analysis_type)
+    JobAnalysis.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0012_jobaggregate'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_analysis_type, migrations.RunPython.noop),
+    ]
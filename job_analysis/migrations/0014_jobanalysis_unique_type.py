@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0013_dedupe_jobanalysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobanalysis',
+            name='duration_ms',
+            field=models.FloatField(blank=True, null=True, verbose_name='计算耗时(毫秒)'),
+        ),
+        migrations.AlterField(
+            model_name='jobanalysis',
+            name='analysis_type',
+            field=models.CharField(max_length=50, unique=True, verbose_name='分析类型'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_analysis', '0014_jobanalysis_unique_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(max_length=100, verbose_name='岗位类型')),
+                ('month', models.DateField(verbose_name='发布月份')),
+                ('job_count', models.IntegerField(default=0, verbose_name='职位数')),
+                ('salary_count', models.IntegerField(default=0, verbose_name='有薪资的职位数')),
+                ('salary_min_total', models.BigIntegerField(default=0, verbose_name='最低薪资累计')),
+                ('salary_max_total', models.BigIntegerField(default=0, verbose_name='最高薪资累计')),
+                ('salary_min_low', models.IntegerField(blank=True, null=True, verbose_name='最低薪资下限')),
+                ('salary_max_high', models.IntegerField(blank=True, null=True, verbose_name='最高薪资上限')),
+                ('sketch', models.JSONField(default=dict, verbose_name='平均薪资分桶计数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '月度薪资汇总',
+                'verbose_name_plural': '月度薪资汇总',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salarymonthlyrollup',
+            constraint=models.UniqueConstraint(fields=('job_type', 'month'), name='unique_salary_rollup_month'),
+        ),
+    ]
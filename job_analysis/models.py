@@ -14,6 +14,13 @@ class Company(models.Model):
     def __str__(self):
         return self.name
 
+class JobQuerySet(models.QuerySet):
+    """职位查询集"""
+
+    def active(self):
+        """仍在招的职位，排除已从来源列表下架的职位"""
+        return self.filter(is_active=True)
+
 class Job(models.Model):
     """职位信息模型"""
     title = models.CharField(max_length=200, verbose_name='职位名称')
@@ -27,14 +34,31 @@ class Job(models.Model):
     requirement = models.TextField(verbose_name='职位要求', null=True, blank=True)
     publish_date = models.DateField(verbose_name='发布日期', null=True, blank=True)
     source_url = models.URLField(verbose_name='来源链接', null=True, blank=True)
+    source = models.CharField(max_length=50, verbose_name='数据源', null=True, blank=True)
+    external_id = models.CharField(max_length=64, verbose_name='来源职位ID', null=True, blank=True)
+    listing_type = models.IntegerField(verbose_name='列表类型', null=True, blank=True)  # 爬取时的职位类型：1=全职, 2=实习, 3=兼职
+    is_active = models.BooleanField(default=True, db_index=True, verbose_name='是否在招')
+    delisted_at = models.DateTimeField(verbose_name='下架时间', null=True, blank=True, db_index=True)
     tags = models.JSONField(verbose_name='职位标签', null=True, blank=True)
+    education_level = models.CharField(max_length=20, verbose_name='学历要求', null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=40, verbose_name='内容指纹', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     
+    objects = JobQuerySet.as_manager()
+    
     class Meta:
         verbose_name = '职位'
         verbose_name_plural = '职位'
         ordering = ['-publish_date']
+        constraints = [
+            # 同一数据源的职位ID唯一，爬取结果按此键幂等写入
+            models.UniqueConstraint(fields=['source', 'external_id'], name='unique_job_source_external_id'),
+        ]
+        indexes = [
+            # 完整爬取后按(数据源, 列表类型)取出在招职位做差集
+            models.Index(fields=['source', 'listing_type', 'is_active'], name='job_listing_active_idx'),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.company.name}"
@@ -42,8 +66,9 @@ class Job(models.Model):
 class JobAnalysis(models.Model):
     """职位数据分析结果模型"""
     analysis_date = models.DateField(auto_now_add=True, verbose_name='分析日期')
-    analysis_type = models.CharField(max_length=50, verbose_name='分析类型')  # 如：地区分布、薪资分布、行业分布等
+    analysis_type = models.CharField(max_length=50, unique=True, verbose_name='分析类型')  # 如：地区分布、薪资分布、行业分布等
     analysis_data = models.JSONField(verbose_name='分析数据')  # 存储JSON格式的分析结果
+    duration_ms = models.FloatField(null=True, blank=True, verbose_name='计算耗时(毫秒)')
     
     class Meta:
         verbose_name = '职位分析'
@@ -51,3 +76,156 @@ class JobAnalysis(models.Model):
         
     def __str__(self):
         return f"{self.analysis_type} - {self.analysis_date}"
+
+class CrawlCheckpoint(models.Model):
+    """增量爬取的高水位标记，每个数据源、职位类型一条记录"""
+    source = models.CharField(max_length=50, verbose_name='数据源')
+    job_type = models.IntegerField(verbose_name='职位类型')  # 1=全职, 2=实习, 3=兼职
+    max_examine_time = models.BigIntegerField(verbose_name='最大审核时间戳', null=True, blank=True)
+    seen_ids = models.JSONField(verbose_name='最近见过的职位ID', default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = '爬取检查点'
+        verbose_name_plural = '爬取检查点'
+        unique_together = ('source', 'job_type')
+        
+    def __str__(self):
+        return f"{self.source} - {self.job_type}"
+
+class CrawlTask(models.Model):
+    """后台爬取任务，记录参数、进度和错误，供接口轮询"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '排队中'),
+        (STATUS_RUNNING, '运行中'),
+        (STATUS_SUCCESS, '成功'),
+        (STATUS_FAILED, '失败'),
+    ]
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='状态')
+    params = models.JSONField(verbose_name='爬取参数', default=dict, blank=True)
+    pages_fetched = models.IntegerField(verbose_name='已爬取页数', default=0)
+    rows_saved = models.IntegerField(verbose_name='已保存职位数', default=0)
+    rows_skipped = models.IntegerField(verbose_name='未变化跳过数', default=0)
+    errors = models.JSONField(verbose_name='错误信息', default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='提交时间')
+    started_at = models.DateTimeField(verbose_name='开始时间', null=True, blank=True)
+    finished_at = models.DateTimeField(verbose_name='结束时间', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = '爬取任务'
+        verbose_name_plural = '爬取任务'
+        ordering = ['-created_at']
+        
+    def __str__(self):
+        return f"爬取任务 {self.pk} - {self.status}"
+
+class CrawlRun(models.Model):
+    """一次全量爬取的批次记录，配合CrawlPage支持中断后续爬"""
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, '运行中'),
+        (STATUS_COMPLETED, '已完成'),
+        (STATUS_FAILED, '未完成'),
+    ]
+    
+    source = models.CharField(max_length=50, verbose_name='数据源')
+    command = models.CharField(max_length=50, verbose_name='发起命令')
+    job_type = models.IntegerField(verbose_name='职位类型')  # 1=全职, 2=实习, 3=兼职
+    params = models.JSONField(verbose_name='爬取参数', default=dict, blank=True)
+    total_pages = models.IntegerField(verbose_name='计划页数', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING, verbose_name='状态')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(verbose_name='结束时间', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = '爬取批次'
+        verbose_name_plural = '爬取批次'
+        ordering = ['-created_at']
+        
+    def __str__(self):
+        return f"{self.command} #{self.pk} - {self.status}"
+
+class CrawlPage(models.Model):
+    """爬取批次中单个页面的状态"""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待爬取'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
+    
+    run = models.ForeignKey(CrawlRun, on_delete=models.CASCADE, related_name='pages', verbose_name='爬取批次')
+    page = models.IntegerField(verbose_name='页码')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='状态')
+    attempts = models.IntegerField(verbose_name='尝试次数', default=0)
+    rows = models.IntegerField(verbose_name='职位数', default=0)
+    error = models.TextField(verbose_name='错误信息', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = '爬取页面'
+        verbose_name_plural = '爬取页面'
+        unique_together = ('run', 'page')
+        
+    def __str__(self):
+        return f"{self.run_id} - 第{self.page}页 - {self.status}"
+
+class JobAggregate(models.Model):
+    """职位分析的增量聚合计数
+    
+    每个维度取值一行，记录在招职位数和薪资累计，入库和下架时按差量更新，
+    分析结果直接由这些计数生成，不再扫描整张职位表。
+    """
+    dimension = models.CharField(max_length=30, verbose_name='维度')  # 如：industry、province、city、job_type、education
+    parent = models.CharField(max_length=100, default='', blank=True, verbose_name='上级取值')  # 城市维度为所属省份
+    key = models.CharField(max_length=200, verbose_name='取值')
+    job_count = models.IntegerField(default=0, verbose_name='职位数')
+    salary_count = models.IntegerField(default=0, verbose_name='有薪资的职位数')
+    salary_total = models.BigIntegerField(default=0, verbose_name='薪资累计')  # 最低薪资与最高薪资之和的累计
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = '职位聚合计数'
+        verbose_name_plural = '职位聚合计数'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'parent', 'key'], name='unique_job_aggregate_key'),
+        ]
+        
+    def __str__(self):
+        return f"{self.dimension} - {self.parent}{self.key} - {self.job_count}"
+
+class SalaryMonthlyRollup(models.Model):
+    """按岗位类型和发布月份汇总的薪资统计
+    
+    入库时按差量维护，统计该月发布的所有职位（包括之后下架的），薪资走势直接读取这些汇总行。
+    分位数由sketch中的对数分桶计数估算，相对误差约1%，分桶计数可以相加和相减。
+    """
+    job_type = models.CharField(max_length=100, verbose_name='岗位类型')
+    month = models.DateField(verbose_name='发布月份')  # 当月1日
+    job_count = models.IntegerField(default=0, verbose_name='职位数')
+    salary_count = models.IntegerField(default=0, verbose_name='有薪资的职位数')
+    salary_min_total = models.BigIntegerField(default=0, verbose_name='最低薪资累计')
+    salary_max_total = models.BigIntegerField(default=0, verbose_name='最高薪资累计')
+    salary_min_low = models.IntegerField(null=True, blank=True, verbose_name='最低薪资下限')  # 该月出现过的最小最低薪资
+    salary_max_high = models.IntegerField(null=True, blank=True, verbose_name='最高薪资上限')  # 该月出现过的最大最高薪资
+    sketch = models.JSONField(default=dict, verbose_name='平均薪资分桶计数')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = '月度薪资汇总'
+        verbose_name_plural = '月度薪资汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['job_type', 'month'], name='unique_salary_rollup_month'),
+        ]
+        
+    def __str__(self):
+        return f"{self.job_type} - {self.month:%Y-%m} - {self.salary_count}"
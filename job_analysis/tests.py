@@ -1,3 +1,654 @@
-from django.test import TestCase
+import tempfile
+import time
+from io import StringIO
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APITestCase
+from .utils.salary_parser import parse_salary
+from .utils.fingerprint import compute_content_hash
+from .crawler.telemetry import CrawlTelemetry, Histogram, LogSampler
+from .crawler.rate_limiter import post_with_retries
+from .crawler.tasks import run_crawl_task
+from .crawler.process_pool import shard_pages, shard_targets
+from .crawler.matrix import CrawlMatrix, CrawlTarget
+from .crawler.replay import StandInServer
+from .utils.text_matcher import KeywordMatcher
+from .utils.education import normalize_education, structured_education
+from .crawler.extractor import JobExtractor, JobRecord
+from .crawler import bulk_writer
+from .crawler.bulk_writer import BulkJobWriter
+from .crawler.crawler_manager import CrawlerManager
+from .crawler.job_crawler import SOURCE_JIUYEB, SOURCE_STAND_IN, JobCrawler
+from .utils.aggregation import Bucket, buckets_from_edges, SALARY_MIN_BUCKETS
+from .utils.job_aggregates import AggregateDelta, compute_aggregates, job_keys
+from .utils.snapshot import JobSnapshot, write_snapshot
+from .utils.salary_rollup import SalaryRollupDelta, compute_rollups, salary_trend, sketch_index, sketch_quantile
+from .models import CrawlTask, Job, JobAggregate, SalaryMonthlyRollup
+from .utils.data_analyzer import ANALYSIS_INPUTS, ANALYZERS, AnalysisContext, JobDataAnalyzer, register_analyzer, register_input
 
-# Create your tests here.
+# 薪资文本语料：(原始文本, 期望的(最低薪资, 最高薪资))
+SALARY_CORPUS = [
+    ('面议', (None, None)),
+    ('', (None, None)),
+    (None, (None, None)),
+    ('薪资面议', (None, None)),
+    ('8K-12K', (8000, 12000)),
+    ('8k-12k', (8000, 12000)),
+    ('8-12K', (8000, 12000)),
+    ('6.5K-8K', (6500, 8000)),
+    ('10K', (10000, 10000)),
+    (' 6k ', (6000, 6000)),
+    ('3千-5千', (3000, 5000)),
+    ('8000-12000', (8000, 12000)),
+    ('8000-12000元/月', (8000, 12000)),
+    ('8000-12000/月', (8000, 12000)),
+    ('4000~6000', (4000, 6000)),
+    ('4000至6000元', (4000, 6000)),
+    ('8000元/月', (8000, 8000)),
+    ('5000', (5000, 5000)),
+    ('3000以上', (3000, 4500)),
+    ('3000元以上', (3000, 4500)),
+    ('3000元/月以上', (3000, 4500)),
+    ('5K以下', (3500, 5000)),
+    ('3000以下', (2100, 3000)),
+    ('1.5万-2万', (15000, 20000)),
+    ('1-2万/月', (10000, 20000)),
+    ('10-15万/年', (8333, 12500)),
+    ('12万/年', (10000, 10000)),
+    ('2W-3W', (20000, 30000)),
+    ('5000-1万', (5000, 10000)),
+    ('8000-1.2万', (8000, 12000)),
+    ('500-1k', (500, 1000)),
+    ('3000-1.5万/月', (3000, 15000)),
+    ('待遇优厚', (None, None)),
+]
+
+class SalaryParserTests(SimpleTestCase):
+    """薪资解析器的语料测试"""
+
+    def test_corpus(self):
+        for text, expected in SALARY_CORPUS:
+            with self.subTest(text=text):
+                self.assertEqual(parse_salary(text), expected)
+
+    def test_results_are_integers(self):
+        for text, _ in SALARY_CORPUS:
+            for value in parse_salary(text):
+                self.assertTrue(value is None or isinstance(value, int))
+
+class TelemetryTests(SimpleTestCase):
+    """爬取指标的直方图和日志采样测试"""
+
+    def test_histogram_percentiles_within_bucket_error(self):
+        histogram = Histogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.max, 1.0)
+        for p in (50, 90, 99):
+            exact = p / 100
+            self.assertGreaterEqual(histogram.percentile(p), exact)
+            self.assertLessEqual(histogram.percentile(p), exact * 1.25)
+
+    def test_empty_histogram(self):
+        self.assertEqual(Histogram().percentile(99), 0.0)
+
+    def test_log_sampler_allows_every_nth(self):
+        sampler = LogSampler(every=10, interval=3600)
+        allowed = [sampler.allow('page') for _ in range(25)]
+        self.assertEqual(sum(allowed), 3)
+        self.assertTrue(allowed[0])
+        self.assertTrue(sampler.allow('other'))
+
+class PostWithRetriesTests(SimpleTestCase):
+    """同步请求重试测试"""
+
+    def post(self, status_code):
+        session = mock.Mock()
+        session.post.return_value = mock.Mock(status_code=status_code, headers={})
+        limiter = mock.Mock()
+        response = post_with_retries(session, 'http://example.com', limiter, max_retries=0)
+        return response, limiter
+
+    def test_success_raises_rate(self):
+        response, limiter = self.post(200)
+        self.assertEqual(response.status_code, 200)
+        limiter.record_success.assert_called_once()
+
+    def test_client_error_not_recorded_as_success(self):
+        response, limiter = self.post(404)
+        self.assertEqual(response.status_code, 404)
+        limiter.record_success.assert_not_called()
+        limiter.record_failure.assert_not_called()
+
+
+class ShardingTests(SimpleTestCase):
+    """多进程分片测试"""
+
+    def test_shard_pages_contiguous_and_complete(self):
+        shards = shard_pages(range(1, 11), 3)
+        self.assertEqual(shards, [[1, 2, 3, 4], [5, 6, 7], [8, 9, 10]])
+
+    def test_shard_pages_more_shards_than_pages(self):
+        self.assertEqual(shard_pages([1, 2], 4), [[1], [2]])
+
+    def test_shard_targets_round_robin(self):
+        self.assertEqual(shard_targets(['a', 'b', 'c'], 2), [['a', 'c'], ['b']])
+
+
+class CrawlMatrixTests(SimpleTestCase):
+    """异步爬取矩阵测试"""
+
+    def test_closes_target_sessions(self):
+        server = StandInServer(page_count=2)
+        server.start()
+        try:
+            matrix = CrawlMatrix([CrawlTarget(1, 'a', 1), CrawlTarget(1, 'a', 2)], base_url=server.base_url)
+            with mock.patch.object(JobCrawler, 'close', autospec=True) as close:
+                pages = list(matrix.iter_pages(max_pages=2))
+        finally:
+            server.stop()
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(close.call_count, 2)
+
+
+
+class CompleteListingTests(SimpleTestCase):
+    """完整爬取判定测试"""
+
+    def manager(self, base_url=None):
+        manager = CrawlerManager(base_url=base_url)
+        manager.crawler.listing_total = 2
+        return manager
+
+    def test_production_listing_is_complete(self):
+        self.assertTrue(self.manager().is_complete_listing({'1', '2'}, max_pages=10))
+
+    def test_stand_in_listing_never_sweeps(self):
+        manager = self.manager('http://127.0.0.1:8000/mobile.php/job/getlist')
+        self.assertFalse(manager.is_complete_listing({'1', '2'}, max_pages=10))
+
+    def test_stand_in_crawl_does_not_delist(self):
+        manager = self.manager('http://127.0.0.1:8000/mobile.php/job/getlist')
+        with mock.patch.object(manager.crawler, 'iter_pages', return_value=iter(())), \
+                mock.patch('job_analysis.crawler.crawler_manager.CrawlPipeline') as pipeline, \
+                mock.patch.object(manager.writer, 'delist_missing') as delist_missing:
+            def run(pages):
+                manager.writer.seen_ids.update({'1', '2'})
+                return {'pages': 1, 'extracted': 2, 'inserted': 2, 'updated': 0, 'skipped': 0}
+            pipeline.return_value.run.side_effect = run
+            manager.crawl_and_save(max_pages=10)
+        delist_missing.assert_not_called()
+        self.assertEqual(manager.last_stats['delisted'], 0)
+
+
+class AggregationTests(SimpleTestCase):
+    """条件聚合分桶测试"""
+
+    def test_buckets_from_edges_are_contiguous(self):
+        for previous, current in zip(SALARY_MIN_BUCKETS, SALARY_MIN_BUCKETS[1:]):
+            self.assertEqual(previous.upper, current.lower)
+        buckets = buckets_from_edges([None, 10, None], ['a', 'b'])
+        self.assertEqual(buckets, (Bucket('a', None, 10), Bucket('b', 10, None)))
+
+    def test_buckets_from_edges_rejects_mismatched_labels(self):
+        with self.assertRaises(ValueError):
+            buckets_from_edges([0, 10], ['a', 'b'])
+
+    def test_open_bucket_condition(self):
+        self.assertEqual(Bucket('x', None, 10).condition('v').children, [('v__lt', 10)])
+        self.assertEqual(Bucket('x', 5, None).condition('v').children, [('v__gte', 5)])
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    """多模式关键词匹配测试"""
+
+    def setUp(self):
+        self.matcher = KeywordMatcher([
+            ('博士', 'doctor'), ('本科', 'bachelor'), ('大学本科', 'university'), ('中专', 'secondary'), ('专科', 'college')
+        ])
+
+    def test_highest_priority_wins_regardless_of_position(self):
+        self.assertEqual(self.matcher.match('要求本科学历，博士优先'), 'doctor')
+
+    def test_keyword_inside_longer_keyword(self):
+        # "大学本科"中包含优先级更高的"本科"
+        self.assertEqual(self.matcher.match('大学本科及以上'), 'bachelor')
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(self.matcher.match('中专科'), 'secondary')
+        self.assertEqual(KeywordMatcher([('专科', 'college'), ('中专', 'secondary')]).match('中专科'), 'college')
+
+    def test_multiple_texts_and_no_match(self):
+        self.assertEqual(self.matcher.match(None, '', '专科'), 'college')
+        self.assertIsNone(self.matcher.match('学历不限'))
+
+
+class EducationTests(SimpleTestCase):
+    """学历要求规范化测试"""
+
+    def test_structured_field_takes_precedence(self):
+        self.assertEqual(normalize_education('大专', '硕士优先'), '专科')
+        self.assertEqual(normalize_education('不限', '硕士优先'), '未标明')
+
+    def test_falls_back_to_text(self):
+        self.assertEqual(normalize_education(None, '性别不限', '本科及以上学历，研究生优先'), '硕士及以上')
+        self.assertEqual(normalize_education('', '性别不限'), '未标明')
+
+    def test_structured_line_in_description(self):
+        self.assertEqual(structured_education('职位名称：测试\n学历要求：本科\n招聘人数：3\n'), '本科')
+        self.assertIsNone(structured_education(None))
+
+    def test_extractor_sets_education_level(self):
+        record = JobExtractor('https://example.com/{id}').extract({
+            'id': 1, 'work_name': '测试', 'com_id_name': '公司', 'xueli_id_name': '硕士', 'content': '本科及以上'
+        })
+        self.assertEqual(record.education_level, '硕士及以上')
+
+
+class JobAggregateTests(SimpleTestCase):
+    """聚合计数差量测试"""
+
+    state = {
+        'province': '四川', 'city': '成都', 'job_type': '全职', 'company__industry': '互联网',
+        'education_level': None, 'salary_min': 8000, 'salary_max': 12000,
+    }
+
+    def test_job_keys(self):
+        keys = job_keys(self.state)
+        self.assertIn(('city', '四川', '成都'), keys)
+        self.assertIn(('education', '', '未标明'), keys)
+        self.assertIn(('salary_min_bucket', '', '5K-10K'), keys)
+
+    def test_missing_values_are_skipped(self):
+        keys = job_keys(dict(self.state, city='', company__industry=None, salary_max=None))
+        dimensions = {key[0] for key in keys}
+        self.assertNotIn('city', dimensions)
+        self.assertNotIn('industry', dimensions)
+        self.assertNotIn('salary_min_bucket', dimensions)
+
+    def test_update_moves_counts_between_keys(self):
+        delta = AggregateDelta()
+        delta.remove(self.state)
+        delta.add(dict(self.state, city='绵阳', salary_max=None))
+        self.assertEqual(delta.changes[('city', '四川', '成都')], [-1, -1, -20000])
+        self.assertEqual(delta.changes[('city', '四川', '绵阳')], [1, 0, 0])
+        self.assertEqual(delta.changes[('province', '', '四川')], [0, -1, -20000])
+
+
+class AnalyzerRegistryTests(SimpleTestCase):
+    """分析器注册表测试"""
+
+    def test_builtin_analyzers_registered(self):
+        self.assertEqual(list(ANALYZERS), [
+            'industry_distribution', 'salary_distribution', 'location_distribution',
+            'job_type_distribution', 'education_salary_distribution',
+        ])
+
+    def test_duplicate_registration_rejected(self):
+        with self.assertRaises(ValueError):
+            register_analyzer('industry_distribution')(lambda context: {})
+
+    def test_context_computes_shared_result_once(self):
+        context = AnalysisContext()
+        calls = []
+        for _ in range(3):
+            context.shared('rows', lambda: calls.append(1) or [1, 2])
+        self.assertEqual(len(calls), 1)
+
+    @mock.patch.dict(ANALYZERS, clear=True)
+    @mock.patch.dict(ANALYSIS_INPUTS, clear=True)
+    def test_parallel_analyzers_share_inputs(self):
+        calls = []
+
+        @register_input('slow')
+        def slow_input():
+            calls.append('slow')
+            time.sleep(0.1)
+            return 2
+
+        for index in range(3):
+            register_analyzer(f'analysis_{index}', inputs=['slow'])(
+                lambda context, index=index: time.sleep(0.1) or context.input('slow') * index
+            )
+
+        started = time.perf_counter()
+        results, durations = JobDataAnalyzer.run_analyzers(parallelism=3)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(results, {'analysis_0': 0, 'analysis_1': 2, 'analysis_2': 4})
+        self.assertEqual(calls, ['slow'])
+        self.assertEqual(set(durations), set(results))
+        # 顺序执行需要0.4秒，并行时为最慢的输入加最慢的分析器
+        self.assertLess(elapsed, 0.35)
+
+    def test_unknown_input_rejected(self):
+        with self.assertRaises(ValueError):
+            register_analyzer('needs_missing_input', inputs=['missing'])
+
+
+class SnapshotTests(SimpleTestCase):
+    """列式快照测试"""
+
+    rows = [
+        (1, '四川', '成都', '全职', '互联网', '本科及以上', 8000, 12000, date(2026, 1, 2), ['五险一金', '双休']),
+        (2, '四川', '绵阳', '全职', '制造业', '专科', None, None, None, None),
+        (3, '重庆', '', '实习', '互联网', '本科及以上', 3000, 5000, date(2026, 2, 1), ['双休']),
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_snapshot(iter(self.rows), directory.name)
+        self.snapshot = JobSnapshot(directory.name)
+
+    def test_category_counts(self):
+        self.assertEqual(len(self.snapshot), 3)
+        self.assertEqual(self.snapshot.count_by('province'), {'categories': ['四川', '重庆'], 'data': [2, 1]})
+        self.assertEqual(self.snapshot.count_by('industry', top=1), {'categories': ['互联网', '其他'], 'data': [2, 1]})
+        self.assertEqual(self.snapshot.group_by(['province', 'city']), {('四川', '成都'): 1, ('四川', '绵阳'): 1})
+        self.assertEqual(
+            self.snapshot.group_by(['province', 'job_type', 'industry']),
+            {('四川', '全职', '互联网'): 1, ('四川', '全职', '制造业'): 1, ('重庆', '实习', '互联网'): 1}
+        )
+        self.assertEqual(self.snapshot.group_by(['province'], mask=np.zeros(3, dtype=bool)), {})
+
+    def test_salary_histogram_and_average(self):
+        buckets = buckets_from_edges([0, 5000, 10000, None], ['低', '中', '高'])
+        self.assertEqual(self.snapshot.histogram(buckets)['data'], [1, 1, 0])
+        self.assertEqual(self.snapshot.histogram(buckets, 'salary_avg')['data'], [1, 0, 1])
+        self.assertEqual(self.snapshot.average_salary_by('industry'), {'互联网': {'avg_salary': 7000.0, 'count': 2}})
+
+    def test_masks_and_tags(self):
+        self.assertEqual(self.snapshot.tag_counts(), {'categories': ['双休', '五险一金'], 'data': [2, 1]})
+        self.assertEqual(self.snapshot.mask(tag='五险一金').tolist(), [True, False, False])
+        self.assertEqual(self.snapshot.mask(province=['四川'], salaried=True).tolist(), [True, False, False])
+        self.assertEqual(self.snapshot.mask(published_from=date(2026, 1, 15)).tolist(), [False, False, True])
+        self.assertFalse(self.snapshot.mask(job_type='兼职').any())
+
+
+class SalaryRollupTests(SimpleTestCase):
+    """月度薪资汇总测试"""
+
+    def test_sketch_quantile_relative_error(self):
+        values = list(range(3000, 60000, 7))
+        sketch = {}
+        for value in values:
+            index = sketch_index(value)
+            sketch[index] = sketch.get(index, 0) + 1
+        for quantile in (0.1, 0.5, 0.9):
+            exact = values[int(quantile * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch_quantile(sketch, quantile) - exact) / exact, 0.011)
+        self.assertIsNone(sketch_quantile({}, 0.5))
+
+    def test_delta_replaces_updated_job(self):
+        old = {'job_type': '开发', 'publish_date': date(2026, 3, 15), 'salary_min': 8000, 'salary_max': 12000}
+        delta = SalaryRollupDelta()
+        delta.add(old)
+        delta.remove(old)
+        delta.add(dict(old, publish_date=date(2026, 4, 1), salary_max=None))
+        march = delta.changes[('开发', date(2026, 3, 1))]
+        self.assertEqual(march['counters'], [0, 0, 0, 0])
+        self.assertFalse(any(march['sketch'].values()))
+        self.assertEqual(delta.changes[('开发', date(2026, 4, 1))]['counters'], [1, 0, 0, 0])
+
+    def test_trend_merges_rows_of_same_month(self):
+        def rollup(job_type, month, count, low, high):
+            return SalaryMonthlyRollup(
+                job_type=job_type, month=month, job_count=count, salary_count=count,
+                salary_min_total=low * count, salary_max_total=high * count,
+                salary_min_low=low, salary_max_high=high, sketch={str(sketch_index((low + high) / 2)): count}
+            )
+
+        trend = salary_trend([
+            rollup('前端开发', date(2026, 1, 1), 1, 8000, 12000),
+            rollup('后端开发', date(2026, 1, 1), 3, 12000, 16000),
+            rollup('后端开发', date(2026, 2, 1), 2, 10000, 10000),
+        ])
+        self.assertEqual([item['date'] for item in trend], ['2026-01', '2026-02'])
+        self.assertEqual(trend[0]['average_salary'], 13000)
+        self.assertEqual((trend[0]['count'], trend[0]['min_salary'], trend[0]['max_salary']), (4, 8000, 16000))
+
+
+def make_record(external_id, **fields):
+    """构造测试用的职位记录"""
+    values = {
+        'title': f'职位{external_id}', 'company_name': '测试公司', 'industry': '互联网', 'job_type': '开发',
+        'salary_min': 8000, 'salary_max': 12000, 'province': '四川', 'city': '成都',
+        'description': '描述', 'requirement': '要求', 'education_level': '本科及以上',
+        'publish_date': date(2026, 3, 15), 'source_url': f'https://example.com/{external_id}',
+        'external_id': str(external_id), 'listing_type': 1, 'tags': ['双休'],
+    }
+    values.update(fields)
+    return JobRecord(**values)
+
+
+class BulkJobWriterTests(TestCase):
+    """批量写入测试"""
+
+    def assert_aggregates_match_rebuild(self):
+        stored = {
+            (row.dimension, row.parent, row.key): [row.job_count, row.salary_count, row.salary_total]
+            for row in JobAggregate.objects.all() if row.job_count or row.salary_count or row.salary_total
+        }
+        self.assertEqual(stored, compute_aggregates())
+        stored_rollups = {
+            (row.job_type, row.month): (row.job_count, row.salary_count, row.salary_min_total, row.salary_max_total)
+            for row in SalaryMonthlyRollup.objects.all() if row.job_count
+        }
+        fresh_rollups = {
+            key: (row.job_count, row.salary_count, row.salary_min_total, row.salary_max_total)
+            for key, row in compute_rollups().items()
+        }
+        self.assertEqual(stored_rollups, fresh_rollups)
+
+    def test_rewriting_batch_updates_in_place(self):
+        writer = BulkJobWriter()
+        self.assertEqual(writer.write([make_record(1), make_record(2)]), {'inserted': 2, 'updated': 0, 'skipped': 0})
+
+        stats = writer.write([make_record(1, salary_min=9000, title='新标题'), make_record(2)])
+        self.assertEqual(stats, {'inserted': 0, 'updated': 1, 'skipped': 1})
+        self.assertEqual(Job.objects.count(), 2)
+        job = Job.objects.get(external_id='1')
+        self.assertEqual((job.salary_min, job.title), (9000, '新标题'))
+        self.assertEqual(job.content_hash, compute_content_hash(make_record(1, salary_min=9000, title='新标题')))
+
+    def test_unchanged_job_skipped(self):
+        writer = BulkJobWriter()
+        writer.write([make_record(4)])
+        with mock.patch.object(Job.objects, 'bulk_create') as bulk_create:
+            self.assertEqual(writer.write([make_record(4)]), {'inserted': 0, 'updated': 0, 'skipped': 1})
+        bulk_create.assert_not_called()
+
+    def test_company_change_not_skipped(self):
+        writer = BulkJobWriter()
+        writer.write([make_record(5)])
+        fields = {'company_name': '另一家公司', 'industry': '制造业'}
+        for changed in (fields, {**fields, 'education_level': '硕士及以上'}):
+            self.assertEqual(writer.write([make_record(5, **changed)]), {'inserted': 0, 'updated': 1, 'skipped': 0})
+        job = Job.objects.select_related('company').get(external_id='5')
+        self.assertEqual((job.company.name, job.company.industry), ('另一家公司', '制造业'))
+        self.assertEqual(job.education_level, '硕士及以上')
+        self.assertEqual(JobAggregate.objects.get(dimension='industry', key='制造业').job_count, 1)
+        self.assertEqual(JobAggregate.objects.get(dimension='industry', key='互联网').job_count, 0)
+
+    def test_lifecycle_keeps_aggregates_consistent(self):
+        writer = BulkJobWriter()
+        # 新增
+        writer.write([make_record(7), make_record(8, city='绵阳', salary_min=None, salary_max=None)])
+        self.assert_aggregates_match_rebuild()
+        # 更新
+        writer.write([make_record(7, company_name='另一家公司', industry='制造业', salary_max=15000), make_record(8)])
+        self.assert_aggregates_match_rebuild()
+        # 下架
+        self.assertEqual(writer.delist_missing(1, {'8'}), 1)
+        self.assertFalse(Job.objects.get(external_id='7').is_active)
+        self.assert_aggregates_match_rebuild()
+        # 重新出现，恢复在招
+        self.assertEqual(writer.write([make_record(7)]), {'inserted': 0, 'updated': 1, 'skipped': 0})
+        self.assertTrue(Job.objects.get(external_id='7').is_active)
+        self.assert_aggregates_match_rebuild()
+        self.assertEqual(JobAggregate.objects.get(dimension='province', key='四川').job_count, 2)
+
+    def test_stand_in_rows_kept_apart(self):
+        self.assertEqual(JobCrawler().source, SOURCE_JIUYEB)
+        manager = CrawlerManager(base_url='http://127.0.0.1:8000/mobile.php/job/getlist')
+        self.assertEqual(manager.writer.source, SOURCE_STAND_IN)
+
+        BulkJobWriter().write([make_record(9)])
+        manager.writer.write([make_record(9, title='模拟职位', salary_min=1000)])
+        real = Job.objects.get(source=SOURCE_JIUYEB, external_id='9')
+        self.assertEqual((real.title, real.salary_min), ('职位9', 8000))
+
+        call_command('reset_jobs', source=SOURCE_STAND_IN, stdout=StringIO())
+        self.assertEqual(list(Job.objects.values_list('source', flat=True)), [SOURCE_JIUYEB])
+        self.assert_aggregates_match_rebuild()
+
+    def test_sharded_crawl_reuses_first_page(self):
+        manager = CrawlerManager()
+        first_page = [{'id': '10', 'work_name': '第一页职位', 'com_id_name': '测试公司'}]
+        shard_pages = []
+
+        def crawl_page_shard(options, job_type, pages):
+            shard_pages.extend(pages)
+            return {'pages': len(pages), 'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'dropped': 0}, \
+                CrawlTelemetry(), set()
+
+        with mock.patch.object(manager.crawler, 'probe_total_pages', return_value=(3, first_page)), \
+                mock.patch('job_analysis.crawler.process_pool.create_pool',
+                           side_effect=lambda processes: ThreadPoolExecutor(processes)), \
+                mock.patch('job_analysis.crawler.process_pool.crawl_page_shard', side_effect=crawl_page_shard):
+            manager.crawl_sharded(job_type=1, max_pages=10, processes=2)
+        self.assertEqual(sorted(shard_pages), [2, 3])
+        self.assertEqual((manager.last_stats['pages'], manager.last_stats['inserted']), (3, 1))
+        self.assertTrue(Job.objects.filter(external_id='10', title='第一页职位').exists())
+
+    def test_concurrent_insert_counted_once(self):
+        writer = BulkJobWriter()
+        concurrent = BulkJobWriter()
+        lock_job_states = bulk_writer.lock_job_states
+        calls = []
+
+        def insert_concurrently(*args):
+            # 第一次查询之后、写入之前，另一个进程写入了同一职位
+            result = lock_job_states(*args)
+            calls.append(args)
+            if len(calls) == 1:
+                concurrent.write([make_record(6, city='绵阳')])
+            return result
+
+        with mock.patch.object(bulk_writer, 'lock_job_states', side_effect=insert_concurrently):
+            stats = writer.write([make_record(6, salary_min=9000)])
+        self.assertEqual(stats, {'inserted': 0, 'updated': 1, 'skipped': 0})
+        job = Job.objects.get(external_id='6')
+        self.assertEqual((job.city, job.salary_min, job.is_active), ('成都', 9000, True))
+        self.assert_aggregates_match_rebuild()
+
+    def test_conflict_target_only_where_supported(self):
+        writer = BulkJobWriter()
+        writer.write([make_record(3)])
+        for supported, unique_fields in ((True, ['source', 'external_id']), (False, None)):
+            with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', supported), \
+                    mock.patch.object(Job.objects, 'bulk_create') as bulk_create:
+                writer.write([make_record(3, title='新标题')])
+            kwargs = bulk_create.call_args.kwargs
+            self.assertEqual(kwargs['unique_fields'], unique_fields)
+            self.assertTrue(kwargs['update_conflicts'])
+            self.assertEqual(kwargs['update_fields'], BulkJobWriter.UPSERT_FIELDS)
+
+
+class CrawlApiTests(APITestCase):
+    """手动触发爬取和查询任务状态的接口测试"""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('tester'))
+
+    @mock.patch('job_analysis.crawler.tasks.get_executor')
+    def test_submit_and_status(self, get_executor):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/api/jobs/crawl/', {'job_type': '2', 'max_pages': 3, 'incremental': True}, format='json'
+            )
+        self.assertEqual(response.status_code, 202)
+        task = CrawlTask.objects.get(pk=response.data['task_id'])
+        self.assertEqual(task.params, {'job_type': 2, 'max_pages': 3, 'incremental': True})
+        # 任务记录提交之前不会交给后台线程
+        get_executor.return_value.submit.assert_not_called()
+        for callback in callbacks:
+            callback()
+        get_executor.return_value.submit.assert_called_once_with(run_crawl_task, task.pk)
+
+        response = self.client.get(f'/api/crawl-tasks/{task.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], CrawlTask.STATUS_PENDING)
+
+    @mock.patch('job_analysis.crawler.tasks.get_executor')
+    def test_defaults(self, get_executor):
+        response = self.client.post('/api/jobs/crawl/', {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        task = CrawlTask.objects.get(pk=response.data['task_id'])
+        self.assertEqual(task.params, {'job_type': 1, 'max_pages': 10, 'incremental': False})
+
+    @mock.patch('job_analysis.crawler.tasks.get_executor')
+    def test_invalid_params_rejected(self, get_executor):
+        for data in ({'job_type': 9}, {'max_pages': 'abc'}, {'max_pages': 0}, {'incremental': 'maybe'}):
+            with self.subTest(data=data):
+                response = self.client.post('/api/jobs/crawl/', data, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(data)), response.data['errors'])
+        self.assertFalse(CrawlTask.objects.exists())
+        get_executor.assert_not_called()
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.post('/api/jobs/crawl/', {}, format='json').status_code, (401, 403))
+
+
+class JobTypeSalaryApiTests(APITestCase):
+    """岗位类型薪资走势接口测试"""
+
+    def setUp(self):
+        BulkJobWriter().write([
+            make_record(1, publish_date=date(2024, 1, 10)),
+            make_record(2, publish_date=date(2025, 12, 5)),
+            make_record(3, publish_date=date(2026, 2, 5), salary_min=10000, salary_max=14000),
+            make_record(4, publish_date=date(2026, 3, 5)),
+            make_record(5, publish_date=date(2026, 3, 8), salary_min=12000, salary_max=16000),
+            make_record(6, publish_date=date(2026, 3, 9), job_type='前端开发', salary_min=30000, salary_max=40000),
+            make_record(7, publish_date=date(2026, 4, 2), salary_min=50000, salary_max=60000),
+        ])
+
+    def get(self, **params):
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2026, 3, 20)):
+            return self.client.get('/api/analysis/job_type_salary/', params)
+
+    def test_exact_job_type_within_window(self):
+        response = self.get(job_type='开发', months=3)
+        self.assertEqual(response.status_code, 200)
+        trend = response.data['salary_trend']
+        self.assertEqual([item['date'] for item in trend], ['2026-02', '2026-03'])
+        self.assertEqual([item['average_salary'] for item in trend], [12000, 12000])
+        self.assertEqual(trend[-1]['count'], 2)
+        self.assertEqual(len(response.data['predictions']), 3)
+
+    def test_default_window_is_twelve_months(self):
+        trend = self.get(job_type='开发').data['salary_trend']
+        self.assertEqual([item['date'] for item in trend], ['2025-12', '2026-02', '2026-03'])
+
+    def test_future_months_excluded(self):
+        # 发布日期在本月之后的职位不计入最近N个月的走势
+        trend = self.get(job_type='开发', months=1).data['salary_trend']
+        self.assertEqual([item['date'] for item in trend], ['2026-03'])
+        self.assertEqual(trend[0]['count'], 2)
+
+    def test_errors(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(self.get(job_type='开发', months='x').status_code, 400)
+        self.assertEqual(self.get(job_type='开', months=3).status_code, 404)
+        self.assertEqual(self.get(job_type='开发', months=1).status_code, 200)
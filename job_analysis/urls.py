@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api.views import CompanyViewSet, JobViewSet, AnalysisViewSet
+from .api.views import CompanyViewSet, JobViewSet, AnalysisViewSet, CrawlTaskViewSet
 
 # 创建路由器
 router = DefaultRouter()
 router.register(r'companies', CompanyViewSet)
 router.register(r'jobs', JobViewSet)
 router.register(r'analysis', AnalysisViewSet)
+router.register(r'crawl-tasks', CrawlTaskViewSet)
 
 urlpatterns = [
     path('api/', include(router.urls)),
@@ -0,0 +1,112 @@
+from collections import namedtuple
+from django.db.models import Count, Q
+
+class Bucket(namedtuple('Bucket', ['label', 'lower', 'upper'])):
+    """直方图区间，包含下界、不包含上界，None表示该侧不设界"""
+
+    __slots__ = ()
+
+    def contains(self, value):
+        """取值是否落入该区间"""
+        return (self.lower is None or value >= self.lower) and (self.upper is None or value < self.upper)
+
+    def condition(self, field):
+        """区间对应的过滤条件
+
+        Args:
+            field: 参与分桶的字段名或注解名
+
+        Returns:
+            Q: 落入该区间的条件
+        """
+        condition = Q()
+        if self.lower is not None:
+            condition &= Q(**{f'{field}__gte': self.lower})
+        if self.upper is not None:
+            condition &= Q(**{f'{field}__lt': self.upper})
+        return condition
+
+
+def buckets_from_edges(edges, labels):
+    """由区间边界生成首尾相接的区间
+
+    Args:
+        edges: 边界列表，长度比labels多1，首尾可以为None表示不设界
+        labels: 每个区间的名称
+
+    Returns:
+        tuple: Bucket元组
+    """
+    if len(edges) != len(labels) + 1:
+        raise ValueError(f"区间边界数应比名称数多1，实际为 {len(edges)} 和 {len(labels)}")
+    return tuple(Bucket(label, edges[index], edges[index + 1]) for index, label in enumerate(labels))
+
+
+# 按最低薪资划分的薪资分布区间（salary_distribution分析使用）
+SALARY_MIN_BUCKETS = buckets_from_edges(
+    [0, 5000, 10000, 15000, 20000, 30000, 1000000],
+    ['5K以下', '5K-10K', '10K-15K', '15K-20K', '20K-30K', '30K以上']
+)
+
+# 多级分布中超出前N项的部分合并为该类别
+OTHER_LABEL = '其他'
+
+def drilldown(queryset, fields, top=None):
+    """用一条GROUP BY查询生成任意层级的多级分布
+
+    按所有层级字段一次分组计数，上层的计数和每层的前N项、"其他"汇总都在内存中完成，
+    查询次数不随上层类别（如省份）的数量增长。某层取值为空的记录计入上层，但不作为该层的类别。
+
+    Args:
+        queryset: 参与统计的查询集
+        fields: 由上到下的层级字段名，如['province', 'city']
+        top: 每层保留的类别数，可以是整数（各层相同）、按层的序列或None（不限制），
+            超出部分合并为"其他"，"其他"不再向下展开
+
+    Returns:
+        dict: 顶层节点，包含categories、data；除最后一层外还包含children（类别 -> 下一层节点）
+    """
+    fields = list(fields)
+    if not fields:
+        raise ValueError("至少需要一个层级字段")
+    if top is None or isinstance(top, int):
+        top = [top] * len(fields)
+    top = list(top) + [None] * (len(fields) - len(top))
+
+    # 清除模型默认排序，否则排序字段会进入GROUP BY
+    rows = queryset.values_list(*fields).annotate(count=Count('pk')).order_by()
+
+    # 中间结构：类别 -> [计数, 下一层]
+    root = {}
+    for row in rows:
+        count = row[-1]
+        level = root
+        for key in row[:-1]:
+            if key in (None, ''):
+                break
+            entry = level.get(key)
+            if entry is None:
+                entry = level[key] = [0, {}]
+            entry[0] += count
+            level = entry[1]
+
+    return _format_level(root, top, 0, len(fields))
+
+def _format_level(level, top, depth, depth_count):
+    items = sorted(level.items(), key=lambda item: (-item[1][0], str(item[0])))
+    limit = top[depth]
+    kept = items if limit is None else items[:limit]
+    node = {
+        'categories': [key for key, _ in kept],
+        'data': [entry[0] for _, entry in kept],
+    }
+    rest = items[len(kept):]
+    if rest:
+        node['categories'].append(OTHER_LABEL)
+        node['data'].append(sum(entry[0] for _, entry in rest))
+    if depth + 1 < depth_count:
+        node['children'] = {
+            key: _format_level(entry[1], top, depth + 1, depth_count)
+            for key, entry in kept
+        }
+    return node
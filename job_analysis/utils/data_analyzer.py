@@ -1,312 +1,286 @@
 import logging
-from collections import Counter, defaultdict
-from django.db.models import Avg, Count, Q, F
-from ..models import Job, Company, JobAnalysis
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from ..models import JobAnalysis
+from .job_aggregates import (
+    CITY_DIMENSION, bucket_chart, education_salary_rows, load_aggregates, location_chart_from_aggregates,
+    rebuild_aggregates, top_chart
+)
+from .salary_rollup import rebuild_salary_rollups
 
 logger = logging.getLogger(__name__)
 
-class JobDataAnalyzer:
-    """职位数据分析器"""
-    
-    @staticmethod
-    def analyze_industry_distribution():
-        """分析行业分布
-        
+# 并行执行分析器的线程数，可在settings中通过ANALYSIS_PARALLELISM配置，1表示顺序执行。
+# 内置分析器只读取同一份已加载的聚合行，在内存中计算，线程池和每个线程单独建立的数据库连接开销
+# 大于并行带来的收益，默认顺序执行；有分析器依赖自己的慢查询等I/O输入时再调大
+DEFAULT_ANALYSIS_PARALLELISM = 1
+
+# 已注册的共享输入：名称 -> 无参数的计算函数
+ANALYSIS_INPUTS = {}
+
+# 已注册的分析器：分析类型 -> Analyzer，按注册顺序执行
+ANALYZERS = {}
+
+# 分析器：分析函数及其依赖的共享输入名称
+Analyzer = namedtuple('Analyzer', ['func', 'inputs'])
+
+def register_input(name):
+    """注册共享输入的装饰器
+
+    共享输入在一次分析运行中只计算一次，声明依赖它的分析器都读取同一份结果。
+
+    Args:
+        name: 输入名称，同一名称只能注册一次
+    """
+    def decorator(func):
+        if name in ANALYSIS_INPUTS:
+            raise ValueError(f"共享输入 {name} 已注册")
+        ANALYSIS_INPUTS[name] = func
+        return func
+    return decorator
+
+def register_analyzer(analysis_type, inputs=()):
+    """注册分析器的装饰器
+
+    分析函数接收AnalysisContext，返回可JSON序列化的分析结果，结果以analysis_type为键保存到JobAnalysis。
+    并行执行时，分析器在声明的共享输入都计算完成后才开始。
+
+    Args:
+        analysis_type: 分析类型，同一类型只能注册一次
+        inputs: 依赖的共享输入名称
+    """
+    inputs = tuple(inputs)
+    unknown = [name for name in inputs if name not in ANALYSIS_INPUTS]
+    if unknown:
+        raise ValueError(f"未注册的共享输入: {', '.join(unknown)}")
+
+    def decorator(func):
+        if analysis_type in ANALYZERS:
+            raise ValueError(f"分析类型 {analysis_type} 已注册")
+        ANALYZERS[analysis_type] = Analyzer(func, inputs)
+        return func
+    return decorator
+
+
+class AnalysisContext:
+    """一次分析运行中各分析器共享的中间结果
+
+    聚合计数只在第一次使用时用一条查询读取，之后所有分析器共用；新增分析维度时只需读取已加载的聚合行。
+    其他需要共享的中间结果可以通过shared()按名称缓存。可以在多个线程中同时使用，同一结果只计算一次。
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def shared(self, name, compute):
+        """取出共享的中间结果，首次使用时调用compute计算
+
+        Args:
+            name: 中间结果名称
+            compute: 无参数的计算函数
+
         Returns:
-            dict: 行业分布数据
+            计算结果
         """
-        # 获取公司行业分布
-        industries = Company.objects.values('industry').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # 过滤掉空行业
-        industries = [item for item in industries if item['industry']]
-        
-        # 取前10个主要行业
-        top_industries = industries[:10]
-        
-        # 如果超过10个行业，将其他行业归为"其他"类别
-        if len(industries) > 10:
-            other_count = sum(item['count'] for item in industries[10:])
-            top_industries.append({
-                'industry': '其他',
-                'count': other_count
-            })
-            
-        return {
-            'categories': [item['industry'] for item in top_industries],
-            'data': [item['count'] for item in top_industries]
-        }
-    
-    @staticmethod
-    def analyze_salary_distribution():
-        """分析薪资分布
-        
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = compute()
+        return self._cache[name]
+
+    def input(self, name):
+        """取出已注册的共享输入"""
+        return self.shared(name, ANALYSIS_INPUTS[name])
+
+    def dimension(self, dimension):
+        """某个维度下职位数大于0的聚合行
+
         Returns:
-            dict: 薪资分布数据
+            list: JobAggregate列表
         """
-        # 排除没有薪资信息的职位
-        jobs_with_salary = Job.objects.filter(
-            salary_min__isnull=False,
-            salary_max__isnull=False
+        return self.input('aggregates').get(dimension, [])
+
+
+# 所有聚合计数，一条查询读取
+register_input('aggregates')(load_aggregates)
+
+def _close_connection_after(func, *args):
+    """在线程池中执行函数，结束后关闭该线程的数据库连接
+
+    Django的数据库连接按线程隔离，每个工作线程使用自己的连接，执行完关闭以免连接泄漏。
+    """
+    try:
+        return func(*args)
+    finally:
+        connection.close()
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - started) * 1000, 3)
+
+
+@register_analyzer('industry_distribution', inputs=['aggregates'])
+def analyze_industry_distribution(context):
+    """各行业的在招职位数，取前10个行业，其余归为"其他" """
+    return top_chart(context.dimension('industry'), top=10)
+
+@register_analyzer('salary_distribution', inputs=['aggregates'])
+def analyze_salary_distribution(context):
+    """按最低薪资区间统计的职位数"""
+    return bucket_chart('salary_min_bucket', context.dimension('salary_min_bucket'))
+
+@register_analyzer('location_distribution', inputs=['aggregates'])
+def analyze_location_distribution(context):
+    """前10个省份的职位数，以及这些省份各自前5个城市的职位数，其余归为"其他" """
+    return location_chart_from_aggregates(
+        context.dimension('province'), context.dimension(CITY_DIMENSION), province_top=10, city_top=5
+    )
+
+@register_analyzer('job_type_distribution', inputs=['aggregates'])
+def analyze_job_type_distribution(context):
+    """岗位类型分布，取前10个岗位类型，其余归为"其他" """
+    return top_chart(context.dimension('job_type'), top=10)
+
+@register_analyzer('education_salary_distribution', inputs=['aggregates'])
+def analyze_education_salary_distribution(context):
+    """各学历层次的平均薪资，按平均薪资从高到低取前10个"""
+    result = [
+        {'education': item['education'], 'avg_salary': round(item['avg_salary']), 'count': item['count']}
+        for item in education_salary_rows(context.dimension('education'))
+    ]
+    result.sort(key=lambda x: x['avg_salary'], reverse=True)
+    result = result[:10]
+
+    return {
+        'categories': [item['education'] for item in result],
+        'data': [item['avg_salary'] for item in result],
+        'counts': [item['count'] for item in result]
+    }
+
+
+def publish_analyses(results, durations):
+    """在一个事务中批量upsert保存分析结果
+
+    已有的分析类型原地更新，读取方在发布过程中不会看到空结果或新旧混合的结果。
+
+    Args:
+        results: 分析类型 -> 分析结果
+        durations: 分析类型 -> 计算耗时（毫秒）
+    """
+    # MySQL的ON DUPLICATE KEY UPDATE不支持指定冲突列，由唯一索引自动判定
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ['analysis_type']
+    with transaction.atomic():
+        JobAnalysis.objects.bulk_create(
+            [
+                JobAnalysis(analysis_type=analysis_type, analysis_data=data, duration_ms=durations.get(analysis_type))
+                for analysis_type, data in results.items()
+            ],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['analysis_data', 'analysis_date', 'duration_ms']
         )
-        
-        # 计算平均薪资并按范围分组
-        salary_ranges = [
-            {'min': 0, 'max': 5000, 'label': '5K以下'},
-            {'min': 5000, 'max': 10000, 'label': '5K-10K'},
-            {'min': 10000, 'max': 15000, 'label': '10K-15K'},
-            {'min': 15000, 'max': 20000, 'label': '15K-20K'},
-            {'min': 20000, 'max': 30000, 'label': '20K-30K'},
-            {'min': 30000, 'max': 1000000, 'label': '30K以上'}
-        ]
-        
-        # 统计每个薪资范围的职位数
-        salary_distribution = []
-        for salary_range in salary_ranges:
-            count = jobs_with_salary.filter(
-                salary_min__gte=salary_range['min'],
-                salary_min__lt=salary_range['max']
-            ).count()
-            
-            salary_distribution.append({
-                'range': salary_range['label'],
-                'count': count
-            })
-            
-        return {
-            'categories': [item['range'] for item in salary_distribution],
-            'data': [item['count'] for item in salary_distribution]
-        }
-    
-    @staticmethod
-    def analyze_location_distribution():
-        """分析地区分布
-        
-        Returns:
-            dict: 地区分布数据
-        """
-        # 按省份分组
-        province_distribution = Job.objects.values('province').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # 过滤掉空省份
-        province_distribution = [item for item in province_distribution if item['province']]
-        
-        # 取前10个主要省份
-        top_provinces = province_distribution[:10]
-        
-        # 如果超过10个省份，将其他省份归为"其他"类别
-        if len(province_distribution) > 10:
-            other_count = sum(item['count'] for item in province_distribution[10:])
-            top_provinces.append({
-                'province': '其他',
-                'count': other_count
-            })
-            
-        # 获取城市分布（只考虑前10个省份的城市）
-        city_distribution = {}
-        provinces = [item['province'] for item in top_provinces if item['province'] != '其他']
-        
-        for province in provinces:
-            cities = Job.objects.filter(province=province).values('city').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-            # 过滤掉空城市
-            cities = [item for item in cities if item['city']]
-            
-            # 取前5个主要城市
-            top_cities = cities[:5]
-            
-            # 如果超过5个城市，将其他城市归为"其他"类别
-            if len(cities) > 5:
-                other_count = sum(item['count'] for item in cities[5:])
-                top_cities.append({
-                    'city': '其他',
-                    'count': other_count
-                })
-                
-            city_distribution[province] = {
-                'categories': [item['city'] for item in top_cities],
-                'data': [item['count'] for item in top_cities]
-            }
-            
-        return {
-            'province': {
-                'categories': [item['province'] for item in top_provinces],
-                'data': [item['count'] for item in top_provinces]
-            },
-            'city': city_distribution
-        }
-    
-    @staticmethod
-    def analyze_job_type_distribution():
-        """分析岗位类型分布
-        
-        Returns:
-            dict: 岗位类型分布数据
-        """
-        # 按岗位类型分组
-        job_types = Job.objects.values('job_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # 过滤掉空岗位类型
-        job_types = [item for item in job_types if item['job_type']]
-        
-        # 取前10个主要岗位类型
-        top_job_types = job_types[:10]
-        
-        # 如果超过10个岗位类型，将其他岗位类型归为"其他"类别
-        if len(job_types) > 10:
-            other_count = sum(item['count'] for item in job_types[10:])
-            top_job_types.append({
-                'job_type': '其他',
-                'count': other_count
-            })
-            
-        return {
-            'categories': [item['job_type'] for item in top_job_types],
-            'data': [item['count'] for item in top_job_types]
-        }
-    
-    @staticmethod
-    def analyze_education_salary_distribution():
-        """分析不同学历要求的平均薪资分布
-        
+
+
+class JobDataAnalyzer:
+    """职位数据分析器
+
+    执行所有已注册的分析器，各项分析读取入库时按差量维护的聚合计数（JobAggregate），
+    耗时与维度取值数有关，与职位总数无关。
+    """
+
+    @classmethod
+    def run_analyzers(cls, analysis_types=None, context=None, parallelism=None):
+        """执行分析器并记录每个分析器的耗时，不保存结果
+
+        并行执行时先把所有需要的共享输入提交到线程池，再提交各分析器，分析器在线程中等待自己依赖的输入。
+        线程池按提交顺序取任务，分析器开始执行时所有输入都已在执行或已完成，等待不会占满线程池导致死锁。
+        整体耗时接近最慢的共享输入加上最慢的单个分析器。
+
+        Args:
+            analysis_types: 要执行的分析类型，默认为所有已注册的分析器
+            context: 共享的分析上下文，默认新建
+            parallelism: 并行线程数，默认取settings.ANALYSIS_PARALLELISM，1表示在当前线程中顺序执行
+
         Returns:
-            dict: 学历-薪资分布数据
+            tuple: (分析类型 -> 分析结果, 分析类型 -> 耗时毫秒，不含等待共享输入的时间)
         """
-        # 排除没有薪资信息或描述的职位
-        jobs_with_salary = Job.objects.filter(
-            salary_min__isnull=False,
-            salary_max__isnull=False,
-            description__isnull=False
-        )
-        
-        # 定义常见学历关键词和优先级，用于识别和归类
-        education_patterns = [
-            r'博士及以上', r'博士', r'博士学历', 
-            r'硕士及以上', r'硕士', r'硕士学历', 
-            r'研究生及以上', r'研究生', r'研究生学历',
-            r'本科及以上', r'本科', r'本科学历', r'大学本科',
-            r'大专及以上', r'大专', r'专科', r'专科及以上', 
-            r'高中及以上', r'高中', r'中专及以上', r'中专', r'职高',
-            r'初中及以上', r'初中',
-            r'学历不限'
-        ]
-        
-        # 初始化结果存储
-        education_salary_data = {}
-        
-        # 遍历职位，提取学历要求并计算平均薪资
-        for job in jobs_with_salary:
-            # 计算平均薪资
-            avg_salary = (job.salary_min + job.salary_max) / 2
-            
-            # 从职位描述中提取学历要求
-            education_requirement = None
-            description = job.description or ""
-            
-            # 尝试查找各种学历表述
-            for pattern in education_patterns:
-                if pattern in description:
-                    education_requirement = pattern
-                    break
-            
-            # 如果没有找到明确的学历要求，则标记为"未标明"
-            if not education_requirement:
-                education_requirement = "未标明"
-            
-            # 更新统计数据
-            if education_requirement not in education_salary_data:
-                education_salary_data[education_requirement] = {
-                    'count': 0, 
-                    'total_salary': 0
+        if analysis_types is None:
+            analysis_types = list(ANALYZERS)
+        unknown = [name for name in analysis_types if name not in ANALYZERS]
+        if unknown:
+            raise ValueError(f"未注册的分析类型: {', '.join(unknown)}")
+        context = context or AnalysisContext()
+        if parallelism is None:
+            parallelism = getattr(settings, 'ANALYSIS_PARALLELISM', DEFAULT_ANALYSIS_PARALLELISM)
+        parallelism = max(min(parallelism, len(analysis_types)), 1)
+
+        if parallelism == 1:
+            timed = {name: _timed(ANALYZERS[name].func, context) for name in analysis_types}
+        else:
+            inputs = list(dict.fromkeys(name for analysis_type in analysis_types for name in ANALYZERS[analysis_type].inputs))
+
+            def run(analysis_type):
+                analyzer = ANALYZERS[analysis_type]
+                for name in analyzer.inputs:
+                    input_futures[name].result()
+                return _timed(analyzer.func, context)
+
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='analysis') as executor:
+                input_futures = {
+                    name: executor.submit(_close_connection_after, context.input, name) for name in inputs
                 }
-            
-            education_salary_data[education_requirement]['count'] += 1
-            education_salary_data[education_requirement]['total_salary'] += avg_salary
-        
-        # 计算每种学历要求的平均薪资并格式化结果
-        result = []
-        for edu, data in education_salary_data.items():
-            if data['count'] > 0:
-                avg_salary = round(data['total_salary'] / data['count'])
-                result.append({
-                    'education': edu,
-                    'avg_salary': avg_salary,
-                    'count': data['count']
-                })
-        
-        # 按平均薪资从高到低排序
-        result.sort(key=lambda x: x['avg_salary'], reverse=True)
-        
-        # 如果结果超过10个类别，只保留前10个
-        if len(result) > 10:
-            result = result[:10]
-        
-        return {
-            'categories': [item['education'] for item in result],
-            'data': [item['avg_salary'] for item in result],
-            'counts': [item['count'] for item in result]
-        }
-    
+                futures = {
+                    analysis_type: executor.submit(_close_connection_after, run, analysis_type)
+                    for analysis_type in analysis_types
+                }
+                timed = {analysis_type: future.result() for analysis_type, future in futures.items()}
+
+        results = {}
+        durations = {}
+        for analysis_type, (result, duration) in timed.items():
+            results[analysis_type] = result
+            durations[analysis_type] = duration
+            logger.debug(f"分析 {analysis_type} 完成，耗时 {duration}ms")
+        return results, durations
+
     @classmethod
-    def perform_all_analysis(cls):
+    def perform_all_analysis(cls, full=False, analysis_types=None, parallelism=None):
         """执行所有分析并保存结果
-        
+
+        Args:
+            full: 是否先从职位表全量重建聚合计数和月度薪资汇总，并检查与增量维护的结果是否一致
+            analysis_types: 要执行的分析类型，默认为所有已注册的分析器
+            parallelism: 并行线程数，默认取settings.ANALYSIS_PARALLELISM
+
         Returns:
-            dict: 所有分析结果
+            dict: 分析类型 -> 分析结果
         """
         try:
-            # 分析行业分布
-            industry_distribution = cls.analyze_industry_distribution()
-            JobAnalysis.objects.update_or_create(
-                analysis_type='industry_distribution',
-                defaults={'analysis_data': industry_distribution}
-            )
-            
-            # 分析薪资分布
-            salary_distribution = cls.analyze_salary_distribution()
-            JobAnalysis.objects.update_or_create(
-                analysis_type='salary_distribution',
-                defaults={'analysis_data': salary_distribution}
-            )
-            
-            # 分析地区分布
-            location_distribution = cls.analyze_location_distribution()
-            JobAnalysis.objects.update_or_create(
-                analysis_type='location_distribution',
-                defaults={'analysis_data': location_distribution}
-            )
-            
-            # 分析岗位类型分布
-            job_type_distribution = cls.analyze_job_type_distribution()
-            JobAnalysis.objects.update_or_create(
-                analysis_type='job_type_distribution',
-                defaults={'analysis_data': job_type_distribution}
-            )
-            
-            # 分析不同学历要求的平均薪资分布
-            education_salary_distribution = cls.analyze_education_salary_distribution()
-            JobAnalysis.objects.update_or_create(
-                analysis_type='education_salary_distribution',
-                defaults={'analysis_data': education_salary_distribution}
-            )
-            
-            logger.info("所有数据分析完成并保存")
-            
-            return {
-                'industry_distribution': industry_distribution,
-                'salary_distribution': salary_distribution,
-                'location_distribution': location_distribution,
-                'job_type_distribution': job_type_distribution,
-                'education_salary_distribution': education_salary_distribution
-            }
+            if full:
+                mismatches = rebuild_aggregates()
+                if mismatches:
+                    logger.warning(f"增量聚合计数与全量重建结果有 {len(mismatches)} 处不一致，已按重建结果修正")
+                rollup_mismatches = rebuild_salary_rollups()
+                if rollup_mismatches:
+                    logger.warning(f"增量月度薪资汇总与全量重建结果有 {len(rollup_mismatches)} 行不一致，已按重建结果修正")
+
+            started = time.perf_counter()
+            results, timings = cls.run_analyzers(analysis_types, parallelism=parallelism)
+            elapsed = (time.perf_counter() - started) * 1000
+            publish_analyses(results, timings)
+
+            logger.info(f"所有数据分析完成并保存，共 {len(results)} 项，总耗时 {elapsed:.1f}ms")
+            return results
         except Exception as e:
             logger.error(f"执行数据分析时出错: {e}")
-            raise 
\ No newline at end of file
+            raise
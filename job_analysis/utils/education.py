@@ -0,0 +1,57 @@
+import re
+from .text_matcher import KeywordMatcher
+
+# 未能识别学历要求时的学历层次
+EDUCATION_UNSPECIFIED = '未标明'
+
+# 规范化的学历层次及其常见表述，层次按优先级从高到低排列
+EDUCATION_LEVELS = {
+    '博士及以上': ['博士及以上', '博士', '博士学历'],
+    '硕士及以上': ['硕士及以上', '硕士', '硕士学历', '研究生及以上', '研究生', '研究生学历'],
+    '本科及以上': ['本科及以上', '本科', '本科学历', '大学本科'],
+    '专科': ['大专及以上', '大专', '专科', '专科及以上'],
+    '高中': ['高中及以上', '高中', '中专及以上', '中专', '职高'],
+    '初中': ['初中及以上', '初中'],
+    EDUCATION_UNSPECIFIED: ['学历不限', '不限'],
+}
+
+# 结构化学历字段的匹配器
+EDUCATION_MATCHER = KeywordMatcher(
+    (keyword, level) for level, keywords in EDUCATION_LEVELS.items() for keyword in keywords
+)
+
+# 自由文本的匹配器，文本中单独的"不限"可能指性别、专业等，不作为学历表述
+TEXT_MATCHER = KeywordMatcher(
+    (keyword, level) for level, keywords in EDUCATION_LEVELS.items() for keyword in keywords if keyword != '不限'
+)
+
+# 提取器拼接到职位描述中的结构化学历行，如"学历要求：本科"
+_STRUCTURED_LINE_RE = re.compile(r'学历要求：([^\n]*)')
+
+def normalize_education(structured=None, *texts):
+    """规范化职位的学历要求
+
+    结构化学历字段（如接口的xueli_id_name）优先，无法识别时再在描述、要求等文本中查找优先级最高的表述。
+
+    Args:
+        structured: 结构化的学历字段
+        texts: 职位描述、职位要求等文本
+
+    Returns:
+        str: EDUCATION_LEVELS中的学历层次，都无法识别时为"未标明"
+    """
+    if structured:
+        level = EDUCATION_MATCHER.match(structured)
+        if level:
+            return level
+    level = TEXT_MATCHER.match(*texts)
+    return level or EDUCATION_UNSPECIFIED
+
+def structured_education(description):
+    """从职位描述中取出提取器写入的结构化学历行
+
+    Returns:
+        str: 学历要求的原始值，没有该行时为None
+    """
+    match = _STRUCTURED_LINE_RE.search(description or '')
+    return match.group(1).strip() if match else None
@@ -0,0 +1,33 @@
+import hashlib
+import re
+
+# 参与内容指纹计算的字段，顺序固定以保证指纹稳定
+# 包括公司名称、行业和学历要求，这些字段变化时职位需要重新写入并更新聚合计数
+FINGERPRINT_FIELDS = (
+    'title', 'company_name', 'industry', 'job_type', 'salary_min', 'salary_max', 'province', 'city',
+    'description', 'requirement', 'education_level', 'publish_date'
+)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _normalize(value):
+    """把字段值规范化为字符串：None视为空串，合并连续空白"""
+    if value is None:
+        return ''
+    return _WHITESPACE_RE.sub(' ', str(value)).strip()
+
+def compute_content_hash(job):
+    """计算职位内容指纹
+    
+    对标题、公司、薪资、地区、描述、要求、学历、标签等字段规范化后做SHA-1，
+    字段内容不变时指纹不变，可用于跳过未变化职位的写入。
+    
+    Args:
+        job: 带有上述字段属性的对象，如JobRecord
+        
+    Returns:
+        str: 40位十六进制指纹
+    """
+    parts = [_normalize(getattr(job, field)) for field in FINGERPRINT_FIELDS]
+    parts.append('|'.join(sorted(_normalize(tag) for tag in job.tags or [])))
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
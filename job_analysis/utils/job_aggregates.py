@@ -0,0 +1,334 @@
+import logging
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from ..models import Company, Job, JobAggregate
+from .aggregation import OTHER_LABEL, SALARY_MIN_BUCKETS
+from .education import EDUCATION_UNSPECIFIED
+
+logger = logging.getLogger(__name__)
+
+# 按字段分组的维度：维度名 -> 职位字段
+FIELD_DIMENSIONS = {
+    'industry': 'company__industry',
+    'province': 'province',
+    'job_type': 'job_type',
+    'education': 'education_level',
+}
+
+# 城市维度，以所属省份为上级取值
+CITY_DIMENSION = 'city'
+
+# 薪资区间维度：维度名 -> (区间, 分桶依据)，只统计最低和最高薪资都有的职位
+BUCKET_DIMENSIONS = {
+    'salary_min_bucket': (SALARY_MIN_BUCKETS, 'salary_min'),
+}
+
+# 计算职位所属聚合键和月度薪资汇总需要的字段
+STATE_FIELDS = (
+    'province', 'city', 'job_type', 'company__industry', 'education_level', 'salary_min', 'salary_max', 'publish_date'
+)
+
+def job_keys(state):
+    """职位计入的聚合键
+
+    Args:
+        state: 以STATE_FIELDS为键的职位字段值
+
+    Returns:
+        list: (维度, 上级取值, 取值)列表，空取值不计入
+    """
+    keys = []
+    for dimension, field in FIELD_DIMENSIONS.items():
+        value = state.get(field)
+        if dimension == 'education':
+            value = value or EDUCATION_UNSPECIFIED
+        if value:
+            keys.append((dimension, '', value))
+
+    province = state.get('province')
+    city = state.get('city')
+    if province and city:
+        keys.append((CITY_DIMENSION, province, city))
+
+    salary_min = state.get('salary_min')
+    salary_max = state.get('salary_max')
+    if salary_min is not None and salary_max is not None:
+        for dimension, (buckets, basis) in BUCKET_DIMENSIONS.items():
+            for bucket in buckets:
+                if bucket.contains(state[basis]):
+                    keys.append((dimension, '', bucket.label))
+                    break
+    return keys
+
+def lock_job_states(queryset, *fields):
+    """锁定职位行并取出计算聚合键需要的字段
+
+    公司行业另用一条查询取出，避免连表时连带锁定公司行，多个进程写入同一公司的职位时不会互相等待。
+    应在事务中调用。
+
+    Args:
+        queryset: 需要锁定的职位
+        fields: 额外取出的职位字段
+
+    Returns:
+        list: (额外字段取值元组, 以STATE_FIELDS为键的职位字段值)列表
+    """
+    job_fields = [field for field in STATE_FIELDS if field != 'company__industry']
+    offset = len(fields)
+    rows = list(queryset.select_for_update().values_list(*fields, 'company_id', *job_fields))
+    industries = dict(
+        Company.objects.filter(id__in={row[offset] for row in rows}).values_list('id', 'industry')
+    )
+
+    result = []
+    for row in rows:
+        state = dict(zip(job_fields, row[offset + 1:]))
+        state['company__industry'] = industries.get(row[offset])
+        result.append((row[:offset], state))
+    return result
+
+
+class AggregateDelta:
+    """一批职位变化对聚合计数的差量
+
+    新增或恢复在招的职位按新状态累加，更新的职位先减去旧状态，下架的职位减去旧状态，
+    同一个键的变化合并后一次写入。
+    """
+
+    def __init__(self):
+        self.changes = {}
+
+    def add(self, state, sign=1):
+        """累加一个职位的贡献
+
+        Args:
+            state: 以STATE_FIELDS为键的职位字段值
+            sign: 1表示计入，-1表示移除
+        """
+        salary_min = state.get('salary_min')
+        salary_max = state.get('salary_max')
+        has_salary = salary_min is not None and salary_max is not None
+        salary_total = salary_min + salary_max if has_salary else 0
+        for key in job_keys(state):
+            change = self.changes.get(key)
+            if change is None:
+                change = self.changes[key] = [0, 0, 0]
+            change[0] += sign
+            change[1] += sign if has_salary else 0
+            change[2] += sign * salary_total
+
+    def remove(self, state):
+        self.add(state, -1)
+
+    def apply(self):
+        """把差量写入聚合表
+
+        缺少的键先以零值插入，再锁定涉及的行按差量更新，多个进程并发入库时不会丢失更新。
+        应在写入职位的同一事务中调用。
+
+        Returns:
+            int: 更新的聚合行数
+        """
+        changes = {key: change for key, change in self.changes.items() if any(change)}
+        self.changes = {}
+        if not changes:
+            return 0
+
+        with transaction.atomic():
+            JobAggregate.objects.bulk_create(
+                [JobAggregate(dimension=dimension, parent=parent, key=key) for dimension, parent, key in changes],
+                ignore_conflicts=True
+            )
+            rows = JobAggregate.objects.select_for_update().filter(
+                dimension__in={key[0] for key in changes},
+                key__in={key[2] for key in changes}
+            ).order_by('pk')
+
+            now = timezone.now()
+            updated = []
+            for row in rows:
+                change = changes.get((row.dimension, row.parent, row.key))
+                if change is None:
+                    continue
+                row.job_count += change[0]
+                row.salary_count += change[1]
+                row.salary_total += change[2]
+                row.updated_at = now
+                updated.append(row)
+            JobAggregate.objects.bulk_update(updated, ['job_count', 'salary_count', 'salary_total', 'updated_at'])
+        return len(updated)
+
+
+def compute_aggregates(queryset=None):
+    """用分组查询从职位表重新计算所有聚合计数
+
+    每个字段维度一条GROUP BY查询，薪资区间维度各用一条条件聚合查询。
+
+    Args:
+        queryset: 参与统计的职位，默认为所有在招职位
+
+    Returns:
+        dict: (维度, 上级取值, 取值) -> [职位数, 有薪资的职位数, 薪资累计]
+    """
+    if queryset is None:
+        queryset = Job.objects.active()
+    has_salary = Q(salary_min__isnull=False, salary_max__isnull=False)
+    counters = {
+        'job_count': Count('pk'),
+        'salary_count': Count('pk', filter=has_salary),
+        'salary_total': Sum(F('salary_min') + F('salary_max'), filter=has_salary),
+    }
+
+    result = {}
+
+    def add(key, job_count, salary_count, salary_total):
+        total = result.setdefault(key, [0, 0, 0])
+        total[0] += job_count
+        total[1] += salary_count
+        total[2] += salary_total or 0
+
+    for dimension, field in FIELD_DIMENSIONS.items():
+        for row in queryset.values_list(field).annotate(**counters).order_by():
+            value = row[0]
+            if dimension == 'education':
+                value = value or EDUCATION_UNSPECIFIED
+            if value:
+                add((dimension, '', value), *row[1:])
+
+    for row in queryset.values_list('province', 'city').annotate(**counters).order_by():
+        if row[0] and row[1]:
+            add((CITY_DIMENSION, row[0], row[1]), *row[2:])
+
+    salaried = queryset.filter(has_salary)
+    for dimension, (buckets, basis) in BUCKET_DIMENSIONS.items():
+        aggregates = {}
+        for index, bucket in enumerate(buckets):
+            condition = bucket.condition(basis)
+            aggregates[f'count_{index}'] = Count('pk', filter=condition)
+            aggregates[f'total_{index}'] = Sum(F('salary_min') + F('salary_max'), filter=condition)
+        row = salaried.aggregate(**aggregates)
+        for index, bucket in enumerate(buckets):
+            count = row[f'count_{index}']
+            if count:
+                add((dimension, '', bucket.label), count, count, row[f'total_{index}'])
+
+    return result
+
+def rebuild_aggregates():
+    """全量重建聚合表，并报告与重建前计数不一致的键
+
+    先锁定所有聚合行再重新计算，并发入库的差量会在重建提交后再应用到新计数上。
+    不再维护的维度的聚合行直接删除。
+
+    Returns:
+        list: (键, 重建前的计数, 重新计算的计数)列表，计数为[职位数, 有薪资的职位数, 薪资累计]
+    """
+    with transaction.atomic():
+        stored = {
+            (row.dimension, row.parent, row.key): row
+            for row in JobAggregate.objects.select_for_update().order_by('pk')
+        }
+        fresh = compute_aggregates()
+
+        maintained = {*FIELD_DIMENSIONS, CITY_DIMENSION, *BUCKET_DIMENSIONS}
+        retired = [row.pk for key, row in stored.items() if key[0] not in maintained]
+        if retired:
+            JobAggregate.objects.filter(pk__in=retired).delete()
+        stored = {key: row for key, row in stored.items() if key[0] in maintained}
+
+        mismatches = []
+        now = timezone.now()
+        updated = []
+        for key, row in stored.items():
+            counts = fresh.get(key, [0, 0, 0])
+            current = [row.job_count, row.salary_count, row.salary_total]
+            if current != counts:
+                mismatches.append((key, current, counts))
+                row.job_count, row.salary_count, row.salary_total = counts
+                row.updated_at = now
+                updated.append(row)
+        JobAggregate.objects.bulk_update(updated, ['job_count', 'salary_count', 'salary_total', 'updated_at'])
+
+        created = []
+        for key, counts in fresh.items():
+            if key not in stored:
+                mismatches.append((key, [0, 0, 0], counts))
+                created.append(JobAggregate(
+                    dimension=key[0], parent=key[1], key=key[2],
+                    job_count=counts[0], salary_count=counts[1], salary_total=counts[2]
+                ))
+        JobAggregate.objects.bulk_create(created)
+
+    if mismatches:
+        logger.warning(f"聚合计数重建完成，{len(mismatches)} 个键与重建前不一致")
+    else:
+        logger.info("聚合计数重建完成，与重建前一致")
+    return mismatches
+
+def load_aggregates():
+    """一次查询读取所有职位数大于0的聚合行
+
+    Returns:
+        dict: 维度 -> JobAggregate列表
+    """
+    dimensions = {}
+    for row in JobAggregate.objects.filter(job_count__gt=0):
+        dimensions.setdefault(row.dimension, []).append(row)
+    return dimensions
+
+def top_chart(rows, top=None):
+    """把聚合行按职位数降序转换为图表数据，超出前top项的部分合并为"其他"
+
+    Returns:
+        dict: 包含categories和data
+    """
+    rows = sorted(rows, key=lambda row: (-row.job_count, row.key))
+    kept = rows if top is None else rows[:top]
+    chart = {
+        'categories': [row.key for row in kept],
+        'data': [row.job_count for row in kept],
+    }
+    rest = rows[len(kept):]
+    if rest:
+        chart['categories'].append(OTHER_LABEL)
+        chart['data'].append(sum(row.job_count for row in rest))
+    return chart
+
+def bucket_chart(dimension, rows):
+    """按区间顺序生成薪资区间维度的图表数据"""
+    counts = {row.key: row.job_count for row in rows}
+    buckets = BUCKET_DIMENSIONS[dimension][0]
+    return {
+        'categories': [bucket.label for bucket in buckets],
+        'data': [counts.get(bucket.label, 0) for bucket in buckets],
+    }
+
+def location_chart_from_aggregates(province_rows, city_rows, province_top=None, city_top=None):
+    """由省份和城市聚合行生成地区分布，只展开省份图表中列出的省份
+
+    Returns:
+        dict: province为省份分布，city为省份 -> 城市分布
+    """
+    province = top_chart(province_rows, province_top)
+    cities = {}
+    for row in city_rows:
+        cities.setdefault(row.parent, []).append(row)
+    return {
+        'province': province,
+        'city': {
+            name: top_chart(cities[name], city_top)
+            for name in province['categories'] if name in cities
+        }
+    }
+
+def education_salary_rows(rows):
+    """各学历层次的平均薪资
+
+    Returns:
+        list: 每个学历层次一项，包含education、avg_salary（浮点数）和count（有薪资的职位数）
+    """
+    return [
+        {'education': row.key, 'avg_salary': row.salary_total / 2 / row.salary_count, 'count': row.salary_count}
+        for row in rows if row.salary_count > 0
+    ]
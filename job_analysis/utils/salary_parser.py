@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+
+# 数量单位换算
+UNIT_MULTIPLIERS = {
+    '': 1,
+    'k': 1000,
+    '千': 1000,
+    'w': 10000,
+    '万': 10000,
+}
+
+# 只有下限或上限时估算另一端的系数，与历史数据保持一致
+OPEN_UPPER_FACTOR = 1.5
+OPEN_LOWER_FACTOR = 0.7
+
+# 表示面议的文本
+NEGOTIABLE = {'面议', '薪资面议', '薪酬面议'}
+
+_SALARY_RE = re.compile(
+    r'''
+    ^(?P<low>\d+(?:\.\d+)?)(?P<low_unit>[k千w万]?)元?
+    (?:[-~～至—–](?P<high>\d+(?:\.\d+)?)(?P<high_unit>[k千w万]?)元?)?
+    (?P<bound>以上|以下)?
+    (?:(?:/|每)?(?P<period>月|年))?
+    (?P<trailing_bound>以上|以下)?$
+    ''',
+    re.VERBOSE
+)
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def parse_salary(salary_text):
+    """单次正则匹配解析薪资文本
+
+    支持"8K-12K"、"8-12k"、"8000-12000元/月"、"3000以上"、"5K以下"、
+    "10-15万/年"、"面议"等格式，年薪折算为月薪。相同文本在大量职位中反复出现，
+    结果会被缓存。
+
+    Args:
+        salary_text: 薪资文本
+
+    Returns:
+        tuple: (最低薪资, 最高薪资)，单位为元/月，均为整数；无法解析或面议时为(None, None)
+    """
+    if not salary_text:
+        return None, None
+
+    text = _SPACES_RE.sub('', str(salary_text)).lower()
+    if text in NEGOTIABLE:
+        return None, None
+
+    match = _SALARY_RE.match(text)
+    if not match:
+        return None, None
+
+    high_unit = match.group('high_unit') or ''
+    low_unit = match.group('low_unit') or ''
+    # "8-12K"这类写法只在上限标注单位，下限数字小于上限数字时沿用上限的单位；
+    # "5000-1万"这类两端单位不同的写法，下限数字已经是元
+    if not low_unit and match.group('high') is not None and float(match.group('low')) < float(match.group('high')):
+        low_unit = high_unit
+    period_divisor = 12 if match.group('period') == '年' else 1
+
+    low = float(match.group('low')) * UNIT_MULTIPLIERS[low_unit] / period_divisor
+    if match.group('high') is not None:
+        high = float(match.group('high')) * UNIT_MULTIPLIERS[high_unit] / period_divisor
+        return int(low), int(high)
+
+    bound = match.group('bound') or match.group('trailing_bound')
+    if bound == '以上':
+        return int(low), int(low * OPEN_UPPER_FACTOR)
+    if bound == '以下':
+        return int(low * OPEN_LOWER_FACTOR), int(low)
+    return int(low), int(low)
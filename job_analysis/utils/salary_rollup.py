@@ -0,0 +1,299 @@
+import logging
+import math
+from datetime import datetime
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from ..models import Job, SalaryMonthlyRollup
+
+logger = logging.getLogger(__name__)
+
+# 分位数估算的相对误差，分桶边界按(1+α)/(1-α)的等比数列划分
+SKETCH_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+# 汇总行中参与差量计算的计数字段
+ROLLUP_COUNTERS = ('job_count', 'salary_count', 'salary_min_total', 'salary_max_total')
+
+def sketch_index(value):
+    """薪资所属的对数分桶编号，小于1的薪资计入编号0"""
+    return math.ceil(math.log(value) / _LOG_GAMMA) if value > 1 else 0
+
+def sketch_value(index):
+    """分桶的代表值，与桶内任意取值的相对误差不超过SKETCH_ACCURACY"""
+    return 2 * _GAMMA ** index / (_GAMMA + 1) if index > 0 else 1
+
+def merge_sketches(sketches):
+    """合并多个分桶计数
+
+    Args:
+        sketches: 分桶计数字典序列，键为分桶编号（JSON中为字符串）
+
+    Returns:
+        dict: 分桶编号(int) -> 计数，不含计数为0的桶
+    """
+    merged = {}
+    for sketch in sketches:
+        for index, count in sketch.items():
+            merged[int(index)] = merged.get(int(index), 0) + count
+    return {index: count for index, count in merged.items() if count}
+
+def sketch_quantile(sketch, quantile):
+    """由分桶计数估算分位数
+
+    Args:
+        sketch: 分桶编号 -> 计数
+        quantile: 0到1之间的分位点
+
+    Returns:
+        int: 分位数估算值，没有数据时为None
+    """
+    bins = sorted((int(index), count) for index, count in sketch.items() if count > 0)
+    total = sum(count for _, count in bins)
+    if not total:
+        return None
+    rank = quantile * (total - 1)
+    seen = 0
+    for index, count in bins:
+        seen += count
+        if seen > rank:
+            return round(sketch_value(index))
+    return round(sketch_value(bins[-1][0]))
+
+def rollup_key(state):
+    """职位计入的汇总键，岗位类型或发布日期缺失时为None
+
+    Args:
+        state: 包含job_type、publish_date的职位字段值
+
+    Returns:
+        tuple: (岗位类型, 发布月份第一天)
+    """
+    job_type = state.get('job_type')
+    published = state.get('publish_date')
+    if not job_type or published is None:
+        return None
+    return job_type, published.replace(day=1)
+
+
+class SalaryRollupDelta:
+    """一批职位变化对月度薪资汇总的差量
+
+    计数、薪资累计和分桶计数按差量相加；最值只随新增职位扩大，更新职位时旧薪资不从最值中移除，
+    表示该月出现过的薪资范围，全量重建时按当前数据精确重算。
+    """
+
+    def __init__(self):
+        self.changes = {}
+
+    def add(self, state, sign=1):
+        """累加一个职位的贡献
+
+        Args:
+            state: 包含job_type、publish_date、salary_min、salary_max的职位字段值
+            sign: 1表示计入，-1表示移除
+        """
+        key = rollup_key(state)
+        if key is None:
+            return
+        change = self.changes.get(key)
+        if change is None:
+            change = self.changes[key] = {'counters': [0, 0, 0, 0], 'low': None, 'high': None, 'sketch': {}}
+        counters = change['counters']
+        counters[0] += sign
+
+        salary_min = state.get('salary_min')
+        salary_max = state.get('salary_max')
+        if salary_min is None or salary_max is None:
+            return
+        counters[1] += sign
+        counters[2] += sign * salary_min
+        counters[3] += sign * salary_max
+        index = sketch_index((salary_min + salary_max) / 2)
+        change['sketch'][index] = change['sketch'].get(index, 0) + sign
+        if sign > 0:
+            change['low'] = salary_min if change['low'] is None else min(change['low'], salary_min)
+            change['high'] = salary_max if change['high'] is None else max(change['high'], salary_max)
+
+    def remove(self, state):
+        self.add(state, -1)
+
+    def apply(self):
+        """把差量写入汇总表
+
+        缺少的汇总行先以零值插入，再锁定涉及的行按差量更新，多个进程并发入库时不会丢失更新。
+        应在写入职位的同一事务中调用。
+
+        Returns:
+            int: 更新的汇总行数
+        """
+        changes = {
+            key: change for key, change in self.changes.items()
+            if any(change['counters']) or any(change['sketch'].values()) or change['low'] is not None
+        }
+        self.changes = {}
+        if not changes:
+            return 0
+
+        with transaction.atomic():
+            SalaryMonthlyRollup.objects.bulk_create(
+                [SalaryMonthlyRollup(job_type=job_type, month=month) for job_type, month in changes],
+                ignore_conflicts=True
+            )
+            rows = SalaryMonthlyRollup.objects.select_for_update().filter(
+                job_type__in={key[0] for key in changes},
+                month__in={key[1] for key in changes}
+            ).order_by('pk')
+
+            now = timezone.now()
+            updated = []
+            for row in rows:
+                change = changes.get((row.job_type, row.month))
+                if change is None:
+                    continue
+                for field, delta in zip(ROLLUP_COUNTERS, change['counters']):
+                    setattr(row, field, getattr(row, field) + delta)
+                if change['low'] is not None:
+                    row.salary_min_low = change['low'] if row.salary_min_low is None else min(row.salary_min_low, change['low'])
+                if change['high'] is not None:
+                    row.salary_max_high = change['high'] if row.salary_max_high is None else max(row.salary_max_high, change['high'])
+                row.sketch = {str(index): count for index, count in merge_sketches([row.sketch, change['sketch']]).items()}
+                row.updated_at = now
+                updated.append(row)
+            SalaryMonthlyRollup.objects.bulk_update(
+                updated, [*ROLLUP_COUNTERS, 'salary_min_low', 'salary_max_high', 'sketch', 'updated_at']
+            )
+        return len(updated)
+
+
+def compute_rollups(queryset=None):
+    """用一条分组查询从职位表重新计算所有月度薪资汇总
+
+    按岗位类型、发布月份和薪资分组计数，汇总和分桶在内存中完成。
+
+    Args:
+        queryset: 参与统计的职位，默认为所有职位（包括已下架的）
+
+    Returns:
+        dict: (岗位类型, 月份) -> SalaryMonthlyRollup（未保存）
+    """
+    if queryset is None:
+        queryset = Job.objects.all()
+    rows = (
+        queryset.filter(job_type__isnull=False, publish_date__isnull=False).exclude(job_type='')
+        .annotate(month=TruncMonth('publish_date'))
+        .values_list('job_type', 'month', 'salary_min', 'salary_max')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+    rollups = {}
+    for job_type, month, salary_min, salary_max, count in rows:
+        if isinstance(month, datetime):
+            month = month.date()
+        rollup = rollups.get((job_type, month))
+        if rollup is None:
+            rollup = rollups[(job_type, month)] = SalaryMonthlyRollup(job_type=job_type, month=month, sketch={})
+        rollup.job_count += count
+        if salary_min is None or salary_max is None:
+            continue
+        rollup.salary_count += count
+        rollup.salary_min_total += salary_min * count
+        rollup.salary_max_total += salary_max * count
+        rollup.salary_min_low = salary_min if rollup.salary_min_low is None else min(rollup.salary_min_low, salary_min)
+        rollup.salary_max_high = salary_max if rollup.salary_max_high is None else max(rollup.salary_max_high, salary_max)
+        index = str(sketch_index((salary_min + salary_max) / 2))
+        rollup.sketch[index] = rollup.sketch.get(index, 0) + count
+    return rollups
+
+def _rollup_counts(rollup):
+    return [getattr(rollup, field) for field in ROLLUP_COUNTERS], merge_sketches([rollup.sketch])
+
+def rebuild_salary_rollups():
+    """全量重建月度薪资汇总，并报告与重建前不一致的汇总行
+
+    先锁定所有汇总行再重新计算，并发入库的差量会在重建提交后再应用到新汇总上；没有职位的汇总行删除。
+
+    Returns:
+        list: 不一致的(岗位类型, 月份)列表
+    """
+    with transaction.atomic():
+        stored = {
+            (row.job_type, row.month): row
+            for row in SalaryMonthlyRollup.objects.select_for_update().order_by('pk')
+        }
+        fresh = compute_rollups()
+
+        mismatches = []
+        now = timezone.now()
+        updated = []
+        stale = []
+        for key, row in stored.items():
+            rollup = fresh.get(key)
+            if rollup is None:
+                stale.append(row.pk)
+                if row.job_count:
+                    mismatches.append(key)
+                continue
+            # 最值只随新增扩大，与重建结果不同属于预期，只有计数或分桶不同才计为不一致
+            if _rollup_counts(row) != _rollup_counts(rollup):
+                mismatches.append(key)
+            elif (row.salary_min_low, row.salary_max_high) == (rollup.salary_min_low, rollup.salary_max_high):
+                continue
+            for field in (*ROLLUP_COUNTERS, 'salary_min_low', 'salary_max_high', 'sketch'):
+                setattr(row, field, getattr(rollup, field))
+            row.updated_at = now
+            updated.append(row)
+        SalaryMonthlyRollup.objects.filter(pk__in=stale).delete()
+        SalaryMonthlyRollup.objects.bulk_update(
+            updated, [*ROLLUP_COUNTERS, 'salary_min_low', 'salary_max_high', 'sketch', 'updated_at']
+        )
+
+        created = [rollup for key, rollup in fresh.items() if key not in stored]
+        mismatches.extend((rollup.job_type, rollup.month) for rollup in created)
+        SalaryMonthlyRollup.objects.bulk_create(created)
+
+    if mismatches:
+        logger.warning(f"月度薪资汇总重建完成，{len(mismatches)} 行与重建前不一致")
+    else:
+        logger.info("月度薪资汇总重建完成，与重建前一致")
+    return mismatches
+
+def salary_trend(rollups):
+    """把汇总行合并为按月的薪资走势
+
+    同一月份的多行（如多个岗位类型）合并统计，没有薪资数据的月份不列出。月份范围由调用方查询汇总行时限定。
+
+    Args:
+        rollups: SalaryMonthlyRollup序列
+
+    Returns:
+        list: 按月份升序，每项包含date、average_salary、count、job_count、min_salary、max_salary、p25、median、p75
+    """
+    by_month = {}
+    for rollup in rollups:
+        by_month.setdefault(rollup.month, []).append(rollup)
+
+    trend = []
+    for month in sorted(by_month):
+        rows = by_month[month]
+        salary_count = sum(row.salary_count for row in rows)
+        if salary_count <= 0:
+            continue
+        sketch = merge_sketches(row.sketch for row in rows)
+        lows = [row.salary_min_low for row in rows if row.salary_min_low is not None]
+        highs = [row.salary_max_high for row in rows if row.salary_max_high is not None]
+        trend.append({
+            'date': month.strftime('%Y-%m'),
+            'average_salary': int(sum(row.salary_min_total + row.salary_max_total for row in rows) / 2 / salary_count),
+            'count': salary_count,
+            'job_count': sum(row.job_count for row in rows),
+            'min_salary': min(lows) if lows else None,
+            'max_salary': max(highs) if highs else None,
+            'p25': sketch_quantile(sketch, 0.25),
+            'median': sketch_quantile(sketch, 0.5),
+            'p75': sketch_quantile(sketch, 0.75),
+        })
+    return trend
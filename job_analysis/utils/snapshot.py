@@ -0,0 +1,364 @@
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from array import array
+from datetime import date
+import numpy as np
+from django.conf import settings
+from ..models import Job
+from .aggregation import OTHER_LABEL
+
+logger = logging.getLogger(__name__)
+
+# 快照格式版本，列的含义或编码方式变化时递增
+SNAPSHOT_VERSION = 1
+
+# 指向当前快照目录的文件名，导出完成后原子替换
+CURRENT_POINTER = 'CURRENT'
+
+# 字典编码的分类列：列名 -> 职位字段
+CATEGORY_COLUMNS = {
+    'province': 'province',
+    'city': 'city',
+    'job_type': 'job_type',
+    'industry': 'company__industry',
+    'education': 'education_level',
+}
+
+# 缺失值：分类编码和薪资为-1，发布日期为int32最小值
+MISSING = -1
+MISSING_DAY = np.iinfo(np.int32).min
+
+# 发布日期存为距1970-01-01的天数
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 导出时读取的职位字段，顺序与write_snapshot接收的行一致
+SNAPSHOT_FIELDS = ('id', *CATEGORY_COLUMNS.values(), 'salary_min', 'salary_max', 'publish_date', 'tags')
+
+def snapshot_root():
+    """快照根目录，可在settings中通过JOB_SNAPSHOT_DIR配置"""
+    return getattr(settings, 'JOB_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'snapshots'))
+
+def _encode(vocabulary, value):
+    if value in (None, ''):
+        return MISSING
+    code = vocabulary.get(value)
+    if code is None:
+        code = vocabulary[value] = len(vocabulary)
+    return code
+
+def write_snapshot(rows, path):
+    """把职位行写成列式快照目录
+
+    分类列按出现顺序做字典编码为int32，标签编码为每行若干个uint64组成的位图，
+    每列保存为一个.npy文件，读取时可以直接内存映射。
+
+    Args:
+        rows: 按SNAPSHOT_FIELDS顺序的职位字段元组
+        path: 快照目录，不存在时创建
+
+    Returns:
+        int: 写入的行数
+    """
+    vocabularies = {column: {} for column in CATEGORY_COLUMNS}
+    tag_vocabulary = {}
+    ids = array('q')
+    categories = {column: array('i') for column in CATEGORY_COLUMNS}
+    salary_min = array('i')
+    salary_max = array('i')
+    publish_day = array('i')
+    tag_rows = array('q')
+    tag_codes = array('q')
+
+    for row in rows:
+        job_id, *values = row
+        ids.append(job_id)
+        for column, value in zip(CATEGORY_COLUMNS, values):
+            categories[column].append(_encode(vocabularies[column], value))
+        low, high, published, tags = values[len(CATEGORY_COLUMNS):]
+        salary_min.append(MISSING if low is None else low)
+        salary_max.append(MISSING if high is None else high)
+        publish_day.append(MISSING_DAY if published is None else published.toordinal() - EPOCH_ORDINAL)
+        # 标签位图在所有行读完、标签数确定后再生成，这里只记录(行号, 标签编码)
+        for tag in tags or ():
+            if isinstance(tag, str) and tag:
+                tag_rows.append(len(ids) - 1)
+                tag_codes.append(_encode(tag_vocabulary, tag))
+
+    os.makedirs(path, exist_ok=True)
+    count = len(ids)
+    columns = {
+        'id': np.frombuffer(ids, dtype=np.int64) if count else np.empty(0, dtype=np.int64),
+        'salary_min': np.frombuffer(salary_min, dtype=np.int32) if count else np.empty(0, dtype=np.int32),
+        'salary_max': np.frombuffer(salary_max, dtype=np.int32) if count else np.empty(0, dtype=np.int32),
+        'publish_day': np.frombuffer(publish_day, dtype=np.int32) if count else np.empty(0, dtype=np.int32),
+    }
+    for column, codes in categories.items():
+        columns[column] = np.frombuffer(codes, dtype=np.int32) if count else np.empty(0, dtype=np.int32)
+
+    words = max((len(tag_vocabulary) + 63) // 64, 1)
+    tag_bits = np.zeros((count, words), dtype=np.uint64)
+    if tag_codes:
+        codes = np.frombuffer(tag_codes, dtype=np.int64)
+        np.bitwise_or.at(
+            tag_bits,
+            (np.frombuffer(tag_rows, dtype=np.int64), codes >> 6),
+            np.left_shift(np.uint64(1), (codes & 63).astype(np.uint64))
+        )
+    columns['tags'] = tag_bits
+
+    for column, values in columns.items():
+        np.save(os.path.join(path, f'{column}.npy'), values)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'rows': count,
+        'created_at': time.time(),
+        'categories': {column: list(vocabulary) for column, vocabulary in vocabularies.items()},
+        'tags': list(tag_vocabulary),
+    }
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return count
+
+def export_snapshot(root=None, chunk_size=5000, keep=2):
+    """把在招职位导出为新的快照，并切换为当前快照
+
+    每次导出写入新的目录，写完后原子替换CURRENT指针，正在读取旧快照的进程不受影响；
+    只保留最近keep个快照目录。
+
+    Args:
+        root: 快照根目录，默认为snapshot_root()
+        chunk_size: 从数据库流式读取的批大小
+        keep: 保留的快照目录数
+
+    Returns:
+        tuple: (快照目录, 行数)
+    """
+    root = root or snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    # 目录名按时间排序，纳秒和进程号保证同一秒内多次导出不会写入同一目录
+    name = time.strftime('snapshot-%Y%m%d-%H%M%S') + f'-{time.time_ns() % 10**9:09d}-{os.getpid()}'
+    path = os.path.join(root, name)
+
+    rows = Job.objects.active().order_by('pk').values_list(*SNAPSHOT_FIELDS).iterator(chunk_size=chunk_size)
+    count = write_snapshot(rows, path)
+
+    pointer = os.path.join(root, CURRENT_POINTER)
+    with open(pointer + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(pointer + '.tmp', pointer)
+    logger.info(f"职位快照导出完成：{path}，共 {count} 行")
+
+    snapshots = sorted(entry for entry in os.listdir(root) if entry.startswith('snapshot-'))
+    for stale in snapshots[:-max(keep, 1)]:
+        if stale != name:
+            shutil.rmtree(os.path.join(root, stale), ignore_errors=True)
+    return path, count
+
+def _chart(labels, counts, top=None):
+    """按计数降序、取值升序生成图表数据，超出前top项的部分合并为"其他"，计数为0的类别不列出"""
+    order = sorted(np.flatnonzero(counts), key=lambda index: (-counts[index], labels[index]))
+    kept = order if top is None else order[:top]
+    chart = {
+        'categories': [labels[index] for index in kept],
+        'data': [int(counts[index]) for index in kept],
+    }
+    rest = int(sum(counts[index] for index in order[len(kept):]))
+    if rest:
+        chart['categories'].append(OTHER_LABEL)
+        chart['data'].append(rest)
+    return chart
+
+
+class JobSnapshot:
+    """内存映射的职位列式快照
+
+    各列以只读方式内存映射，多个进程打开同一快照时共享操作系统的页缓存，不复制数据。
+    分析方法都是NumPy向量化运算，可以传入mask()生成的布尔数组只统计部分职位。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"快照版本 {self.meta['version']} 与当前版本 {SNAPSHOT_VERSION} 不兼容，请重新导出")
+        self.labels = self.meta['categories']
+        self.tags = self.meta['tags']
+        self.columns = {
+            name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+            for name in os.listdir(path) if name.endswith('.npy')
+        }
+
+    @classmethod
+    def load(cls, root=None):
+        """打开CURRENT指向的当前快照
+
+        Raises:
+            FileNotFoundError: 尚未导出快照
+        """
+        root = root or snapshot_root()
+        with open(os.path.join(root, CURRENT_POINTER), encoding='utf-8') as f:
+            return cls(os.path.join(root, f.read().strip()))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def code(self, column, value):
+        """分类取值的编码，快照中没有该取值时为None"""
+        try:
+            return self.labels[column].index(value)
+        except ValueError:
+            return None
+
+    def mask(self, tag=None, published_from=None, published_to=None, salaried=False, **categories):
+        """按条件生成行掩码
+
+        Args:
+            tag: 必须包含的标签
+            published_from: 发布日期下界（含）
+            published_to: 发布日期上界（含）
+            salaried: 是否只保留最低、最高薪资都有的职位
+            categories: 分类列条件，取值为单个值或值列表，如province='四川'
+
+        Returns:
+            numpy.ndarray: 布尔数组
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, values in categories.items():
+            if column not in CATEGORY_COLUMNS:
+                raise ValueError(f"未知的分类列: {column}")
+            if isinstance(values, str):
+                values = [values]
+            codes = [code for code in (self.code(column, value) for value in values) if code is not None]
+            mask &= np.isin(self[column], codes)
+        if tag is not None:
+            code = self.tags.index(tag) if tag in self.tags else None
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= (self['tags'][:, code >> 6] & np.uint64(1 << (code & 63))) != 0
+        if published_from is not None:
+            mask &= self['publish_day'] >= published_from.toordinal() - EPOCH_ORDINAL
+        if published_to is not None:
+            mask &= (self['publish_day'] != MISSING_DAY) & (self['publish_day'] <= published_to.toordinal() - EPOCH_ORDINAL)
+        if salaried:
+            mask &= (self['salary_min'] != MISSING) & (self['salary_max'] != MISSING)
+        return mask
+
+    def category_counts(self, column, mask=None):
+        """各分类取值的行数
+
+        Returns:
+            numpy.ndarray: 按编码索引的计数，缺失值不计入
+        """
+        codes = self[column] if mask is None else self[column][mask]
+        return np.bincount(codes[codes != MISSING], minlength=len(self.labels[column]))
+
+    def count_by(self, column, mask=None, top=None):
+        """分类列的分布图表数据，超出前top项的部分合并为"其他" """
+        return _chart(self.labels[column], self.category_counts(column, mask), top)
+
+    def group_by(self, columns, mask=None):
+        """按多个分类列分组计数，任一列缺失的行不计入
+
+        多列编码合并为一个整数键后用np.unique计数，只生成实际出现的分组，内存与分组数有关，
+        与各列取值数的乘积无关；取值数的乘积超出int64范围时改为按行对编码矩阵去重。
+
+        Returns:
+            dict: 取值元组 -> 计数
+        """
+        if not columns:
+            return {}
+        sizes = [len(self.labels[column]) for column in columns]
+        keep = np.ones(len(self), dtype=bool) if mask is None else mask.copy()
+        for column in columns:
+            keep &= self[column] != MISSING
+
+        if math.prod(sizes) <= np.iinfo(np.int64).max:
+            key = np.zeros(int(keep.sum()), dtype=np.int64)
+            for column, size in zip(columns, sizes):
+                key = key * size + self[column][keep]
+            flat, counts = np.unique(key, return_counts=True)
+            groups = zip(*np.unravel_index(flat, sizes))
+        else:
+            rows = np.stack([self[column][keep].astype(np.int64) for column in columns], axis=1)
+            groups, counts = np.unique(rows, axis=0, return_counts=True)
+
+        return {
+            tuple(self.labels[column][code] for column, code in zip(columns, group)): int(count)
+            for group, count in zip(groups, counts)
+        }
+
+    def salary_values(self, value='salary_min', mask=None):
+        """有薪资职位的薪资数组
+
+        Args:
+            value: salary_min、salary_max或salary_avg（最低、最高薪资的平均值）
+        """
+        mask = self.mask(salaried=True) if mask is None else mask & self.mask(salaried=True)
+        if value == 'salary_avg':
+            return (self['salary_min'][mask].astype(np.float64) + self['salary_max'][mask]) / 2
+        return self[value][mask]
+
+    def histogram(self, buckets, value='salary_min', mask=None):
+        """按区间统计有薪资职位的数量
+
+        Args:
+            buckets: Bucket序列
+            value: 参与分桶的薪资，见salary_values()
+
+        Returns:
+            dict: 包含categories（区间名称）和data（职位数）
+        """
+        values = self.salary_values(value, mask)
+        data = []
+        for bucket in buckets:
+            selected = np.ones(len(values), dtype=bool)
+            if bucket.lower is not None:
+                selected &= values >= bucket.lower
+            if bucket.upper is not None:
+                selected &= values < bucket.upper
+            data.append(int(selected.sum()))
+        return {'categories': [bucket.label for bucket in buckets], 'data': data}
+
+    def average_salary_by(self, column, mask=None):
+        """各分类取值的平均薪资（最低、最高薪资平均值的均值）
+
+        Returns:
+            dict: 取值 -> {'avg_salary': 平均薪资, 'count': 有薪资的职位数}
+        """
+        mask = self.mask(salaried=True) if mask is None else mask & self.mask(salaried=True)
+        mask &= self[column] != MISSING
+        codes = self[column][mask]
+        average = (self['salary_min'][mask].astype(np.float64) + self['salary_max'][mask]) / 2
+        size = len(self.labels[column])
+        counts = np.bincount(codes, minlength=size)
+        totals = np.bincount(codes, weights=average, minlength=size)
+        return {
+            self.labels[column][code]: {'avg_salary': float(totals[code] / counts[code]), 'count': int(counts[code])}
+            for code in np.flatnonzero(counts)
+        }
+
+    def tag_counts(self, mask=None, top=None):
+        """各标签的职位数
+
+        位图按字节拆开，每个字节列用一次bincount统计256种取值的出现次数，再乘以取值到各位的展开表，
+        只扫描标签实际占用的字节。
+        """
+        bits = self['tags'] if mask is None else self['tags'][mask]
+        byte_columns = np.ascontiguousarray(bits).astype('<u8', copy=False).view(np.uint8).reshape(len(bits), -1)
+        bit_table = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder='little').astype(np.int64)
+        used_bytes = (len(self.tags) + 7) // 8
+        counts = np.zeros(used_bytes * 8, dtype=np.int64)
+        for index in range(used_bytes):
+            histogram = np.bincount(byte_columns[:, index], minlength=256)
+            counts[index * 8:index * 8 + 8] = histogram @ bit_table
+        return _chart(self.tags, counts[:len(self.tags)], top)
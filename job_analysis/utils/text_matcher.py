@@ -0,0 +1,108 @@
+import re
+from collections import deque
+
+class KeywordMatcher:
+    """Aho-Corasick多模式匹配器，一次扫描找出文本中优先级最高的关键词
+
+    关键词编译为完整的状态转移表，每个状态预先记录以该状态结尾的所有关键词（含失败链上的后缀）
+    中的最高优先级，扫描时每个字符只做一次查表。文本中大部分字符不是任何关键词的首字，
+    用关键词首字组成的正则字符类在C层跳过这些字符，自动机退回根状态后再跳到下一个候选位置，
+    结果与逐字符扫描相同。
+    """
+
+    _NO_MATCH = float('inf')
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: 按优先级从高到低排列的(关键词, 取值)序列，同一关键词以首次出现为准
+        """
+        self.values = []
+        goto = [{}]
+        priority = [self._NO_MATCH]
+        for keyword, value in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto.append({})
+                    priority.append(self._NO_MATCH)
+                    goto[state][char] = next_state
+                state = next_state
+            if priority[state] == self._NO_MATCH:
+                priority[state] = len(self.values)
+                self.values.append(value)
+
+        # 按广度优先顺序计算失败链接，并把转移补全为完整的状态转移表
+        fail = [0] * len(goto)
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            failure = fail[state]
+            # 后缀上的关键词同样出现在文本中，取两者中更高的优先级
+            priority[state] = min(priority[state], priority[failure])
+            table = dict(transitions[failure])
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[failure].get(char, 0)
+                table[char] = next_state
+                queue.append(next_state)
+            transitions[state] = table
+
+        self._transitions = transitions
+        self._priority = priority
+        first_chars = sorted(goto[0])
+        self._skip = re.compile('[' + ''.join(re.escape(char) for char in first_chars) + ']') if first_chars else None
+
+    def best_priority(self, text):
+        """文本中出现的关键词的最高优先级
+
+        Returns:
+            int: 关键词序号（0为最高优先级），没有匹配时为None
+        """
+        if not text or self._skip is None:
+            return None
+        transitions = self._transitions
+        priority = self._priority
+        search = self._skip.search
+        best = self._NO_MATCH
+        length = len(text)
+        position = 0
+        while True:
+            match = search(text, position)
+            if match is None:
+                break
+            state = 0
+            index = match.start()
+            while index < length:
+                state = transitions[state].get(text[index], 0)
+                if not state:
+                    break
+                if priority[state] < best:
+                    best = priority[state]
+                    if not best:
+                        return 0
+                index += 1
+            position = index + 1
+        return None if best == self._NO_MATCH else best
+
+    def match(self, *texts):
+        """在一段或多段文本中查找优先级最高的关键词
+
+        Args:
+            texts: 待匹配的文本，None或空串会被忽略
+
+        Returns:
+            关键词对应的取值，没有匹配时为None
+        """
+        best = None
+        for text in texts:
+            priority = self.best_priority(text)
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if not best:
+                    break
+        return None if best is None else self.values[best]